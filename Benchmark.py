@@ -0,0 +1,447 @@
+'''
+Benchmarks for the mod manager on synthetic game folders.
+
+    python Benchmark.py                          # 10, 100, 1000 mods
+    python Benchmark.py --sizes 10,10000 --output bench.json
+    python Benchmark.py --compare old.json --output new.json
+    python Benchmark.py --store xml              # modlist.xml instead of SQLite
+
+Every size gets a fresh game folder (SlimeRancher.exe + SRML/mods with
+.dll/.disabled files of realistic sizes) and its own data/ directory.
+Each operation is timed cold (fresh ModManagerLogic, nothing cached) and
+warm (repeated on the same instance), then run again under tracemalloc
+for its memory peak; timings are taken without tracemalloc running.
+
+ModListFrame.update_list runs on a real Tk window when a display is
+available and on a headless Treeview stub otherwise; the JSON records
+which one was used.
+'''
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, REPO)
+
+import Logic
+from data.logic import Mods, Scanner, Settings, Store
+
+DEFAULT_SIZES = (10, 100, 1000)
+WARM_RUNS = 5
+# Share of generated mods that start out disabled
+DISABLED_SHARE = 0.3
+REMOVE_BATCH = 10
+
+
+def mod_size(rng):
+    # Mod DLLs are mostly tens of KB with a long tail of multi-MB ones
+    return int(min(max(rng.lognormvariate(10.6, 1.1), 4 * 1024), 8 * 1024 * 1024))
+
+
+def write_mod(path, rng, size=None):
+    # Unique header so no two files hash the same; the rest is a sparse zero tail
+    size = size if size is not None else mod_size(rng)
+    with open(path, "wb") as f:
+        f.write(b"MZ" + rng.randbytes(62))
+        f.truncate(size)
+    return size
+
+
+def generate_game_dir(root, count, seed=0, disabled_share=DISABLED_SHARE):
+    """
+    Create root/SlimeRancher.exe and root/SRML/mods with `count` fake mods.
+    Returns the path of the executable.
+    """
+    rng = random.Random(seed)
+    mods = os.path.join(root, "SRML", "mods")
+    os.makedirs(mods, exist_ok=True)
+    exe = os.path.join(root, "SlimeRancher.exe")
+    open(exe, "wb").close()
+    for i in range(count):
+        suffix = Scanner.DISABLED_SUFFIX if rng.random() < disabled_share else Scanner.ENABLED_SUFFIX
+        write_mod(os.path.join(mods, f"SyntheticMod{i:05d}{suffix}"), rng)
+    age_folder(mods)
+    return exe
+
+
+def age_folder(folder, seconds=3600):
+    # A folder changed just now is rescanned every time (Scanner's racy
+    # window); backdate it so warm runs measure the settled case
+    past = time.time() - seconds
+    os.utime(folder, (past, past))
+
+
+class StubTree:
+    """The parts of ttk.Treeview ModListFrame and VirtualRows use, without Tk."""
+
+    def __init__(self):
+        self.children = []
+        self.items = {}
+
+    def get_children(self, item=""):
+        return tuple(self.children)
+
+    def insert(self, parent, index, iid=None, values=(), tags=()):
+        self.items[iid] = (values, tags)
+        self.children.insert(len(self.children) if index == "end" else index, iid)
+        return iid
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.items.pop(iid, None)
+            if iid in self.children:
+                self.children.remove(iid)
+
+    def detach(self, *iids):
+        gone = set(iids)
+        self.children = [iid for iid in self.children if iid not in gone]
+
+    def move(self, iid, parent, index):
+        if iid in self.children:
+            self.children.remove(iid)
+        self.children.insert(index, iid)
+
+    def index(self, iid):
+        return self.children.index(iid)
+
+    def item(self, iid, values=None, tags=None):
+        self.items[iid] = (values, tags)
+
+    def set_children(self, item, *iids):
+        self.children = list(iids)
+
+    def selection(self):
+        return ()
+
+    def selection_set(self, *args):
+        pass
+
+    def yview(self, *args):
+        return (0.0, 1.0)
+
+    def yview_moveto(self, fraction):
+        pass
+
+    def bind_class(self, *args):
+        pass
+
+    def bindtags(self, tags=None):
+        if tags is not None:
+            self.tags = tuple(tags)
+        return getattr(self, "tags", ("stub", "Treeview", "all"))
+
+    def configure(self, **kwargs):
+        pass
+
+    def bbox(self, iid):
+        return None
+
+    def winfo_height(self):
+        return 0
+
+    def focus(self, *args):
+        return ""
+
+
+class _StubWidget:
+    def __init__(self, value=""):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, *args):
+        pass
+
+    def configure(self, **kwargs):
+        pass
+
+
+def make_list_frame():
+    # (frame, backend): a real ModListFrame when Tk can open a window, a stubbed one otherwise
+    from data.guis import MainWindow, VirtualList
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+    except Exception:
+        frame = MainWindow.ModListFrame.__new__(MainWindow.ModListFrame)
+        frame._init_state([("name", "asc")], MainWindow.VIRTUAL_THRESHOLD)
+        frame.tree = StubTree()
+        frame.filter_var = _StubWidget()
+        frame.filter_count = _StubWidget()
+        frame.virtual = VirtualList.VirtualRows(frame.tree, _StubWidget(), row_height=26)
+        return frame, "stub"
+
+    class Controller:
+        # Every callback the frame might wire up is a no-op
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: None
+
+    frame = MainWindow.ModListFrame(root, Controller())
+    frame.pack(fill="both", expand=True)
+    return frame, "tk"
+
+
+def close_list_frame(frame, backend):
+    # Destroy the hidden Tk root behind a frame from make_list_frame()
+    if backend == "tk":
+        frame.winfo_toplevel().destroy()
+
+
+class Bench:
+    def __init__(self, count, workdir, seed=0, backend=None):
+        self.count = count
+        self.backend = backend
+        self.workdir = workdir
+        self.seed = seed
+        self.game_dir = os.path.join(workdir, "game")
+        self.exe = generate_game_dir(self.game_dir, count, seed)
+        self.mods_folder = os.path.join(self.game_dir, "SRML", "mods")
+        self.instances = []
+        self.frames = []  # (frame, backend) from make_list_frame
+
+    def new_logic(self):
+        # Tracked so pending writes can be flushed before leaving workdir
+        logic = Logic.ModManagerLogic(self.backend)
+        self.instances.append(logic)
+        return logic
+
+    def close(self):
+        for logic in self.instances:
+            logic.flush()
+            logic.close()
+        self.instances = []
+        for frame, backend in self.frames:
+            close_list_frame(frame, backend)
+        self.frames = []
+
+    def fresh_logic(self, keep_caches=True):
+        # New ModManagerLogic on this size's data/ (cold in-memory state)
+        if not keep_caches:
+            # No open database may survive its files being deleted
+            self.close()
+            # modlist.xml too (written by the xml_* cases), or the new database
+            # would time a legacy import depending on which cases ran before
+            for name in (Store.HASHES_NAME, Store.METADATA_NAME, Store.DB_NAME,
+                         Store.DB_NAME + "-wal", Store.DB_NAME + "-shm",
+                         Store.XML_NAME, Store.XML_NAME + ".imported"):
+                try:
+                    os.remove(os.path.join("data", name))
+                except FileNotFoundError:
+                    pass
+        logic = self.new_logic()
+        logic.save_game_path(self.exe)
+        return logic
+
+    def first_mod(self, logic):
+        return sorted(logic.scanner.entries)[0]
+
+    def restore_removed(self, names):
+        for name in names:
+            write_mod(os.path.join(self.mods_folder, name), random.Random(name))
+        age_folder(self.mods_folder)
+
+    def cases(self):
+        """(name, setup() -> state, run(state), reset(state) or None); only run is timed."""
+        def logic_state():
+            return self.fresh_logic()
+
+        def synced_state():
+            logic = self.fresh_logic()
+            logic.sync_mods()
+            return logic
+
+        def xml_state():
+            return synced_state().export_xml()
+
+        counter = itertools.count()
+
+        def save_setting(logic):
+            # One persisted change: a whole-file rewrite for XML, one row for SQLite
+            logic.set_setting("benchmark", str(next(counter)))
+            logic.flush()
+
+        def toggle(logic):
+            filename = self.first_mod(logic)
+            logic.toggle_mod(filename, Scanner.is_enabled(filename))
+
+        def remove_state():
+            logic = synced_state()
+            names = sorted(logic.scanner.entries)[:REMOVE_BATCH]
+            return logic, names
+
+        def remove(state):
+            logic, names = state
+            logic.remove_mod_file(names)
+            logic.sync_mods()
+
+        def restore(state):
+            self.restore_removed(state[1])
+
+        def frame_state():
+            logic = synced_state()
+            mods = logic.get_mods()
+            frame, backend = make_list_frame()
+            self.frames.append((frame, backend))
+            return frame, mods
+
+        def toggle_all(logic):
+            enabled = sum(Scanner.is_enabled(f) for f in logic.scanner.entries)
+            logic.set_mods_enabled(Mods.DISABLE_ALL if enabled else Mods.ENABLE_ALL)
+
+        return [
+            ("logic_init", lambda: None, lambda _: self.new_logic(), None),
+            ("xml_load", xml_state,
+             lambda path: Settings.SettingsDocument(path, Store.default_document).get_root(), None),
+            ("xml_export", synced_state, lambda logic: logic.export_xml(), None),
+            ("save_setting", synced_state, save_setting, None),
+            ("sync_mods", logic_state, lambda logic: logic.sync_mods(), None),
+            ("sync_mods_forced", synced_state, lambda logic: logic.sync_mods(force=True), None),
+            ("get_mods", lambda: self.fresh_logic(keep_caches=False), lambda logic: logic.get_mods(), None),
+            ("toggle_mod", synced_state, toggle, None),
+            ("toggle_all", synced_state, toggle_all, None),
+            ("remove_mod_file", remove_state, remove, restore),
+            ("update_list", frame_state, lambda state: state[0].update_list(state[1]), None),
+        ]
+
+
+def time_case(setup, run, reset, warm_runs):
+    state = setup()
+    timings = []
+    for _ in range(1 + warm_runs):
+        started = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - started)
+        if reset is not None:
+            reset(state)
+    return timings[0], timings[1:]
+
+
+def memory_case(setup, run, reset):
+    # Peak bytes allocated during one cold and one warm run
+    state = setup()
+    peaks = []
+    for _ in range(2):
+        tracemalloc.start()
+        try:
+            run(state)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        if reset is not None:
+            reset(state)
+    return peaks
+
+
+def run_size(count, warm_runs, only=None, backend=None):
+    workdir = tempfile.mkdtemp(prefix=f"srmm-bench-{count}-")
+    cwd = os.getcwd()
+    try:
+        # Logic keeps modlist.xml and its caches in ./data
+        os.chdir(workdir)
+        bench = Bench(count, workdir, backend=backend)
+        results = {}
+        for name, setup, run, reset in bench.cases():
+            if only and name not in only:
+                continue
+            # Logic prints progress for some operations; keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                cold, warm = time_case(setup, run, reset, warm_runs)
+                cold_peak, warm_peak = memory_case(setup, run, reset)
+            bench.close()
+            results[name] = {
+                "cold_ms": round(cold * 1000, 3),
+                "warm_ms": round(statistics.median(warm) * 1000, 3),
+                "warm_min_ms": round(min(warm) * 1000, 3),
+                "cold_peak_kib": round(cold_peak / 1024, 1),
+                "warm_peak_kib": round(warm_peak / 1024, 1),
+            }
+            print(f"{count:>6} {name:<18} cold {results[name]['cold_ms']:>10.2f} ms"
+                  f"  warm {results[name]['warm_ms']:>9.2f} ms  peak {results[name]['cold_peak_kib']:>9.1f} KiB",
+                  file=sys.stderr)
+        return results
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def git_revision():
+    try:
+        import subprocess
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(old, new):
+    # Ratio new/old per size and operation (> 1 means slower)
+    lines = []
+    for size, ops in new["results"].items():
+        for name, values in ops.items():
+            before = old.get("results", {}).get(size, {}).get(name)
+            if not before:
+                continue
+            for key in ("cold_ms", "warm_ms"):
+                if before[key]:
+                    ratio = values[key] / before[key]
+                    flag = "  <-- slower" if ratio > 1.25 else ""
+                    lines.append(f"{size:>6} {name:<18} {key:<8} {before[key]:>10.2f} -> {values[key]:>10.2f}"
+                                 f"  x{ratio:.2f}{flag}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the mod manager on synthetic mod folders")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated mod counts (default: %(default)s)")
+    parser.add_argument("--warm-runs", type=int, default=WARM_RUNS)
+    parser.add_argument("--only", help="comma-separated operation names")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="earlier JSON result to compare against")
+    parser.add_argument("--store", choices=Store.BACKENDS, default=Store.default_backend(),
+                        help="persistence backend (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    only = set(args.only.split(",")) if args.only else None
+    frame, gui_backend = make_list_frame()
+    close_list_frame(frame, gui_backend)
+    report = {
+        "version": 1,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "gui_backend": gui_backend,
+        "store": args.store,
+        "warm_runs": args.warm_runs,
+        "results": {str(size): run_size(size, args.warm_runs, only, args.store) for size in sizes},
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print(compare(json.load(f), report), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+'''
+Headless command line for the mod manager. Only imports Logic (never
+tkinter), prints JSON and can run a batch of operations read from stdin:
+
+    python Cli.py list
+    python Cli.py enable MoreVaccables "Fast Travel"
+    python Cli.py disable --all
+    python Cli.py install ~/Downloads/SomeMod.zip
+    python Cli.py profile switch Testing
+    python Cli.py export-xml modlist-backup.xml
+    python Cli.py manifest export rig.json
+    python Cli.py manifest apply rig.json --dry-run
+    python Cli.py launch --wait
+    python Cli.py installs add Beta "D:/Games/Slime Rancher Beta/SlimeRancher.exe"
+    python Cli.py --on Stable,Beta disable MoreVaccables
+    python Cli.py batch < operations.txt
+
+Each batch line is one command, either shell-style ("enable Foo") or a JSON
+array (["enable", "Foo"]); one JSON result is printed per line. stdout only
+ever carries these results; messages printed by the logic go to stderr.
+'''
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse
+import json
+import os
+import shlex
+import sys
+import threading
+import Logic
+from data.logic import LogTail, Manifest, Mods, Scanner, Store, Trace
+
+
+class CommandError(Exception):
+    pass
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="Cli.py", description="Slime Rancher Mod Manager (headless)")
+    parser.add_argument("--game", help="SlimeRancher.exe to use for this run (not saved)")
+    parser.add_argument("--pretty", action="store_true", help="indent JSON output")
+    parser.add_argument("--timing", action="store_true", help="add startup and command times to the output")
+    parser.add_argument("--trace", metavar="FILE", help="write a Chrome trace of this run to FILE")
+    parser.add_argument("--store", choices=Store.BACKENDS, help="where settings and caches are kept")
+    parser.add_argument("--install", help="registered install to use for this run (not saved)")
+    parser.add_argument("--on", metavar="INSTALLS",
+                        help="run the command on several installs at once (comma-separated, or 'all')")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("list", help="list installed mods")
+    cmd.add_argument("--details", action="store_true",
+                     help="include assembly metadata, duplicates and dependency problems")
+
+    for name in ("enable", "disable"):
+        cmd = commands.add_parser(name, help=f"{name} mods (display name or filename)")
+        cmd.add_argument("mods", nargs="*")
+        cmd.add_argument("--all", action="store_true", help=f"{name} every mod")
+        cmd.add_argument("--cascade", action="store_true", help="also change dependencies/dependents")
+
+    cmd = commands.add_parser("install", help="install .dll files, folders or .zip archives")
+    cmd.add_argument("paths", nargs="+")
+
+    cmd = commands.add_parser("remove", help="move mods to SRML/.trash")
+    cmd.add_argument("mods", nargs="+")
+
+    cmd = commands.add_parser("profile", help="list, save, delete or switch profiles")
+    profile = cmd.add_subparsers(dest="action", required=True)
+    profile.add_parser("list")
+    sub = profile.add_parser("switch")
+    sub.add_argument("name")
+    sub = profile.add_parser("save", help="save the currently enabled mods")
+    sub.add_argument("name")
+    sub.add_argument("--mode", choices=("rename", "link"), default="rename")
+    sub = profile.add_parser("delete")
+    sub.add_argument("name")
+
+    cmd = commands.add_parser("launch", help="check the mods and start the game")
+    cmd.add_argument("--force", action="store_true", help="start even if the checks find problems")
+    cmd.add_argument("--wait", action="store_true", help="wait for the game to exit and report its exit code")
+    commands.add_parser("launch-history", help="recent launches with exit code, run time and mods")
+    cmd = commands.add_parser("log", help="last lines of the SRML log")
+    cmd.add_argument("mods", nargs="*", help="only lines mentioning these mods")
+    cmd.add_argument("--lines", type=int, default=100)
+    commands.add_parser("undo", help="undo the last toggle, install or remove of this batch")
+    commands.add_parser("redo", help="redo what undo reverted")
+    commands.add_parser("purge-trash", help="apply the trash size/age budget now")
+    cmd = commands.add_parser("export-xml", help="write all settings, mods and profiles as modlist.xml")
+    cmd.add_argument("path", nargs="?", help="default: data/modlist.xml")
+    cmd = commands.add_parser("manifest", help="export, verify or apply a manifest of the mods folder")
+    manifest = cmd.add_subparsers(dest="action", required=True)
+    sub = manifest.add_parser("export", help="write filename, state, size and hash of every mod")
+    sub.add_argument("path")
+    sub.add_argument("--no-cache", action="store_true", help="don't copy the mods into the mod cache")
+    sub = manifest.add_parser("verify", help="compare the mods folder with a manifest")
+    sub.add_argument("path")
+    sub = manifest.add_parser("apply", help="rename, copy and remove mods until the folder matches")
+    sub.add_argument("path")
+    sub.add_argument("--dry-run", action="store_true", help="only list the operations")
+    cmd = commands.add_parser("installs", help="list, add, remove or switch game installs")
+    installs = cmd.add_subparsers(dest="action", required=True)
+    installs.add_parser("list")
+    sub = installs.add_parser("add", help="register an install (or point an existing one elsewhere)")
+    sub.add_argument("name")
+    sub.add_argument("game_path", help="its SlimeRancher.exe")
+    sub = installs.add_parser("remove", help="forget an install; its files are not touched")
+    sub.add_argument("name")
+    sub = installs.add_parser("switch", help="make an install the active one")
+    sub.add_argument("name")
+    commands.add_parser("batch", help="read one command per line from stdin")
+    return parser
+
+
+def resolve_mods(logic, names):
+    # Accept filenames as well as display names (case-insensitive)
+    logic.sync_mods()
+    registry = logic.registry
+    found = []
+    missing = []
+    for name in names:
+        record = registry.get(name)
+        if record is None:
+            matches = registry.find(name) or registry.find(Scanner.display_name(name))
+            record = matches[0] if matches else None
+        if record is None:
+            missing.append(name)
+        else:
+            found.append(record.filename)
+    if missing:
+        raise CommandError("Unknown mod(s): " + ", ".join(missing))
+    return found
+
+
+def cmd_list(logic, args, cwd):
+    records = logic.get_mods() if args.details else logic.sync_mods()
+    return {"ok": True, "mods": [record.as_dict(details=args.details) for record in records]}
+
+
+def cmd_set_enabled(logic, args, cwd):
+    enabled = args.command == "enable"
+    if args.all:
+        targets = Mods.ENABLE_ALL if enabled else Mods.DISABLE_ALL
+    elif args.mods:
+        targets = [(filename, enabled) for filename in resolve_mods(logic, args.mods)]
+    else:
+        raise CommandError("Name one or more mods, or use --all.")
+    results = logic.set_mods_enabled(targets, cascade=args.cascade)
+    return {"ok": all(r["ok"] for r in results), "results": results}
+
+
+def cmd_install(logic, args, cwd):
+    # Paths are relative to where the command was started, not to this script
+    paths = [os.path.abspath(os.path.join(cwd, os.path.expanduser(p))) for p in args.paths]
+    results = logic.install_mods(paths)
+    return {"ok": all(r["ok"] for r in results), "results": results}
+
+
+def cmd_remove(logic, args, cwd):
+    ok, msg = logic.remove_mod_file(resolve_mods(logic, args.mods))
+    return {"ok": ok, "message": msg}
+
+
+def cmd_undo(logic, args, cwd):
+    # The history lives in memory, so this only reaches earlier lines of a batch
+    ok, msg = logic.undo() if args.command == "undo" else logic.redo()
+    return {"ok": ok, "message": msg}
+
+
+def cmd_purge_trash(logic, args, cwd):
+    removed, freed = logic.purge_trash()
+    return {"ok": True, "removed": removed, "freed_bytes": freed}
+
+
+def cmd_profile(logic, args, cwd):
+    if args.action == "list":
+        return {"ok": True, "active": logic.profiles.active,
+                "profiles": [{"name": p.name, "mode": p.mode, "mods": sorted(p.mods)}
+                             for p in logic.profiles.all()]}
+    if args.action == "save":
+        logic.save_profile(args.name, args.mode)
+        return {"ok": True}
+    if args.action == "delete":
+        if logic.profiles.get(args.name) is None:
+            raise CommandError(f"Profile '{args.name}' does not exist.")
+        logic.delete_profile(args.name)
+        return {"ok": True}
+    return logic.switch_profile(args.name)
+
+
+def cmd_manifest(logic, args, cwd):
+    path = os.path.abspath(os.path.join(cwd, os.path.expanduser(args.path)))
+    if args.action == "export":
+        return logic.export_manifest(path, cache=not args.no_cache)
+    try:
+        manifest = Manifest.read(path)
+    except Manifest.ManifestError as e:
+        raise CommandError(str(e))
+    if args.action == "verify":
+        return logic.verify_manifest(manifest)
+    return logic.apply_manifest(manifest, dry_run=args.dry_run)
+
+
+def cmd_launch(logic, args, cwd):
+    validation = logic.validate_launch()
+    if not validation["ok"] and not args.force:
+        return dict(validation, error="Pre-launch checks failed (use --force to start anyway).")
+    exited = threading.Event()
+    ok, msg = logic.start_game(on_exit=lambda record: exited.set())
+    result = {"ok": ok, "message": msg, "problems": validation["problems"], "checked": validation["checked"]}
+    if ok and args.wait:
+        exited.wait()
+        # The record is completed before on_exit is called
+        launch = logic.launches.last()
+        result.update(ok=launch["exit_code"] == 0, exit_code=launch["exit_code"], duration=launch["duration"])
+        if launch["exit_code"]:
+            result["error"] = f"Game exited with code {launch['exit_code']}."
+    return result
+
+
+def cmd_log(logic, args, cwd):
+    path = logic.srml_log_path()
+    if not path:
+        raise CommandError("No game path set. Start the GUI once or pass --game.")
+    tail = LogTail.LogTail(path)
+    if args.mods:
+        names = [name for filename in resolve_mods(logic, args.mods)
+                 for name in logic.registry.get(filename).log_names()]
+        tail.set_names(names)
+        tail.poll()
+        lines = tail.lines_for(names, args.lines)
+    else:
+        tail.poll()
+        lines = tail.tail(args.lines)
+    return {"ok": True, "path": path, "lines": [text for _, text in lines]}
+
+
+def cmd_launch_history(logic, args, cwd):
+    return {"ok": True, "launches": logic.launches.records()}
+
+
+def cmd_installs(logic, args, cwd):
+    if args.action == "list":
+        return {"ok": True, "active": logic.installs.active,
+                "installs": [{"name": name, "game_path": path}
+                             for name, path in logic.installs.game_paths().items()]}
+    if args.action == "add":
+        ok, msg = logic.add_install(args.name, os.path.abspath(os.path.join(cwd, args.game_path)))
+        return {"ok": ok, "message": msg}
+    if args.name not in logic.installs.names():
+        raise CommandError(f"Install '{args.name}' does not exist.")
+    # "logic" (dropped before printing) is what the rest of a batch runs against
+    if args.action == "remove":
+        active = logic.remove_install(args.name)
+        result = {"ok": True, "active": active}
+        if args.name == logic.install and active is not None:
+            result["logic"] = logic.for_install(active)
+        return result
+    return {"ok": True, "active": args.name, "logic": logic.switch_install(args.name)}
+
+
+def cmd_export_xml(logic, args, cwd):
+    path = os.path.abspath(os.path.join(cwd, args.path)) if args.path else None
+    return {"ok": True, "path": os.path.abspath(logic.export_xml(path))}
+
+
+COMMANDS = {
+    "list": cmd_list,
+    "enable": cmd_set_enabled,
+    "disable": cmd_set_enabled,
+    "install": cmd_install,
+    "remove": cmd_remove,
+    "profile": cmd_profile,
+    "launch": cmd_launch,
+    "launch-history": cmd_launch_history,
+    "log": cmd_log,
+    "export-xml": cmd_export_xml,
+    "manifest": cmd_manifest,
+    "installs": cmd_installs,
+    "undo": cmd_undo,
+    "redo": cmd_undo,
+    "purge-trash": cmd_purge_trash,
+}
+
+
+NEEDS_MODS_FOLDER = ("list", "enable", "disable", "install", "remove", "undo", "redo", "manifest")
+
+
+def run_command(logic, args, cwd):
+    needs_folder = args.command in NEEDS_MODS_FOLDER or args.command == "profile" and args.action in ("switch", "save")
+    if needs_folder and not logic.mods_folder:
+        return {"command": args.command, "ok": False,
+                "error": "No game path set. Start the GUI once or pass --game."}
+    started = time.perf_counter()
+    try:
+        result = COMMANDS[args.command](logic, args, cwd)
+    except CommandError as e:
+        result = {"ok": False, "error": str(e)}
+    except OSError as e:
+        result = {"ok": False, "error": str(e)}
+    result = dict(result, command=args.command)
+    if args.timing:
+        result["command_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def run_on_installs(logic, args, cwd):
+    # The same command on several installs at once, each against its own folder
+    names = logic.installs.names() if args.on == "all" else [n.strip() for n in args.on.split(",") if n.strip()]
+    results = logic.apply_to_installs(names, lambda install_logic: run_command(install_logic, args, cwd))
+    return {"ok": bool(results) and all(r["ok"] for r in results.values()),
+            "command": args.command, "installs": results}
+
+
+def execute(logic, args, cwd):
+    if args.on and args.command not in ("installs", "batch"):
+        return run_on_installs(logic, args, cwd)
+    return run_command(logic, args, cwd)
+
+
+def parse_line(parser, line):
+    # One batch line -> argparse namespace (argparse exits on errors; turn that into a message)
+    words = json.loads(line) if line.startswith("[") else shlex.split(line)
+    try:
+        return parser.parse_args([str(w) for w in words])
+    except SystemExit:
+        raise CommandError(f"Invalid command: {line}")
+
+
+def emit(result, pretty, out):
+    print(json.dumps(result, indent=2 if pretty else None, default=str), file=out, flush=True)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    # Results go to the real stdout; stray print()s of the logic must not
+    # end up between them, or the output would not be JSON any more
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        return run(parser, args, out)
+    finally:
+        sys.stdout = out
+
+
+def run(parser, args, out):
+    if args.trace:
+        Trace.enable()
+
+    # Logic keeps its files in ./data next to this script
+    cwd = os.getcwd()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    logic = Logic.ModManagerLogic(args.store)
+    if args.install:
+        logic = logic.for_install(args.install)
+        if logic is None:
+            parser.error(f"unknown install '{args.install}'")
+    if args.game:
+        logic.game_path = os.path.abspath(os.path.join(cwd, args.game))
+        logic.set_mods_folder_from_game_path(logic.game_path)
+    startup_ms = round((time.perf_counter() - _STARTED) * 1000, 2)
+
+    failures = 0
+    if args.command != "batch":
+        result = execute(logic, args, cwd)
+        result.pop("logic", None)
+        if args.timing:
+            result["startup_ms"] = startup_ms
+        failures += not result["ok"]
+        emit(result, args.pretty, out)
+    else:
+        for number, line in enumerate(sys.stdin, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                op = parse_line(parser, line)
+                if op.command == "batch":
+                    raise CommandError("Batches can't be nested.")
+                # Global flags of the batch apply to every line
+                op.timing = op.timing or args.timing
+                op.on = op.on or args.on
+                result = execute(logic, op, cwd)
+                # "installs switch" moves the following lines to the other install
+                logic = result.pop("logic", None) or logic
+            except (CommandError, ValueError) as e:
+                result = {"ok": False, "error": str(e)}
+            result["line"] = number
+            failures += not result["ok"]
+            emit(result, args.pretty, out)
+
+    logic.close()
+    if args.trace:
+        Trace.export_chrome(os.path.join(cwd, args.trace))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,34 +1,36 @@
 import os
-from urllib.request import urlretrieve
+import time
 import tkinter as tk
-from tkinter import messagebox, filedialog
+from tkinter import messagebox, filedialog, simpledialog
 from tkinter import ttk
-from data.guis import MainWindow, AddModsWindow, ConfirmWindow
+from data.guis import MainWindow, AddModsWindow, ConfirmWindow, DiagnosticsWindow, Jobs, LogWindow, Startup
+from data.logic import FileOps, Scanner, Watcher
+
+ICON_PATH = os.path.join("data", "pink.ico")
+ICON_URL = "https://raw.githubusercontent.com/surgamingoninsulin/GlobalImages/refs/heads/main/images/pink.ico"
+
+def is_game_exe(path):
+    # Windows maakt geen verschil in hoofdletters: slimerancher.exe is ook goed
+    return os.path.basename(path).lower() == "slimerancher.exe"
+
 
 class ModManagerGui:
-    def __init__(self, logic):
+    def __init__(self, logic, timer=None, download_assets=True, show_startup_times=False):
         self.logic = logic
+        # Meet de opstartfases (zie Main.py --startup-times)
+        self.timer = timer or Startup.StartupTimer()
         self.root = tk.Tk()
         self.root.title("Slime Rancher Mod Manager")
         self.root.geometry("700x500")
-        # Pas het venstericoon aan als het beschikbaar is
-        icon_path = os.path.join("data", "pink.ico")
-        icon_url = "https://raw.githubusercontent.com/surgamingoninsulin/GlobalImages/refs/heads/main/images/pink.ico"
-        if not os.path.exists(icon_path):
-            try:
-                os.makedirs(os.path.dirname(icon_path), exist_ok=True)
-                urlretrieve(icon_url, icon_path)
-            except Exception:
-                pass
-        if os.path.exists(icon_path):
-            try:
-                self.root.iconbitmap(icon_path)
-            except Exception:
-                pass
+        self.timer.mark("tk init")
+        # Venstericoon: de lokale kopie meteen, downloaden gebeurt pas na het eerste scherm
+        self._download_icon = download_assets and self.logic.get_setting("download_icon") != "False"
+        self.set_icon()
         
         # Laad initiële sorteerinstellingen vanuit logic
         self.sort_column = self.logic.sort_column
         self.sort_direction = self.logic.sort_direction
+        self.sort_keys = list(self.logic.sort_keys)
         
         # Maak venster niet-herschaalbaar
         self.root.resizable(False, False)
@@ -118,19 +120,93 @@ class ModManagerGui:
             font=("Segoe UI", 10, "bold")
         )
         
+        self.timer.mark("style setup")
+
         # Initialiseer hoofdvenster
         # Geef de initiële sorteerinstellingen door aan het hoofdvenster
-        self.main_window = MainWindow.ModListFrame(self.root, self, self.sort_column, self.sort_direction)
+        # Boven dit aantal mods worden alleen de zichtbare rijen opgebouwd (instelling virtual_list_threshold)
+        virtual_threshold = self.logic.get_int_setting("virtual_list_threshold", MainWindow.VIRTUAL_THRESHOLD)
+        self.main_window = MainWindow.ModListFrame(self.root, self, self.sort_column, self.sort_direction,
+                                                   self.sort_keys, virtual_threshold)
         self.main_window.pack(fill="both", expand=True)
 
+        # Bestandsoperaties draaien op een werkthread; resultaten komen via root.after terug
+        # Blijft pollen zodat de folder-watcher ook zonder lopende taak kan posten
+        self.jobs = Jobs.JobRunner(self.root, on_busy=self.main_window.set_busy, idle_poll_ms=200)
+        self._refresh_job = None
+        # Wijzigingen in SRML/mods (ook van buitenaf) verversen de lijst vanzelf
+        self.watcher = Watcher.FolderWatcher(self._on_folder_changed)
+        self.refresh_profiles()
+        self.refresh_installs()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Verborgen diagnosepaneel met trage operaties (tracing, zie data/logic/Trace.py)
+        self.diagnostics = None
+        self.root.bind_all("<Control-Shift-D>", lambda e: self.open_diagnostics())
+        self.log_window = None
+        self.root.bind_all("<Control-l>", lambda e: self.open_log_window())
+        self.timer.mark("build window")
+        self._first_paint_done = False
+        self.show_startup_times = show_startup_times
+
     def start(self):
+        # Het scannen start pas als het venster zichtbaar is
+        self.root.bind("<Map>", self._on_first_map, add="+")
+        self.root.mainloop()
+
+    def _on_first_map(self, event=None):
+        if self._first_paint_done or event is not None and event.widget is not self.root:
+            return
+        self._first_paint_done = True
+        # after_idle: de redraw van het venster staat al in de wachtrij en gaat voor
+        self.root.after_idle(self._after_first_paint)
+
+    def _after_first_paint(self):
+        self.timer.mark("first paint")
+        if self._download_icon and not os.path.exists(ICON_PATH):
+            Startup.fetch_in_background(ICON_URL, ICON_PATH,
+                                        lambda ok: ok and self.jobs.post(self.set_icon))
+
         # Controleer of het spelpad bekend is bij het opstarten
         if not self.logic.game_path:
+            if self.show_startup_times:
+                print(self.timer.report())
             self.ask_game_path()
         else:
-            self.refresh_mod_list()
-            
-        self.root.mainloop()
+            self.watch_mods_folder()
+            self._refresh_job = self.jobs.submit("Scanning mods", self._timed_scan,
+                                                 on_done=self._on_first_scan,
+                                                 on_error=lambda e: print(f"Scan failed: {e}"))
+
+    def _timed_scan(self):
+        started = time.perf_counter()
+        mods = self.logic.get_mods()
+        return mods, time.perf_counter() - started
+
+    def _on_first_scan(self, outcome):
+        mods, scan_seconds = outcome
+        self.timer.add("first scan (worker)", scan_seconds)
+        started = time.perf_counter()
+        self.main_window.update_list(mods)
+        self.root.update_idletasks()
+        self.timer.add("first render", time.perf_counter() - started)
+        if self.show_startup_times:
+            print(self.timer.report())
+        self.purge_trash()
+
+    def set_icon(self):
+        # Pas het venstericoon aan als het beschikbaar is (lokale kopie, geen netwerk)
+        if os.path.exists(ICON_PATH):
+            try:
+                self.root.iconbitmap(ICON_PATH)
+            except Exception:
+                pass
+
+    def on_close(self):
+        # Stop lopende taken en schrijf openstaande XML-wijzigingen weg
+        self.watcher.stop()
+        self.jobs.shutdown()
+        self.logic.flush()
+        self.root.destroy()
 
     def ask_game_path(self):
         messagebox.showinfo("Setup", "Selecteer 'SlimeRancher.exe' om te beginnen.")
@@ -139,46 +215,288 @@ class ModManagerGui:
             filetypes=[("Executable", "*.exe")]
         )
         
-        if file_path and file_path.endswith("SlimeRancher.exe"):
+        if file_path and is_game_exe(file_path):
             self.logic.save_game_path(file_path)
+            self.watch_mods_folder()
             self.refresh_mod_list()
         else:
             messagebox.showerror("Fout", "Ongeldig bestand geselecteerd. De applicatie wordt nu gesloten.")
             self.root.destroy()
 
+    def refresh_installs(self):
+        self.main_window.set_installs(self.logic.installs.names(), self.logic.install)
+
+    def switch_install_logic(self, name):
+        # Elke installatie houdt zijn eigen snapshot en undo-historie; terugschakelen scant niet opnieuw
+        if name == self.logic.install:
+            return
+        logic = self.logic.switch_install(name)
+        if logic is None:
+            messagebox.showerror("Fout", f"Installatie '{name}' bestaat niet meer.")
+            self.refresh_installs()
+            return
+        self._use_logic(logic)
+
+    def _use_logic(self, logic):
+        # Lopende taken houden hun oude logic; alles wat hierna komt gebruikt de nieuwe
+        self.logic = logic
+        self._refresh_job = None
+        if self.log_window is not None and self.log_window.winfo_exists():
+            # De log hoort bij de vorige spelmap
+            self.log_window.close()
+        self.log_window = None
+        self.watch_mods_folder()
+        self.refresh_mod_list()
+        self.refresh_profiles()
+        self.refresh_installs()
+        self.update_undo_state()
+
+    def add_install_logic(self):
+        name = simpledialog.askstring("Installatie toevoegen", "Naam (bijv. Beta):", parent=self.root)
+        if not name or not name.strip():
+            return
+        file_path = filedialog.askopenfilename(
+            title=f"Selecteer SlimeRancher.exe voor '{name.strip()}'",
+            filetypes=[("Executable", "*.exe")]
+        )
+        if not file_path:
+            return
+        if not is_game_exe(file_path):
+            messagebox.showerror("Fout", "Ongeldig bestand geselecteerd.")
+            return
+        ok, msg = self.logic.add_install(name, file_path)
+        if not ok:
+            messagebox.showerror("Fout", msg)
+            return
+        self.refresh_installs()
+        self.switch_install_logic(name.strip())
+
+    def remove_install_logic(self, name):
+        if self.logic.installs.names() == [name]:
+            messagebox.showerror("Fout", "De laatste installatie kan niet verwijderd worden.")
+            return
+        active = self.logic.remove_install(name)
+        if name == self.logic.install:
+            self._use_logic(self.logic.for_install(active))
+        else:
+            self.refresh_installs()
+
+    def watch_mods_folder(self):
+        self.watcher.watch(self.logic.mods_folder)
+
+    def _on_folder_changed(self):
+        # Draait op de watcher-thread: alleen voor wijzigingen van buitenaf (eigen acties verversen
+        # zelf in on_done). Een mod die ter plekke wordt overschreven verandert de mtime van de
+        # map niet, dus de volgende scan moet de map echt lezen; daarna via root.after naar de lijst
+        self.logic.invalidate()
+        self.jobs.post(self.refresh_mod_list)
+
+    def open_diagnostics(self):
+        if self.diagnostics is not None and self.diagnostics.winfo_exists():
+            self.diagnostics.lift()
+            return
+        self.diagnostics = DiagnosticsWindow.DiagnosticsWindow(self.root)
+
+    def open_log_window(self):
+        # SRML-log volgen; filteren op de selectie gebruikt de index van de tail
+        if self.log_window is not None and self.log_window.winfo_exists():
+            self.log_window.lift()
+            return
+        path = self.logic.srml_log_path()
+        if not path:
+            messagebox.showerror("Fout", "Geen spelmap ingesteld.")
+            return
+        self.log_window = LogWindow.LogWindow(self.root, path, self.main_window.records,
+                                              self.main_window.selected_records)
+
     def open_add_mod_window(self):
         AddModsWindow.AddModDialog(self.root, self)
 
-    def confirm_delete(self, mod_filenames):
-        # mod_filenames is nu een lijst
-        ConfirmWindow.DeleteConfirmDialog(self.root, self, mod_filenames)
+    def confirm_delete(self, records):
+        # records: de geselecteerde ModRecords; de dialoog toont hun naam
+        ConfirmWindow.DeleteConfirmDialog(self.root, self, records)
+
+    def set_mods_enabled(self, targets):
+        # Eén batch met rollback; targets is een lijst (bestandsnaam, aan/uit) of ENABLE_ALL/DISABLE_ALL
+        if not isinstance(targets, list):
+            self._submit_toggle(targets)
+            return
+        # De afhankelijkheden (scan, hashes, metadata) worden op de achtergrond bepaald
+        self.jobs.submit("Checking dependencies", self.logic.cascade_changes, targets,
+                         on_done=lambda extra: self._confirm_cascade(targets, extra),
+                         on_error=self.show_job_error)
 
-    # Deze methode wordt herhaaldelijk aangeroepen binnen een lus in MainWindow.on_toggle
-    def toggle_mod_status(self, filename, current_status):
-        self.logic.toggle_mod(filename, current_status)
+    def _confirm_cascade(self, targets, extra):
+        if extra:
+            # Bied aan om afhankelijkheden mee te schakelen
+            enable = [f for f, on in extra if on]
+            disable = [f for f, on in extra if not on]
+            lines = []
+            if enable:
+                lines.append("Ook inschakelen (vereist): " + ", ".join(enable[:10]))
+            if disable:
+                lines.append("Ook uitschakelen (afhankelijk): " + ", ".join(disable[:10]))
+            answer = messagebox.askyesnocancel(
+                "Afhankelijkheden",
+                "\n".join(lines) + "\n\nJa = meenemen, Nee = alleen de selectie.")
+            if answer is None:
+                return
+            if answer:
+                targets = targets + extra
+        self._submit_toggle(targets)
 
-    def add_mod_logic(self, file_path):
-        self.logic.add_mod_file(file_path)
+    def _submit_toggle(self, targets):
+        self.jobs.submit("Updating mods", self.logic.set_mods_enabled, targets,
+                         on_done=self._on_toggle_done, on_error=self.show_job_error)
+
+    def _on_toggle_done(self, results):
         self.refresh_mod_list()
+        self.update_undo_state()
+        failed = [r for r in results if r["error"] and not r["error"].startswith("Not applied")]
+        if failed:
+            details = "\n".join(f"{r['filename']}: {r['error']}" for r in failed[:10])
+            messagebox.showerror("Fout", f"Geen wijzigingen toegepast, hernoemen mislukt:\n{details}")
+
+    def install_mods_logic(self, paths):
+        # Meerdere .dll's, mappen en .zip-archieven in één keer installeren
+        self.jobs.submit(f"Installing {len(paths)} item(s)", self.logic.install_mods, list(paths),
+                         with_progress=True, on_done=self._on_install_done, on_error=self.show_job_error)
+
+    def _on_install_done(self, results):
+        self.refresh_mod_list()
+        self.update_undo_state()
+        failed = [r for r in results if not r["ok"]]
+        if failed:
+            installed = len(results) - len(failed)
+            details = "\n".join(f"{r['filename'] or r['source']}: {r['error']}" for r in failed[:10])
+            if len(failed) > 10:
+                details += f"\n... en {len(failed) - 10} meer"
+            messagebox.showwarning("Installatie", f"{installed} mod(s) geïnstalleerd, {len(failed)} mislukt:\n{details}")
 
     def delete_mod_logic(self, filenames):
-        # filenames is nu een lijst
-        self.logic.remove_mod_file(filenames)
+        # filenames is nu een lijst; ze gaan naar SRML/.trash en zijn ongedaan te maken
+        self.jobs.submit("Deleting mods", self.logic.remove_mod_file, filenames,
+                         with_progress=True, on_done=self._on_delete_done, on_error=self.show_job_error)
+
+    def _on_delete_done(self, outcome):
+        self._on_file_job_done(outcome)
+        self.purge_trash()
+
+    def _on_file_job_done(self, outcome):
         self.refresh_mod_list()
-        
+        self.update_undo_state()
+        success, msg = outcome
+        if not success:
+            messagebox.showerror("Fout", msg)
+
+    def undo_logic(self):
+        self.jobs.submit("Undoing", self.logic.undo, on_done=self._on_file_job_done,
+                         on_error=self.show_job_error)
+
+    def redo_logic(self):
+        self.jobs.submit("Redoing", self.logic.redo, on_done=self._on_file_job_done,
+                         on_error=self.show_job_error)
+
+    def update_undo_state(self):
+        self.main_window.set_undo_state(self.logic.journal.undo_label(), self.logic.journal.redo_label())
+
+    def purge_trash(self):
+        # Prullenbak op de achtergrond binnen het grootte- en leeftijdsbudget houden
+        self.jobs.submit("Emptying trash", self.logic.purge_trash,
+                         on_error=lambda e: print(f"Could not purge trash: {e}"))
+
+    def show_job_error(self, error):
+        if not isinstance(error, FileOps.OperationCancelled):
+            messagebox.showerror("Fout", str(error))
+
     def start_game_logic(self):
-        # Roept de logica aan om het spel te starten
-        success, msg = self.logic.start_game()
+        # Eerst de mods controleren (parallel, op de achtergrond), daarna starten
+        self.jobs.submit("Checking mods", self._check_before_launch, self.logic,
+                         on_done=self._on_launch_validated, on_error=self.show_job_error)
+
+    @staticmethod
+    def _check_before_launch(logic):
+        # Draait op de worker: bestanden controleren en het afhankelijkheidsrapport opbouwen
+        return logic.validate_launch(), logic.dependency_report()
+
+    def _on_launch_validated(self, outcome):
+        # Waarschuw voor kapotte bestanden en combinaties voordat SRML ze probeert te laden
+        validation, report = outcome
+        lines = [f"{p['file']}: {p['problem']}" if p["file"] else p["problem"]
+                 for p in validation["problems"]]
+        lines += [f"{f}: mist {', '.join(refs)}" for f, refs in report["missing"].items()]
+        lines += [f"{f}: vereist uitgeschakelde {', '.join(deps)}"
+                  for f, deps in report["disabled_dependencies"].items()]
+        lines += ["Cyclus: " + " -> ".join(cycle) for cycle in report["cycles"]]
+        if lines:
+            more = f"\n... en {len(lines) - 10} meer" if len(lines) > 10 else ""
+            if not messagebox.askyesno("Controle voor het starten",
+                                       "\n".join(lines[:10]) + more + "\n\nToch starten?"):
+                return
+
+        # Roept de logica aan om het spel te starten; het afsluiten komt via de wachtrij terug
+        success, msg = self.logic.start_game(
+            on_exit=lambda record: self.jobs.post(self._on_game_exited, record))
         if not success:
             messagebox.showerror("Fout", msg)
 
+    def _on_game_exited(self, record):
+        # Een crash koppelen aan de mods die toen aan stonden
+        if record["exit_code"]:
+            mods = ", ".join(Scanner.display_name(f) for f in record["mods"][:10])
+            more = f" en {len(record['mods']) - 10} meer" if len(record["mods"]) > 10 else ""
+            messagebox.showwarning(
+                "Spel afgesloten",
+                f"Het spel stopte na {record['duration']:.0f} s met code {record['exit_code']}.\n"
+                f"Actieve mods: {mods or 'geen'}{more}")
+
+    def switch_profile_logic(self, name):
+        # Alleen de mods die verschillen worden hernoemd/gelinkt, als één batch
+        self.jobs.submit(f"Switching to {name}", self.logic.switch_profile, name,
+                         on_done=self._on_profile_switched, on_error=self.show_job_error)
+
+    def _on_profile_switched(self, result):
+        self.refresh_mod_list()
+        self.update_undo_state()
+        if not result["ok"]:
+            messagebox.showerror("Fout", f"Profiel niet toegepast: {result['error']}")
+        elif result["missing"] or result["conflicts"]:
+            lines = []
+            if result["missing"]:
+                lines.append("Niet gevonden: " + ", ".join(result["missing"][:10]))
+            if result["conflicts"]:
+                lines.append("Niet uitgeschakeld, .disabled-kopie bestaat al: " + ", ".join(result["conflicts"][:10]))
+            messagebox.showwarning("Profiel", "\n".join(lines))
+        self.refresh_profiles()
+
+    def save_profile_logic(self, name, mode):
+        self.jobs.submit(f"Saving profile {name}", self.logic.save_profile, name, mode,
+                         on_done=lambda _: self.refresh_profiles(), on_error=self.show_job_error)
+
+    def delete_profile_logic(self, name):
+        self.logic.delete_profile(name)
+        self.refresh_profiles()
+
+    def refresh_profiles(self):
+        self.main_window.set_profiles(self.logic.profiles.names(), self.logic.profiles.active)
+
     # *** FIX: Deze methode was waarschijnlijk afwezig in uw lokale bestand. ***
-    def save_sort_settings(self, column, direction):
+    def save_sort_settings(self, column, direction, extra_keys=()):
         # Werk interne status bij en sla op in XML via logica
         self.sort_column = column
         self.sort_direction = direction
-        self.logic.save_sort_settings(column, direction)
+        self.sort_keys = [(column, direction)] + list(extra_keys)
+        self.logic.save_sort_settings(column, direction, extra_keys)
         
     def refresh_mod_list(self):
-        mods = self.logic.get_mods()
-        self.main_window.update_list(mods)
\ No newline at end of file
+        # Een scan die nog in de wachtrij staat ziet deze wijzigingen ook al
+        if self._refresh_job is not None and not self._refresh_job.started:
+            return
+        self._refresh_job = self.jobs.submit("Scanning mods", self.logic.get_mods,
+                                             on_done=self._on_mods_scanned,
+                                             on_error=lambda e: print(f"Scan failed: {e}"))
+
+    def _on_mods_scanned(self, records):
+        self.main_window.update_list(records)
+        # Een wijziging van buitenaf kan de undo-historie hebben gewist
+        self.update_undo_state()
\ No newline at end of file
@@ -1,62 +1,116 @@
-import xml.etree.ElementTree as ET
+import atexit
 import os
 import shutil
-import subprocess  # Needed to start external programs
-from pathlib import Path
+import threading
+from data.logic import Dependencies, DotNetMeta, FileOps, HashIndex, Installs, Journal, Launch, LogTail, Manifest, Mods, Profiles, Scanner, Store, Threads, Trace
+
 
 class ModManagerLogic:
-    def __init__(self):
+    def __init__(self, backend=None, install=None, shared=None):
         # Define paths
-        self.xml_file = os.path.join("data", "modlist.xml")
-        self.ensure_file_exists()
+        self.xml_file = os.path.join("data", Store.XML_NAME)
+        if shared is None:
+            # Settings, mod list, profiles and caches: modlist.db (SQLite) or
+            # modlist.xml, see data/logic/Store.py
+            self.store = Store.open_store("data", backend)
+            atexit.register(self.flush)
+            # SHA-256 per installed file, only re-hashed when size/mtime change
+            self.content_index = HashIndex.ContentIndex(self.store)
+            # Assembly name/version/references per file content
+            self.metadata_cache = DotNetMeta.MetadataCache(self.store)
+            # Named loadouts
+            self.profiles = Profiles.ProfileStore(self.store)
+            # Registered game installs, and one ModManagerLogic per install (see for_install)
+            self.installs = Installs.InstallRegistry(self.store)
+            self._peers = {}
+            self._peers_lock = threading.Lock()
+            if install is None:
+                install = self.installs.active
+        else:
+            # Another install: same store and caches, its own folder state
+            self.store = shared.store
+            self.content_index = shared.content_index
+            self.metadata_cache = shared.metadata_cache
+            self.profiles = shared.profiles
+            self.installs = shared.installs
+            self._peers = shared._peers
+            self._peers_lock = shared._peers_lock
+        # Registered install this instance manages (None: no install registered yet)
+        self.install = install
+        if install is not None:
+            self._peers.setdefault(install, self)
         self.game_path = self.load_game_path()
         self.mods_folder = None
+        # Snapshot of the mods folder used for incremental syncing
+        self.scanner = Scanner.ModFolderScanner()
+        # One ModRecord per mod file, updated from the scan diffs and handed to the GUI
+        self.registry = Mods.ModRegistry()
+        # Guards the snapshot and XML; the GUI calls in from worker threads
+        self.lock = threading.RLock()
+        # Which mods reference which; updated per file as the model changes
+        self.dependency_graph = Dependencies.DependencyGraph()
+        # Undo/redo of toggles, installs and deletes; deleted files go to SRML/.trash
+        self.journal = Journal.Journal()
+        self.trash = None
+        # Pre-launch file checks (cached by size/mtime) and the launches started from here
+        self.launch_checks = Launch.FileChecks()
+        self.launches = Launch.LaunchHistory(self)
+        self._mods_synced = False
+        # Set when files may have changed without touching the folder mtime
+        self._rescan_needed = False
         
         if self.game_path:
             self.set_mods_folder_from_game_path(self.game_path)
             
-        # Initialize sort settings state (will be loaded/saved in XML)
+        # Initialize sort settings state (loaded from/saved to the store)
         self.sort_column = "name"
         self.sort_direction = "asc"
         self.load_sort_settings() # Load saved settings on init
 
-    def ensure_file_exists(self):
-        # Create base XML if it doesn't exist
-        if not os.path.exists(self.xml_file):
-            root = ET.Element("manager")
-            settings = ET.SubElement(root, "settings")
-            # Default sort settings
-            ET.SubElement(settings, "sort_column").text = "name"
-            ET.SubElement(settings, "sort_direction").text = "asc"
-            mods = ET.SubElement(root, "mods")
-            tree = ET.ElementTree(root)
-            os.makedirs("data", exist_ok=True)
-            tree.write(self.xml_file)
+    def flush(self):
+        # Write pending changes immediately (used on shutdown)
+        self.store.flush()
+
+    def close(self):
+        self.store.close()
+
+    def export_xml(self, path=None):
+        # Everything in the store as a modlist.xml (a backup or for reading;
+        # the SQLite store never imports it back). Syncing first puts the
+        # active install's mods in the stored list.
+        self.sync_mods()
+        return self.store.export_xml(path or self.xml_file)
+
+    def get_setting(self, tag):
+        # game_path and the other Installs.INSTALL_SETTINGS belong to the install
+        if self.install is not None and tag in Installs.INSTALL_SETTINGS:
+            return self.installs.get_setting(self.install, tag)
+        return self.store.get_setting(tag)
+
+    def get_int_setting(self, tag, default):
+        try:
+            return int(self.get_setting(tag))
+        except (TypeError, ValueError):
+            return default
+
+    def set_setting(self, tag, value):
+        if self.install is not None and tag in Installs.INSTALL_SETTINGS:
+            self.installs.set_setting(self.install, tag, value)
+        else:
+            self.store.set_setting(tag, value)
 
     def load_game_path(self):
-        # Read the path to SlimeRancher.exe from the XML
-        tree = ET.parse(self.xml_file)
-        root = tree.getroot()
-        settings = root.find("settings")
-        path_elem = settings.find("game_path")
-        if path_elem is not None:
-            return path_elem.text
-        return None
+        # Read the path to SlimeRancher.exe from the settings
+        return self.get_setting("game_path")
 
     def save_game_path(self, path):
-        # Save the path to the XML
-        tree = ET.parse(self.xml_file)
-        root = tree.getroot()
-        settings = root.find("settings")
-        if settings is None:
-            settings = ET.SubElement(root, "settings")
-        
-        path_elem = settings.find("game_path")
-        if path_elem is None:
-            path_elem = ET.SubElement(settings, "game_path")
-        
-        path_elem.text = path
-        tree.write(self.xml_file)
+        # Save the path to the settings; the first game picked becomes the default install
+        if self.install is None:
+            self.install = Installs.DEFAULT_NAME
+            self._peers.setdefault(self.install, self)
+            self.installs.add(self.install, path)
+            self.installs.active = self.install
+        self.set_setting("game_path", path)
         
         self.game_path = path
         self.set_mods_folder_from_game_path(path)
@@ -86,156 +140,904 @@ class ModManagerLogic:
             mods_folder = None
 
         self.mods_folder = mods_folder
+        self.trash = Journal.Trash(os.path.join(srml_folder, ".trash")) if mods_folder else None
+        self.journal.clear()
+        self.scanner.reset(mods_folder)
+        self.registry.reset()
+        self._mods_synced = False
+        self.dependency_graph.clear()
+        self.dependency_graph.set_external(Dependencies.managed_assemblies(game_exe_path))
+
+    def for_install(self, name):
+        """
+        The ModManagerLogic of a registered install (None if unknown). It
+        shares this instance's store and caches, and is kept once created,
+        so its scan snapshot, undo history and launch checks survive
+        switching away and back.
+        """
+        with self._peers_lock:
+            logic = self._peers.get(name)
+            if logic is None and name in self.installs.names():
+                logic = ModManagerLogic(install=name, shared=self)
+            return logic
+
+    def switch_install(self, name):
+        # Make `name` the active install and return its logic (None if unknown)
+        logic = self.for_install(name)
+        if logic is not None:
+            with logic.lock:
+                self.installs.active = name
+                # Reconcile the stored mod list from the kept snapshot, no full rescan
+                logic._mods_synced = False
+        return logic
+
+    def add_install(self, name, game_path):
+        # Register an install, or point an existing one at another game; returns (success, msg)
+        ok, msg = self.installs.add(name, game_path)
+        if ok:
+            with self._peers_lock:
+                logic = self._peers.get(name.strip())
+            if logic is not None and logic.game_path != game_path:
+                logic.game_path = game_path
+                logic.set_mods_folder_from_game_path(game_path)
+        return ok, msg
+
+    def remove_install(self, name):
+        # Forget an install (nothing on disk is touched); returns the new active install
+        self.installs.remove(name)
+        with self._peers_lock:
+            self._peers.pop(name, None)
+        return self.installs.active
+
+    def apply_to_installs(self, names, operation, max_workers=Installs.APPLY_WORKERS):
+        """
+        Run operation(logic) for several installs at once on a thread pool,
+        e.g. lambda logic: logic.set_mods_enabled(targets). Every install
+        has its own lock and folder, so they never wait on each other.
+        Returns {name: result}; an unknown install or an exception becomes
+        {"ok": False, "error": ...}.
+        """
+        results = {}
+        targets = []
+        for name in names:
+            logic = self.for_install(name)
+            if logic is None or not logic.mods_folder:
+                results[name] = {"ok": False, "error": f"Install '{name}' has no game folder."}
+            else:
+                targets.append((name, logic))
+        if not targets:
+            return results
+
+        def run(target):
+            name, logic = target
+            with Trace.span("install batch", install=name):
+                try:
+                    return name, operation(logic)
+                except Exception as e:
+                    return name, {"ok": False, "error": str(e)}
+
+        with Threads.pool(min(max_workers, len(targets)), "srmm-install") as pool:
+            results.update(pool.map(run, targets))
+        return results
 
     def load_sort_settings(self):
-        # Load saved sorting column and direction from XML
-        try:
-            tree = ET.parse(self.xml_file)
-            root = tree.getroot()
-            settings = root.find("settings")
-            
-            col_elem = settings.find("sort_column")
-            dir_elem = settings.find("sort_direction")
-            
-            if col_elem is not None:
-                self.sort_column = col_elem.text
-            if dir_elem is not None:
-                self.sort_direction = dir_elem.text
-        except ET.ParseError:
-            print("Error parsing modlist.xml for sort settings. Using defaults.")
-        except Exception as e:
-            print(f"An unexpected error occurred loading sort settings: {e}. Using defaults.")
+        # Load saved sorting column and direction
+        column = self.get_setting("sort_column")
+        direction = self.get_setting("sort_direction")
+        if column:
+            self.sort_column = column
+        if direction:
+            self.sort_direction = direction
 
-    def save_sort_settings(self, column, direction):
-        # Save current sorting column and direction to XML
+        # Optional secondary keys, stored as "size:desc,name:asc"
+        self.sort_keys = [(self.sort_column, self.sort_direction)]
+        for part in (self.get_setting("sort_keys") or "").split(","):
+            col, _, direction = part.partition(":")
+            if col and col != self.sort_column and direction in ("asc", "desc"):
+                self.sort_keys.append((col, direction))
+
+    def save_sort_settings(self, column, direction, extra_keys=()):
+        # Save current sorting column and direction
         self.sort_column = column
         self.sort_direction = direction
-        
-        try:
-            tree = ET.parse(self.xml_file)
-            root = tree.getroot()
-            settings = root.find("settings")
-            
-            col_elem = settings.find("sort_column")
-            if col_elem is None:
-                col_elem = ET.SubElement(settings, "sort_column")
-            col_elem.text = column
-
-            dir_elem = settings.find("sort_direction")
-            if dir_elem is None:
-                dir_elem = ET.SubElement(settings, "sort_direction")
-            dir_elem.text = direction
-            
-            tree.write(self.xml_file)
-        except Exception as e:
-            print(f"Error saving sort settings: {e}")
+        self.sort_keys = [(column, direction)] + list(extra_keys)
+        with self.store.lock:
+            self.set_setting("sort_column", column)
+            self.set_setting("sort_direction", direction)
+            self.set_setting("sort_keys", ",".join(f"{c}:{d}" for c, d in extra_keys))
+
+    @Trace.traced("validate")
+    def validate_launch(self):
+        """
+        Pre-launch check: SRML is installed next to the game, every enabled
+        mod is a readable, non-empty PE file, and no two enabled mods have
+        the same content or assembly name. File headers are read in
+        parallel while the content index hashes; both are cached by size and
+        mtime, so a repeat launch only reads files that changed.
+
+        Returns {"ok", "problems": [{"file", "problem"}], "checked"}, where
+        "checked" counts the files read this time.
+        """
+        result = {"ok": False, "problems": [], "checked": 0}
+        problems = result["problems"]
+        if not self.game_path or not os.path.exists(self.game_path):
+            problems.append({"file": None, "problem": "Slime Rancher path not found."})
+            return result
+        problem = Launch.srml_problem(self.game_path)
+        if problem:
+            problems.append({"file": None, "problem": problem})
 
-    def start_game(self):
-        # Start SlimeRancher.exe
+        if self.mods_folder:
+            with self.lock:
+                self.sync_mods()
+                entries = Launch.enabled_entries(self.scanner.entries)
+            with Threads.pool(1, "srmm-validate") as pool:
+                hashed = pool.submit(self.update_content_index)
+                file_problems, result["checked"] = self.launch_checks.run(self.mods_folder, entries)
+                hashed.result()
+            for filename in sorted(file_problems):
+                problems.append({"file": filename, "problem": file_problems[filename]})
+
+            # Duplicates: same content, or the same assembly from two different files
+            by_sha = {}
+            by_assembly = {}
+            for filename in sorted(entries):
+                sha = self.content_index.sha_for(os.path.join(self.mods_folder, filename))
+                if sha is None or filename in file_problems:
+                    continue
+                if sha in by_sha:
+                    problems.append({"file": filename, "problem": f"Same file as '{by_sha[sha]}'."})
+                    continue
+                by_sha[sha] = filename
+                info = self.assembly_info(filename)
+                if info and info.get("assembly_name"):
+                    assembly = info["assembly_name"]
+                    other = by_assembly.setdefault(assembly.lower(), filename)
+                    if other != filename:
+                        problems.append({"file": filename,
+                                         "problem": f"Assembly '{assembly}' is also loaded from '{other}'."})
+            self.metadata_cache.save()
+
+        result["ok"] = not problems
+        return result
+
+    def srml_log_path(self):
+        # SRML's log next to the game (setting "srml_log" overrides it)
+        return self.get_setting("srml_log") or (LogTail.find_log(self.game_path) if self.game_path else None)
+
+    def start_game(self, on_exit=None):
+        # Start SlimeRancher.exe; the process is tracked in self.launches and
+        # on_exit(record) is called from a background thread when it ends
         if self.game_path and os.path.exists(self.game_path):
+            # Imported here so the headless CLI doesn't pay for it on every start
+            import subprocess
             try:
                 # Popen starts the process independently of this tool
                 # cwd ensures the working directory is correct (important for mods)
-                subprocess.Popen(self.game_path, cwd=os.path.dirname(self.game_path))
-                return True, "Game started successfully!"
+                process = subprocess.Popen(self.game_path, cwd=os.path.dirname(self.game_path))
             except Exception as e:
                 return False, f"Error starting game: {e}"
+            with self.lock:
+                self.sync_mods()
+                mods = [f for f in self.scanner.entries if Scanner.is_enabled(f)]
+            self.launches.track(process, mods, self.profiles.active, on_exit)
+            return True, "Game started successfully!"
         else:
             return False, "Slime Rancher 2 path not found."
 
-    def sync_mods(self):
+    def sync_mods(self, force=False):
         # Synchronize physical files with the XML list
+        return self._sync(force, external=True)
+
+    def _resync(self):
+        # Rescan right after one of our own file operations, so that a later
+        # sync_mods() only finds changes made outside the manager
+        self._sync(True, external=False)
+
+    def _sync(self, force, external):
         if not self.mods_folder or not os.path.exists(self.mods_folder):
             return []
 
-        # 1. Read physical files
-        found_files = []
-        for f in os.listdir(self.mods_folder):
-            full_path = os.path.join(self.mods_folder, f)
-            if os.path.isfile(full_path):
-                if f.endswith(".dll"):
-                    found_files.append({"name": f, "enabled": "True"})
-                elif f.endswith(".disabled"):
-                    found_files.append({"name": f, "enabled": "False"})
-
-        # 2. Update XML
-        tree = ET.parse(self.xml_file)
-        root = tree.getroot()
-        mods_elem = root.find("mods")
-        if mods_elem is None:
-            mods_elem = ET.SubElement(root, "mods")
-        
-        # Clear old list
-        for child in list(mods_elem):
-            mods_elem.remove(child)
-
-        # Fill with new scan
-        output_list = []
-        for mod_data in found_files:
-            new_mod = ET.SubElement(mods_elem, "mod")
-            new_mod.set("filename", mod_data["name"])
-            display_name = mod_data["name"].replace(".dll", "").replace(".disabled", "")
-            new_mod.set("name", display_name)
-            new_mod.set("enabled", mod_data["enabled"])
-            output_list.append(mod_data)
-
-        tree.write(self.xml_file)
-        return output_list
-
-    def toggle_mod(self, filename, current_enabled):
+        with self.lock:
+            # 1. Incremental scan; an unchanged folder costs a single stat
+            force = force or self._rescan_needed
+            self._rescan_needed = False
+            with Trace.span("scan", full=force) as span:
+                diff = self.scanner.scan(force)
+                span.set(items=len(self.scanner.entries), added=len(diff.added),
+                         removed=len(diff.removed), renamed=len(diff.renamed),
+                         changed=len(diff.changed))
+
+            if external and (diff.added or diff.removed or diff.renamed):
+                # Files added, removed or renamed by something else: the
+                # recorded moves may no longer match the folder
+                self.journal.clear()
+
+            # 2. Update only the touched records and stored mod rows
+            self._commit_diff(diff)
+            return self.registry.records()
+
+    def invalidate(self):
+        # The next sync does a full scan (e.g. a file was overwritten in place).
+        # Safe to call from any thread, including the folder watcher.
+        self._rescan_needed = True
+
+    def _commit_diff(self, diff):
+        # Mirror a scan diff into the records and the stored mod list
+        self.registry.apply(diff, self.scanner.entries)
+        if diff.renamed:
+            self.content_index.rename(self.mods_folder, diff.renamed)
+        for old_name, new_name in diff.renamed:
+            self.dependency_graph.rename(old_name, new_name)
+        for filename in diff.removed:
+            self.dependency_graph.remove(filename)
+        if self._mods_synced and not (diff.added or diff.removed or diff.renamed):
+            return
+        if self.install is not None and self.install != self.installs.active:
+            # Only the active install is mirrored in the stored mod list;
+            # it is reconciled from the snapshot once it becomes active
+            self._mods_synced = False
+            return
+
+        with self.store.lock:
+            if self._mods_synced:
+                # Content-only changes (diff.changed) do not affect the list
+                self.store.update_mods(diff.added, diff.removed, diff.renamed)
+            else:
+                # First sync of this folder: reconcile against what the store holds
+                self.store.reconcile_mods(self.scanner.entries)
+                self._mods_synced = True
+
+    def toggle_mod(self, filename, current_enabled, cascade=False):
+        # current_enabled: bool
         # Rename file from .dll to .disabled or vice versa
+        result = self.set_mods_enabled([(filename, not current_enabled)], cascade)
+        if result and not result[0]["ok"]:
+            print(f"Error renaming file '{filename}': {result[0]['error']}")
+
+    def set_mods_enabled(self, targets, cascade=False):
+        """
+        Enable/disable several mods as one batch.
+
+        `targets` is an iterable of (filename, enabled) pairs, or
+        Mods.ENABLE_ALL / Mods.DISABLE_ALL. All renames are attempted in
+        order; if one fails, the renames already done are reverted so the
+        folder is left as it was.
+        The snapshot and XML are updated once at the end. With cascade=True
+        the dependencies of enabled mods and the dependents of disabled mods
+        are changed along with them (see cascade_changes).
+
+        Returns one dict per requested file:
+            {"filename", "new_filename", "ok", "error"}
+        """
         if not self.mods_folder:
+            return []
+
+        with self.lock:
+            if cascade and targets not in (Mods.ENABLE_ALL, Mods.DISABLE_ALL):
+                targets = list(targets)
+                targets += self.cascade_changes(targets)
+            return self._set_mods_enabled(targets, record=True)
+
+    def cascade_changes(self, targets):
+        # Extra (filename, enabled) pairs needed to keep dependencies satisfied
+        with self.lock:
+            self.update_dependency_graph()
+            return self.dependency_graph.cascade(list(targets))
+
+    def _set_mods_enabled(self, targets, record=False):
+        if targets in (Mods.ENABLE_ALL, Mods.DISABLE_ALL):
+            self.sync_mods()
+            want = targets == Mods.ENABLE_ALL
+            targets = [(filename, want) for filename in self.scanner.entries]
+
+        results = []
+        pending = []  # (result, old_name, new_name) for files that need a rename
+        for filename, enabled in targets:
+            result = {"filename": filename, "new_filename": filename, "ok": True, "error": None}
+            results.append(result)
+            if Scanner.is_enabled(filename) != bool(enabled):
+                result["new_filename"] = Scanner.toggled_filename(filename)
+                pending.append((result, filename, result["new_filename"]))
+
+        done = []
+        with Trace.span("rename", items=len(pending)) as span:
+            for result, old_name, new_name in pending:
+                old_path = os.path.join(self.mods_folder, old_name)
+                new_path = os.path.join(self.mods_folder, new_name)
+                try:
+                    if os.path.exists(new_path):
+                        # os.rename would silently replace it on POSIX
+                        raise FileExistsError(f"'{new_name}' already exists")
+                    os.rename(old_path, new_path)
+                except OSError as e:
+                    result["ok"] = False
+                    result["error"] = str(e)
+                    span.set(error=str(e))
+                    self._rollback_renames(done)
+                    for other, _, _ in pending:
+                        if other is not result:
+                            other["ok"] = False
+                            other["error"] = other["error"] or "Not applied: batch was rolled back"
+                        other["new_filename"] = other["filename"]
+                    return results
+                done.append((old_name, new_name))
+
+        if done:
+            self._commit_diff(self.scanner.apply_renames(done))
+            if record:
+                label = (f"Toggle {Scanner.display_name(done[0][0])}" if len(done) == 1
+                         else f"Toggle {len(done)} mods")
+                self.journal.record(label, [(os.path.join(self.mods_folder, old), os.path.join(self.mods_folder, new))
+                                            for old, new in done])
+        return results
+
+    def save_profile(self, name, mode=Profiles.MODE_RENAME, mods=None):
+        # Store the currently enabled mods (or the given display names) as a profile
+        with self.lock:
+            if mods is None:
+                self.sync_mods()
+                mods = {Scanner.display_name(f) for f in self.scanner.entries if Scanner.is_enabled(f)}
+            self.profiles.save(Profiles.Profile(name, mods, mode))
+            self.profiles.active = name
+
+    def delete_profile(self, name):
+        with self.lock:
+            self.profiles.delete(name)
+
+    def profile_store_folder(self):
+        # Mods parked by hardlink-mode profiles: SRML/.profile-store
+        return os.path.join(os.path.dirname(self.mods_folder), ".profile-store")
+
+    @Trace.traced("profile switch")
+    def switch_profile(self, name):
+        """
+        Make the mods of profile `name` the enabled set.
+
+        Only the files whose state differs are renamed, as one batch with
+        rollback. In hardlink mode, mods that belong to other profiles only
+        are parked in the profile store, and this profile's mods are
+        hardlinked (or copied if links aren't possible) back from it. The
+        renames, parks and links are one undo step.
+
+        Returns {"ok", "error", "renamed", "linked", "parked", "missing",
+        "conflicts"}; conflicts are enabled mods that could not be disabled
+        because their .disabled name is taken (see Profiles.plan_renames).
+        """
+        result = {"ok": False, "error": None, "renamed": 0, "linked": 0, "parked": 0, "missing": [],
+                  "conflicts": []}
+        if not self.mods_folder:
+            result["error"] = "No mods folder set."
+            return result
+
+        with self.lock:
+            profile = self.profiles.get(name)
+            if profile is None:
+                result["error"] = f"Profile '{name}' does not exist."
+                return result
+
+            self.sync_mods(force=True)
+            link_ops = []
+            try:
+                self._apply_profile_links(profile, link_ops, park=profile.mode == Profiles.MODE_LINK)
+            except OSError as e:
+                self._rollback_profile_links(link_ops)
+                self._resync()
+                result["error"] = f"Could not switch profile: {e}"
+                return result
+            if link_ops:
+                self._resync()
+
+            targets, result["conflicts"] = Profiles.plan_renames(self.scanner.entries, profile.mods)
+            renames = self._set_mods_enabled(targets)
+            failed = [r for r in renames if not r["ok"]]
+            if failed:
+                self._rollback_profile_links(link_ops)
+                self._resync()
+                result["error"] = f"Could not switch profile: {failed[0]['filename']}: {failed[0]['error']}"
+                return result
+            self._record_profile_switch(name, link_ops, renames)
+
+            present = {Scanner.display_name(f) for f in self.scanner.entries}
+            result["missing"] = sorted(profile.mods - present)
+            result["renamed"] = len(targets)
+            result["linked"] = sum(1 for op in link_ops if op[0] == "linked")
+            result["parked"] = len(link_ops) - result["linked"]
+            result["ok"] = True
+            self.profiles.active = name
+            return result
+
+    def _record_profile_switch(self, name, link_ops, renames):
+        # One journal entry for the whole switch. A linked mod is journaled
+        # like an install (as if it came out of the trash); a mod dropped
+        # because the store already held it can't be undone by a move, so
+        # then the history is cleared instead of left pointing at it.
+        if any(op == "unlinked" for op, _, _ in link_ops):
+            self.journal.clear()
             return
+        moves = []
+        for op, mod_path, store_path in link_ops:
+            if op == "moved":
+                moves.append((mod_path, store_path))
+            else:
+                moves.append((self.trash.allocate(os.path.basename(mod_path)), mod_path))
+        moves += [(os.path.join(self.mods_folder, r["filename"]), os.path.join(self.mods_folder, r["new_filename"]))
+                  for r in renames if r["new_filename"] != r["filename"]]
+        self.journal.record(f"Switch to {name}", moves)
 
-        old_path = os.path.join(self.mods_folder, filename)
-        
-        if current_enabled == "True":
-            new_name = filename.replace(".dll", ".disabled")
-        else:
-            new_name = filename.replace(".disabled", ".dll")
-            
-        new_path = os.path.join(self.mods_folder, new_name)
-        
+    def _apply_profile_links(self, profile, ops, park):
+        store = self.profile_store_folder()
+        if not park and not os.path.isdir(store):
+            return
+        os.makedirs(store, exist_ok=True)
+        in_profiles = set().union(*(p.mods for p in self.profiles.all()))
+
+        present = {}
+        for filename in list(self.scanner.entries):
+            present.setdefault(Scanner.display_name(filename), []).append(filename)
+
+        # Park mods that only other profiles use (hardlink mode only)
+        for mod_name, files in present.items():
+            if not park or mod_name in profile.mods or mod_name not in in_profiles:
+                continue
+            for filename in files:
+                mod_path = os.path.join(self.mods_folder, filename)
+                store_path = os.path.join(store, mod_name + Scanner.ENABLED_SUFFIX)
+                if os.path.exists(store_path) and os.path.samefile(mod_path, store_path):
+                    os.remove(mod_path)  # the store already holds this exact file
+                    ops.append(("unlinked", mod_path, store_path))
+                else:
+                    os.replace(mod_path, store_path)
+                    ops.append(("moved", mod_path, store_path))
+
+        # Bring back this profile's mods from the store, in either mode
+        for mod_name in profile.mods:
+            store_path = os.path.join(store, mod_name + Scanner.ENABLED_SUFFIX)
+            if mod_name in present or not os.path.exists(store_path):
+                continue
+            mod_path = os.path.join(self.mods_folder, mod_name + Scanner.ENABLED_SUFFIX)
+            self._link_or_copy(store_path, mod_path)
+            ops.append(("linked", mod_path, store_path))
+
+    def _rollback_profile_links(self, ops):
+        for op, mod_path, store_path in reversed(ops):
+            try:
+                if op == "linked":
+                    os.remove(mod_path)
+                elif op == "moved":
+                    os.replace(store_path, mod_path)
+                else:
+                    self._link_or_copy(store_path, mod_path)
+            except OSError as e:
+                print(f"Could not roll back '{os.path.basename(mod_path)}': {e}")
+
+    @staticmethod
+    def _link_or_copy(source, dest):
+        # Hardlink when the filesystem allows it, otherwise copy on demand
         try:
-            os.rename(old_path, new_path)
-        except OSError as e:
-            print(f"Error renaming file '{filename}': {e}")
+            os.link(source, dest)
+        except OSError:
+            shutil.copy2(source, dest)
 
+    def _rollback_renames(self, done):
+        for old_name, new_name in reversed(done):
+            try:
+                os.rename(os.path.join(self.mods_folder, new_name),
+                          os.path.join(self.mods_folder, old_name))
+            except OSError as e:
+                print(f"Could not roll back '{new_name}' to '{old_name}': {e}")
 
-    def add_mod_file(self, source_path):
+    def add_mod_file(self, source_path, progress=None, cancel=None):
+        # Copy a mod into SRML/mods; progress(done, total) and the cancel
+        # event are optional hooks for the GUI's background jobs.
         if not self.mods_folder or not source_path:
-            return
+            return False, "No mods folder or file selected."
             
         filename = os.path.basename(source_path)
+        filename = Scanner.installed_filename(filename) or filename
         dest_path = os.path.join(self.mods_folder, filename)
+        replaced = {}
         
         try:
-            shutil.copy2(source_path, dest_path)
-            self.sync_mods()
+            # Don't copy a DLL whose exact content is already installed
+            existing = self.find_installed_copy(HashIndex.hash_file(source_path))
+            if existing:
+                return False, f"'{filename}' is already installed as '{existing}'."
+            # A file with the same name goes to the trash, so the install can be undone
+            replaced = self._trash_existing([filename])
+            FileOps.copy_file(source_path, dest_path, progress, cancel)
+        except FileOps.OperationCancelled as e:
+            self._restore_replaced(replaced)
+            return False, str(e)
         except Exception as e:
+            self._restore_replaced(replaced)
             print(f"Could not copy mod: {e}")
+            return False, f"Could not copy mod: {e}"
+
+        with self.lock:
+            self.journal.record(f"Install {Scanner.display_name(filename)}", self._install_moves([filename], replaced))
+            self._resync()
+        return True, f"Installed '{filename}'."
+
+    @Trace.traced("install")
+    def install_mods(self, sources, progress=None, cancel=None):
+        """
+        Install many mods at once from .dll files, folders and .zip archives.
 
-    def remove_mod_file(self, filenames):
+        Copies run in parallel and the mods folder is rescanned once at the
+        end. Files that get overwritten are moved to the trash first, and
+        the whole batch is one undo step. Returns one result dict per file
+        (see Installer.install_items).
+        """
         if not self.mods_folder:
-            return
+            return [{"source": None, "filename": None, "ok": False, "error": "No mods folder set."}]
+
+        # zipfile and the thread pool are only loaded when something gets installed
+        from data.logic import Installer
+        items, results = Installer.collect_items(sources)
+        if not items:
+            return results
+        known_hashes = self.installed_hashes()
+        try:
+            replaced = self._trash_existing([item.filename for item in items])
+        except OSError as e:
+            return results + [{"source": None, "filename": None, "ok": False,
+                               "error": f"Could not move replaced mods to the trash: {e}"}]
+        installed = Installer.install_items(items, self.mods_folder, progress, cancel,
+                                            known_hashes=known_hashes)
+        # Failed or skipped installs get the file they would have replaced back
+        self._restore_replaced({r["filename"]: replaced[r["filename"]]
+                                for r in installed if not r["ok"] and r["filename"] in replaced})
+        ok = [r["filename"] for r in installed if r["ok"]]
+        label = f"Install {Scanner.display_name(ok[0])}" if len(ok) == 1 else f"Install {len(ok)} mods"
+        with self.lock:
+            self.journal.record(label, self._install_moves(ok, replaced))
+            self._resync()
+        return results + installed
+
+    def _trash_existing(self, filenames):
+        # Move files about to be overwritten to the trash: {filename: trash path}
+        replaced = {}
+        try:
+            for filename in filenames:
+                path = os.path.join(self.mods_folder, filename)
+                if os.path.exists(path):
+                    trash_path = self.trash.allocate(filename)
+                    Journal.move(path, trash_path)
+                    replaced[filename] = trash_path
+        except OSError:
+            self._restore_replaced(replaced)
+            raise
+        return replaced
+
+    def _restore_replaced(self, replaced):
+        for filename, trash_path in replaced.items():
+            try:
+                Journal.move(trash_path, os.path.join(self.mods_folder, filename))
+            except OSError as e:
+                print(f"Could not restore '{filename}' from the trash: {e}")
+
+    def _install_moves(self, filenames, replaced):
+        # Journal form of an install: as if the new file came out of the
+        # trash (and the one it replaced went in), so undo/redo are moves
+        moves = []
+        for filename in filenames:
+            path = os.path.join(self.mods_folder, filename)
+            if filename in replaced:
+                moves.append((path, replaced[filename]))
+            moves.append((self.trash.allocate(filename), path))
+        return moves
+
+    @Trace.traced("delete")
+    def remove_mod_file(self, filenames, progress=None, cancel=None):
+        # Deleted mods are moved to SRML/.trash (one rename each, undoable);
+        # purge_trash removes them for good later.
+        if not self.mods_folder:
+            return False, "No mods folder set."
 
         # Ensure we are iterating over a list, even if only one file is passed
         if isinstance(filenames, str):
             filenames = [filenames]
 
-        for filename in filenames:
+        errors = []
+        moves = []
+        for i, filename in enumerate(filenames):
+            if cancel is not None and cancel.is_set():
+                errors.append("Cancelled before all files were deleted.")
+                break
             full_path = os.path.join(self.mods_folder, filename)
             try:
                 if os.path.exists(full_path):
-                    # NOTE: Using os.remove for permanent deletion.
-                    os.remove(full_path) 
-                    print(f"File deleted: {filename}")
+                    trash_path = self.trash.allocate(filename)
+                    Journal.move(full_path, trash_path)
+                    moves.append((full_path, trash_path))
             except OSError as e:
                 print(f"Could not delete file '{filename}': {e}")
-                
-        # Only sync once after all files have been processed
-        self.sync_mods()
+                errors.append(f"Could not delete file '{filename}': {e}")
+            if progress is not None:
+                progress(i + 1, len(filenames))
+
+        label = (f"Delete {Scanner.display_name(os.path.basename(moves[0][0]))}" if len(moves) == 1
+                 else f"Delete {len(moves)} mods")
+        with self.lock:
+            self.journal.record(label, moves)
+            self._resync()
+        if errors:
+            return False, "\n".join(errors)
+        return True, f"Deleted {len(moves)} mod(s)."
+
+    def undo(self):
+        # Reverse the last toggle/install/delete; returns (success, msg)
+        return self._step(self.journal.undo_label, self.journal.undo, "undo")
+
+    def redo(self):
+        return self._step(self.journal.redo_label, self.journal.redo, "redo")
+
+    def _step(self, label_of, step, verb):
+        if not self.mods_folder:
+            return False, "No mods folder set."
+        with self.lock:
+            label = label_of()
+            if label is None:
+                return False, f"Nothing to {verb}."
+            try:
+                entry = step()
+            except OSError as e:
+                # The step is dropped (see Journal.undo), so the next one is reachable again
+                return False, f"Could not {verb} '{label}': {e}. It was removed from the history."
+            moves = entry.moves if verb == "redo" else [(dst, src) for src, dst in reversed(entry.moves)]
+            if all(os.path.dirname(src) == self.mods_folder and os.path.dirname(dst) == self.mods_folder
+                   for src, dst in moves):
+                # Only toggles: update the snapshot without listing the folder
+                self._commit_diff(self.scanner.apply_renames(
+                    [(os.path.basename(src), os.path.basename(dst)) for src, dst in moves]))
+            else:
+                self._resync()
+            return True, f"{verb.capitalize()}: {label}"
 
+    @Trace.traced("purge")
+    def purge_trash(self):
+        """
+        Remove files from SRML/.trash beyond the age and size budget
+        (settings trash_max_days and trash_max_mb). Files the undo history
+        still needs are kept as long as the size budget allows.
+        Returns (files removed, bytes freed).
+        """
+        if self.trash is None:
+            return 0, 0
+        max_mb = self.get_int_setting("trash_max_mb", Journal.TRASH_MAX_BYTES // (1024 * 1024))
+        max_days = self.get_int_setting("trash_max_days", Journal.TRASH_MAX_AGE_DAYS)
+        with self.lock:
+            return self.trash.purge(max_mb * 1024 * 1024, max_days, self.journal.referenced_paths())
+
+    def update_content_index(self):
+        # Hash new/changed files of the current snapshot and persist the index
+        if not self.mods_folder:
+            return
+        with self.lock:
+            self.sync_mods()
+            entries = dict(self.scanner.entries)
+        if self.content_index.refresh(self.mods_folder, entries):
+            self.content_index.save()
+
+    def installed_hashes(self):
+        # {sha256: filename} for everything currently in SRML/mods
+        self.update_content_index()
+        return {sha: names[0] for sha, names in self._hash_groups().items()}
+
+    def find_installed_copy(self, digest):
+        # Filename in SRML/mods with exactly this content, if any
+        return self.installed_hashes().get(digest)
+
+    def _hash_groups(self):
+        groups = {}
+        for filename in self.scanner.entries:
+            sha = self.content_index.sha_for(os.path.join(self.mods_folder, filename))
+            if sha:
+                groups.setdefault(sha, []).append(filename)
+        return groups
+
+    def mod_cache(self):
+        # Content-addressed mod copies used by manifests (setting "mod_cache")
+        return Manifest.ModCache(self.get_setting("mod_cache") or Manifest.CACHE_FOLDER)
+
+    def _manifest_snapshot(self, manifest=None):
+        """
+        Stat the mods folder and hash what a manifest comparison needs: with
+        a manifest only files whose size occurs in it (others can't match),
+        and of those only the ones whose size/mtime changed since they were
+        last hashed. Returns (entries, sha_for).
+        """
+        with self.lock:
+            self.sync_mods(force=True)
+            entries = dict(self.scanner.entries)
+        only = None
+        if manifest is not None:
+            sizes = {mod["size"] for mod in manifest["mods"]}
+            only = {filename for filename, (size, _, _) in entries.items() if size in sizes}
+        if self.content_index.refresh(self.mods_folder, entries, only=only):
+            self.content_index.save()
+
+        def sha_for(filename):
+            size, mtime_ns, _ = entries[filename]
+            return self.content_index.current_sha(os.path.join(self.mods_folder, filename), size, mtime_ns)
+        return entries, sha_for
+
+    @Trace.traced("manifest export")
+    def export_manifest(self, path, cache=True):
+        """
+        Write a manifest of SRML/mods (filename, state, size and SHA-256 of
+        every mod) to `path`. With cache=True the mods are also added to the
+        mod cache, so apply_manifest can bring them back later.
+        Returns {"ok", "error", "path", "mods", "cached"}.
+        """
+        result = {"ok": False, "error": None, "path": path, "mods": 0, "cached": 0}
+        if not self.mods_folder:
+            result["error"] = "No mods folder set."
+            return result
+        entries, sha_for = self._manifest_snapshot()
+        manifest = Manifest.build(entries, sha_for, self.game_path)
+        unreadable = [mod["filename"] for mod in manifest["mods"] if mod["sha256"] is None]
+        if unreadable:
+            result["error"] = "Could not read: " + ", ".join(unreadable)
+            return result
+        if cache:
+            mod_cache = self.mod_cache()
+            for mod in manifest["mods"]:
+                result["cached"] += mod_cache.add(os.path.join(self.mods_folder, mod["filename"]), mod["sha256"])
+        Manifest.write(manifest, path)
+        result["mods"] = len(manifest["mods"])
+        result["ok"] = True
+        return result
+
+    @Trace.traced("manifest verify")
+    def verify_manifest(self, manifest):
+        # Compare SRML/mods with a manifest (see Manifest.compare); nothing is changed
+        if not self.mods_folder:
+            return {"ok": False, "error": "No mods folder set."}
+        entries, sha_for = self._manifest_snapshot(manifest)
+        return Manifest.compare(manifest, entries, sha_for)
+
+    def _find_cached_copy(self, digest, size):
+        # A file with this content outside SRML/mods: the mod cache, then any indexed path
+        path = self.mod_cache().path_for(digest, size)
+        if path is not None:
+            return path
+        prefix = os.path.join(self.mods_folder, "")
+        for path in self.content_index.paths_for(digest):
+            try:
+                if not path.startswith(prefix) and os.path.getsize(path) == size:
+                    return path
+            except OSError:
+                continue
+        return None
+
+    @Trace.traced("manifest apply")
+    def apply_manifest(self, manifest, dry_run=False, progress=None, cancel=None):
+        """
+        Make SRML/mods match a manifest with as few file operations as
+        possible: files already right are untouched, content present under
+        another name is renamed, missing content is copied from the mod
+        cache and everything else goes to the trash. The moves are one batch
+        with rollback, and the whole apply is one undo step.
+
+        Returns {"ok", "error", "removed", "renamed", "copied", "missing",
+        "errors"} plus the planned operations under "plan" with dry_run.
+        """
+        result = {"ok": False, "error": None, "removed": 0, "renamed": 0, "copied": 0,
+                  "missing": [], "errors": []}
+        if not self.mods_folder:
+            result["error"] = "No mods folder set."
+            return result
+        entries, sha_for = self._manifest_snapshot(manifest)
+        plan = Manifest.plan(manifest, self.mods_folder, entries, sha_for, self._find_cached_copy)
+        result["missing"] = plan.missing
+        if dry_run:
+            result["plan"] = plan.as_dict()
+            result["ok"] = not plan.missing
+            return result
+
+        def path(filename):
+            return os.path.join(self.mods_folder, filename)
+
+        # Removals first so their names are free; renames onto another rename's
+        # source (e.g. two files swapping content) go through the trash
+        moves = [(path(f), self.trash.allocate(f)) for f in plan.removals]
+        sources = {old for old, _ in plan.renames}
+        direct = []
+        staged = []
+        for old, new in plan.renames:
+            if new in sources:
+                tmp = self.trash.allocate(old)
+                moves.append((path(old), tmp))
+                staged.append((tmp, path(new)))
+            else:
+                direct.append((path(old), path(new)))
+        moves += direct + staged
+
+        with self.lock:
+            try:
+                Journal.apply_moves(moves)
+            except OSError as e:
+                self._resync()
+                result["error"] = f"Could not apply manifest: {e}"
+                return result
+        result["removed"] = len(plan.removals)
+        result["renamed"] = len(plan.renames)
+
+        copied = []
+        for i, (source, filename) in enumerate(plan.copies):
+            try:
+                FileOps.copy_file(source, path(filename), cancel=cancel)
+                copied.append(filename)
+            except FileOps.OperationCancelled as e:
+                result["errors"].append(str(e))
+                break
+            except OSError as e:
+                result["errors"].append(f"Could not copy '{filename}': {e}")
+            if progress is not None:
+                progress(i + 1, len(plan.copies))
+        result["copied"] = len(copied)
+
+        with self.lock:
+            self.journal.record("Apply manifest", moves + self._install_moves(copied, {}))
+            self._resync()
+        result["ok"] = not (plan.missing or result["errors"])
+        return result
+
+    def assembly_info(self, filename):
+        # .NET metadata for a file in SRML/mods (None if not a .NET assembly)
+        path = os.path.join(self.mods_folder, filename)
+        digest = self.content_index.sha_for(path)
+        if digest is None:
+            return None
+        info = self.metadata_cache.get(digest, path)
+        if info is None or "error" in info:
+            return None
+        return info
+
+    @Trace.traced()
     def get_mods(self):
-        mods_data = self.sync_mods()
-        return mods_data
\ No newline at end of file
+        # ModRecords with assembly info, duplicates and dependency problems filled in
+        records = self.sync_mods()
+        self.update_content_index()
+
+        # Flag files whose content also exists under another name
+        duplicate_of = {}
+        for names in self._hash_groups().values():
+            if len(names) > 1:
+                for name in names:
+                    duplicate_of[name] = [other for other in names if other != name]
+
+        infos = self.update_dependency_graph(records)
+        graph = self.dependency_graph
+
+        with self.lock:
+            for record in records:
+                filename = record.filename
+                problems = graph.problems_for(filename) if filename in graph.nodes else ()
+                self.registry.annotate(record, infos[filename], duplicate_of.get(filename, ()), problems)
+        return records
+
+    @Trace.traced("metadata")
+    def update_dependency_graph(self, records=None):
+        # Feed every mod's references into the graph; unchanged mods are no-ops
+        if records is None:
+            records = self.sync_mods()
+            self.update_content_index()
+        infos = {}
+        with self.lock:
+            for record in records:
+                info = self.assembly_info(record.filename)
+                infos[record.filename] = info
+                refs = [ref["name"] for ref in info["references"]] if info else ()
+                self.dependency_graph.update(record.filename, info and info["assembly_name"], refs,
+                                             record.enabled)
+        self.metadata_cache.save()
+        return infos
+
+    def dependency_report(self):
+        # Missing dependencies, cycles and enabled mods with disabled dependencies
+        with self.lock:
+            self.update_dependency_graph()
+            return self.dependency_graph.report()
\ No newline at end of file
@@ -4,13 +4,39 @@ Description: A Mod Manager for the first game "Slime Rancher" not mistaken for "
 Version: 1.0.0 
 Lisence: GNU GENERAL PUBLIC LICENSE
 '''
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse
+import atexit
 import Logic
 import Gui
 import ctypes
 import platform
+from data.guis import Startup
+from data.logic import Store, Trace
 
 # Main entry point of the application
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Slime Rancher Mod Manager")
+    parser.add_argument("--startup-times", action="store_true",
+                        help="print how long each startup phase took")
+    parser.add_argument("--offline", action="store_true",
+                        help="don't download missing assets (window icon)")
+    parser.add_argument("--store", choices=Store.BACKENDS,
+                        help="keep settings and caches in modlist.db (sqlite) or modlist.xml (xml)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record timing spans and write them as a Chrome trace to FILE on exit")
+    args = parser.parse_args()
+
+    if args.trace:
+        Trace.enable()
+        atexit.register(Trace.export_chrome, args.trace)
+
+    timer = Startup.StartupTimer(_STARTED)
+    timer.mark("import")
+
     # Ensure High DPI support on Windows for sharp, modern look
     if platform.system() == "Windows":
         try:
@@ -19,10 +45,12 @@ if __name__ == "__main__":
             pass
 
     # Initialize the logic (Model)
-    logic_instance = Logic.ModManagerLogic()
+    logic_instance = Logic.ModManagerLogic(args.store)
+    timer.mark("logic init")
     
     # Initialize the GUI (View/Controller) and pass logic
-    app = Gui.ModManagerGui(logic_instance)
+    app = Gui.ModManagerGui(logic_instance, timer, download_assets=not args.offline,
+                            show_startup_times=args.startup_times)
     
     # Start the application
-    app.start()
\ No newline at end of file
+    app.start()
@@ -5,7 +5,7 @@ class AddModDialog(tk.Toplevel):
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
-        self.title("Install Mod")
+        self.title("Install Mods")
         self.geometry("420x160")
         # Slime Rancher geïnspireerde achtergrond
         self.configure(bg="#fdf6ff")
@@ -14,21 +14,28 @@ class AddModDialog(tk.Toplevel):
         self.transient(parent)
         self.grab_set()
 
-        lbl = ttk.Label(self, text="Select a .dll file to install:")
+        lbl = ttk.Label(self, text="Select .dll files, .zip archives or a folder to install:")
         lbl.pack(pady=15, padx=10)
 
         btn_frame = ttk.Frame(self, style="Card.TFrame")
-        btn_frame.pack(pady=10, padx=10, fill="x")
+        btn_frame.pack(pady=10, padx=10)
 
-        ttk.Button(btn_frame, text="Browse...", command=self.browse_file).pack(pady=5)
+        ttk.Button(btn_frame, text="Browse Files...", command=self.browse_files).pack(side="left", padx=5, pady=5)
+        ttk.Button(btn_frame, text="Browse Folder...", command=self.browse_folder).pack(side="left", padx=5, pady=5)
 
-    def browse_file(self):
-        file_path = filedialog.askopenfilename(
-            title="Select Mod DLL",
-            filetypes=[("DLL Files", "*.dll")]
+    def browse_files(self):
+        file_paths = filedialog.askopenfilenames(
+            title="Select Mod DLLs or Archives",
+            filetypes=[("Mods", "*.dll *.zip"), ("DLL Files", "*.dll"), ("ZIP Archives", "*.zip")]
         )
         
-        if file_path:
-            # Call the controller
-            self.controller.add_mod_logic(file_path)
-            self.destroy()
\ No newline at end of file
+        if file_paths:
+            # Call the controller; everything is installed as one background job
+            self.controller.install_mods_logic(file_paths)
+            self.destroy()
+
+    def browse_folder(self):
+        folder = filedialog.askdirectory(title="Select a Folder with Mods")
+        if folder:
+            self.controller.install_mods_logic([folder])
+            self.destroy()
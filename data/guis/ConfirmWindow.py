@@ -2,10 +2,11 @@ import tkinter as tk
 from tkinter import ttk
 
 class DeleteConfirmDialog(tk.Toplevel):
-    def __init__(self, parent, controller, filenames):
+    def __init__(self, parent, controller, records):
         super().__init__(parent)
         self.controller = controller
-        self.filenames = filenames # This is now a list
+        # records: the selected ModRecords; only their filenames are passed on
+        self.filenames = [record.filename for record in records]
         
         self.title("Confirm Deletion")
         self.geometry("420x190") # Slightly larger for long messages
@@ -16,12 +17,11 @@ class DeleteConfirmDialog(tk.Toplevel):
         self.transient(parent)
         self.grab_set()
 
-        if len(filenames) == 1:
-            # Clean name for display if only one item
-            display_name = filenames[0].replace(".dll", "").replace(".disabled", "")
-            msg = f"Are you sure you want to permanently delete '{display_name}' from disk?"
+        if len(records) == 1:
+            msg = f"Move '{records[0].name}' to the trash?"
         else:
-            msg = f"Are you sure you want to permanently delete {len(filenames)} selected mods from disk?"
+            msg = f"Move {len(records)} selected mods to the trash?"
+        msg += "\n\nUndo (Ctrl+Z) puts them back; the trash is emptied automatically later."
 
         ttk.Label(self, text=msg, wraplength=360, justify="center").pack(pady=20, padx=10)
 
@@ -0,0 +1,97 @@
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk, filedialog
+from data.logic import Trace
+
+# Refresh interval of the list while the window is open
+REFRESH_MS = 1000
+
+
+class DiagnosticsWindow(tk.Toplevel):
+    """
+    Hidden panel (Ctrl+Shift+D) listing recent slow operations recorded by
+    data.logic.Trace, with tracing on/off and Chrome trace export.
+    """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Diagnostics")
+        self.geometry("640x360")
+        self.configure(bg="#fdf6ff")
+        self.transient(parent)
+
+        top = ttk.Frame(self, style="Card.TFrame")
+        top.pack(fill="x", padx=10, pady=(10, 5))
+        self.enabled_var = tk.BooleanVar(value=Trace.is_enabled())
+        ttk.Checkbutton(top, text="Tracing", variable=self.enabled_var,
+                        command=self.on_toggle).pack(side="left", padx=5)
+        ttk.Label(top, text="Slower than (ms):").pack(side="left", padx=(15, 2))
+        self.threshold_var = tk.StringVar(value=str(Trace.SLOW_MS))
+        ttk.Entry(top, textvariable=self.threshold_var, width=6).pack(side="left")
+        ttk.Button(top, text="Clear", command=self.on_clear).pack(side="right", padx=5)
+        ttk.Button(top, text="Export Chrome trace...", command=self.on_export).pack(side="right", padx=5)
+
+        columns = ("name", "ms", "details", "thread")
+        frame = ttk.Frame(self)
+        frame.pack(fill="both", expand=True, padx=10, pady=(0, 5))
+        self.tree = ttk.Treeview(frame, columns=columns, show="headings")
+        for col, title, width in (("name", "Operation", 130), ("ms", "ms", 70),
+                                  ("details", "Details", 300), ("thread", "Thread", 100)):
+            self.tree.heading(col, text=title)
+            self.tree.column(col, width=width, anchor="e" if col == "ms" else "w")
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        self.status = ttk.Label(self, text="")
+        self.status.pack(fill="x", padx=10, pady=(0, 10))
+
+        self._note = ""  # result of the last export, kept across refreshes
+        self._after_id = None
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def refresh(self):
+        try:
+            threshold = float(self.threshold_var.get())
+        except ValueError:
+            threshold = Trace.SLOW_MS
+        names = {t.ident: t.name for t in threading.enumerate()}
+        self.tree.delete(*self.tree.get_children())
+        for name, cat, start, duration, tid, args in Trace.recent_slow(threshold):
+            details = ", ".join(f"{key}={value}" for key, value in args.items())
+            self.tree.insert("", "end", values=(name, f"{duration / 1e6:.1f}", details,
+                                                names.get(tid, str(tid))))
+        state = "on" if Trace.is_enabled() else "off"
+        text = f"Tracing {state}, {len(Trace.events())} span(s) recorded"
+        self.status.configure(text=f"{text}. {self._note}" if self._note else text)
+        self._after_id = self.after(REFRESH_MS, self.refresh)
+
+    def on_toggle(self):
+        if self.enabled_var.get():
+            Trace.enable()
+        else:
+            Trace.disable()
+
+    def on_clear(self):
+        Trace.clear()
+
+    def on_export(self):
+        path = filedialog.asksaveasfilename(
+            parent=self, title="Export Chrome trace", defaultextension=".json",
+            initialfile=time.strftime("srmm-trace-%Y%m%d-%H%M%S.json"),
+            filetypes=[("Trace files", "*.json"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            Trace.export_chrome(path)
+            self._note = f"Exported to {path}"
+        except OSError as e:
+            self._note = f"Could not export trace: {e}"
+
+    def close(self):
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+        self.destroy()
@@ -0,0 +1,143 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from data.logic import Trace
+
+
+class Job:
+    """
+    Handle for one background operation.
+
+    Worker code reports progress through `report` and checks `cancel_event`;
+    the Tk side can call `cancel()` at any time.
+    """
+
+    def __init__(self, runner, name):
+        self.runner = runner
+        self.name = name
+        self.cancel_event = threading.Event()
+        self.started = False
+        self.done = False
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def report(self, done, total=None, text=None):
+        # Called from the worker thread; delivered on the Tk thread
+        self.runner.post(self.runner._progress, self, done, total, text)
+
+
+class JobRunner:
+    """
+    Runs filesystem work on worker threads and hands results back to Tk.
+
+    Worker threads never touch Tk: they put callbacks on a queue, which the
+    Tk thread drains with root.after while jobs are active (or all the time
+    with idle_poll_ms, for threads that post without a job). Jobs run in
+    submission order on a single worker by default, so an install and the
+    refresh submitted after it never overtake each other.
+    """
+
+    def __init__(self, root, max_workers=1, poll_ms=50, on_busy=None, idle_poll_ms=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.idle_poll_ms = idle_poll_ms
+        self.on_busy = on_busy  # on_busy(job or None, fraction or None, text)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="srmm-io")
+        self._queue = queue.Queue()
+        self._active = []
+        self._polling = False
+        self._closed = False
+        if idle_poll_ms is not None:
+            self._ensure_polling()
+
+    def submit(self, name, fn, *args, on_done=None, on_error=None, with_progress=False, **kwargs):
+        """
+        Run fn(*args, **kwargs) in the background.
+
+        on_done(result) / on_error(exception) run on the Tk thread. With
+        with_progress=True, fn also receives progress= and cancel= keyword
+        arguments (job.report and job.cancel_event).
+        """
+        job = Job(self, name)
+        if with_progress:
+            kwargs["progress"] = job.report
+            kwargs["cancel"] = job.cancel_event
+        self._active.append(job)
+        self._notify_busy()
+        self._executor.submit(self._run, job, fn, args, kwargs, on_done, on_error)
+        self._ensure_polling()
+        return job
+
+    def post(self, callback, *args):
+        # Schedule callback(*args) on the Tk thread; safe from any thread
+        self._queue.put((callback, args))
+
+    def cancel_all(self):
+        for job in self._active:
+            job.cancel()
+
+    def shutdown(self):
+        self._closed = True
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job, fn, args, kwargs, on_done, on_error):
+        job.started = True
+        try:
+            with Trace.span(job.name, cat="job"):
+                result = fn(*args, **kwargs)
+        except Exception as e:
+            self.post(self._finish, job, on_error, e)
+        else:
+            self.post(self._finish, job, on_done, result)
+
+    def _finish(self, job, callback, value):
+        job.done = True
+        if job in self._active:
+            self._active.remove(job)
+        self._notify_busy()
+        if callback is not None:
+            callback(value)
+        elif isinstance(value, Exception):
+            print(f"{job.name} failed: {value}")
+
+    def _progress(self, job, done, total, text):
+        if self.on_busy is None or job.done:
+            return
+        fraction = done / total if total else None
+        self.on_busy(job, fraction, text or job.name)
+
+    def _notify_busy(self):
+        if self.on_busy is None:
+            return
+        if self._active:
+            job = self._active[0]
+            self.on_busy(job, None, job.name)
+        else:
+            self.on_busy(None, None, "")
+
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error in background callback: {e}")
+
+        if self._closed:
+            self._polling = False
+        elif self._active or not self._queue.empty():
+            self.root.after(self.poll_ms, self._poll)
+        elif self.idle_poll_ms is not None:
+            self.root.after(self.idle_poll_ms, self._poll)
+        else:
+            self._polling = False
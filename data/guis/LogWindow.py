@@ -0,0 +1,101 @@
+import tkinter as tk
+from tkinter import ttk
+from data.logic import LogTail
+
+# How often the log file is checked for new lines
+REFRESH_MS = 500
+# Lines kept in the Text widget; the tail's ring buffer holds more for filtering
+DISPLAY_LINES = 5000
+
+
+class LogWindow(tk.Toplevel):
+    """
+    Live view of the SRML log (Ctrl+L). New lines are appended as the file
+    grows; "Only selected mods" narrows it to lines mentioning the mods
+    selected in the main list, using the tail's per-mod index.
+    """
+
+    def __init__(self, parent, path, get_records, get_selection):
+        super().__init__(parent)
+        self.title("SRML Log")
+        self.geometry("760x420")
+        self.configure(bg="#fdf6ff")
+        self.transient(parent)
+        self.get_records = get_records      # all ModRecords shown in the main list
+        self.get_selection = get_selection  # the selected ones
+        self.tail = LogTail.LogTail(path)
+
+        top = ttk.Frame(self, style="Card.TFrame")
+        top.pack(fill="x", padx=10, pady=(10, 5))
+        ttk.Label(top, text=path).pack(side="left", padx=5)
+        self.selected_only_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(top, text="Only selected mods", variable=self.selected_only_var,
+                        command=self.refresh_now).pack(side="right", padx=5)
+        self.follow_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(top, text="Follow", variable=self.follow_var).pack(side="right", padx=5)
+
+        frame = ttk.Frame(self)
+        frame.pack(fill="both", expand=True, padx=10, pady=(0, 5))
+        self.text = tk.Text(frame, wrap="none", state="disabled", font=("Consolas", 9))
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.text.yview)
+        self.text.configure(yscrollcommand=scrollbar.set)
+        self.text.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        self.status = ttk.Label(self, text="")
+        self.status.pack(fill="x", padx=10, pady=(0, 10))
+
+        self._shown_filter = ()  # names the text was built for; None = everything
+        self._after_id = None
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def _wanted_filter(self):
+        if not self.selected_only_var.get():
+            return None
+        return tuple(sorted({name for record in self.get_selection() for name in record.log_names()}))
+
+    def refresh(self):
+        self.tail.set_names(name for record in self.get_records() for name in record.log_names())
+        new = self.tail.poll()
+        wanted = self._wanted_filter()
+        if wanted != self._shown_filter:
+            # Filter changed: rebuild from the ring buffer (or the index), not from disk
+            self._shown_filter = wanted
+            lines = self.tail.tail(DISPLAY_LINES) if wanted is None else self.tail.lines_for(wanted, DISPLAY_LINES)
+            self._show(lines, replace=True)
+        elif new:
+            lines = new if wanted is None else self.tail.lines_for(wanted, since=new[0][0])
+            self._show(lines)
+
+        if wanted is not None and not wanted:
+            self.status.configure(text="Select one or more mods in the main window.")
+        else:
+            self.status.configure(text=f"{len(self.tail.lines)} line(s) buffered")
+        self._after_id = self.after(REFRESH_MS, self.refresh)
+
+    def refresh_now(self):
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+        self.refresh()
+
+    def _show(self, lines, replace=False):
+        if not lines and not replace:
+            return
+        self.text.configure(state="normal")
+        if replace:
+            self.text.delete("1.0", "end")
+        if lines:
+            self.text.insert("end", "\n".join(text for _, text in lines) + "\n")
+        # Keep the widget bounded; older lines stay in the tail's buffer
+        excess = int(self.text.index("end-1c").split(".")[0]) - 1 - DISPLAY_LINES
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+        self.text.configure(state="disabled")
+        if self.follow_var.get():
+            self.text.see("end")
+
+    def close(self):
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+        self.destroy()
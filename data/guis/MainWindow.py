@@ -1,16 +1,73 @@
+import bisect
+import time
 import tkinter as tk
 from tkinter import ttk
-from tkinter import messagebox
+from tkinter import messagebox, simpledialog
+from data.guis import VirtualList
+from data.logic import Mods, Profiles, Search, Trace
+
+# Heading text per sortable column
+COLUMN_TITLES = {
+    "name": "Mod Name",
+    "version": "Version",
+    "status": "Status",
+    "size": "Size",
+    "modified": "Modified",
+}
+# Position of each column inside a record's precomputed sort key tuple
+SORT_KEY_INDEX = {"name": 0, "status": 1, "size": 2, "modified": 3, "version": 4}
+# Above this many mods only the rows in view are kept in the Treeview
+VIRTUAL_THRESHOLD = 2000
+
+
+def version_key(version):
+    # "1.10.2.0" sorts after "1.9.0.0"; unknown versions sort first
+    try:
+        return tuple(int(part) for part in version.split("."))
+    except (AttributeError, ValueError):
+        return ()
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def longest_increasing_run(items, position):
+    # Items forming the longest subsequence already in target order
+    # (patience sorting, O(n log n)); everything else has to move.
+    tails = []      # tails[k] = index into items of the smallest tail of length k+1
+    parents = [-1] * len(items)
+    tail_pos = []
+    for i, item in enumerate(items):
+        pos = position[item]
+        k = bisect.bisect_left(tail_pos, pos)
+        if k > 0:
+            parents[i] = tails[k - 1]
+        if k == len(tails):
+            tails.append(i)
+            tail_pos.append(pos)
+        else:
+            tails[k] = i
+            tail_pos[k] = pos
+    result = set()
+    i = tails[-1] if tails else -1
+    while i != -1:
+        result.add(items[i])
+        i = parents[i]
+    return result
+
 
 class ModListFrame(ttk.Frame):
     # Accept initial sort state
-    def __init__(self, parent, controller, initial_sort_col="name", initial_sort_dir="asc"):
+    def __init__(self, parent, controller, initial_sort_col="name", initial_sort_dir="asc",
+                 initial_sort_keys=None, virtual_threshold=VIRTUAL_THRESHOLD):
         super().__init__(parent)
         self.controller = controller
-        
-        # Sorting state
-        self._sort_column = initial_sort_col
-        self._sort_direction = initial_sort_dir # "asc" or "desc"
+        self._init_state(list(initial_sort_keys or [(initial_sort_col, initial_sort_dir)]), virtual_threshold)
         
         # Header (gebruik een "card" frame voor moderne look)
         header_frame = ttk.Frame(self, style="Card.TFrame")
@@ -23,16 +80,77 @@ class ModListFrame(ttk.Frame):
         ttk.Button(header_frame, text="▶ PLAY", style="Play.TButton", 
                    command=self.controller.start_game_logic).pack(side="right", padx=(5, 10))
 
+        # Live SRML log (also Ctrl+L)
+        ttk.Button(header_frame, text="Log", command=self.controller.open_log_window).pack(side="right", padx=5)
+
+        # Second row: install and profile pickers (too wide for the header next to the title)
+        toolbar = ttk.Frame(self)
+        toolbar.pack(fill="x", padx=10, pady=(0, 5))
+
+        # Game installs (stable, beta, ...): pick one to switch, menu for adding/removing
+        ttk.Label(toolbar, text="Install:").pack(side="left")
+        self.install_var = tk.StringVar()
+        self.install_box = ttk.Combobox(toolbar, textvariable=self.install_var, state="readonly", width=14)
+        self.install_box.pack(side="left", padx=5)
+        self.install_box.bind("<<ComboboxSelected>>", self.on_install_selected)
+
+        install_menu_btn = ttk.Menubutton(toolbar, text="Installs ▾")
+        install_menu_btn.pack(side="left", padx=(0, 15))
+        install_menu = tk.Menu(install_menu_btn, tearoff=0)
+        install_menu.add_command(label="Add Install...", command=self.controller.add_install_logic)
+        install_menu.add_command(label="Remove Install", command=self.on_remove_install)
+        install_menu_btn["menu"] = install_menu
+
+        # Profiles: pick one to switch, menu for saving/deleting
+        ttk.Label(toolbar, text="Profile:").pack(side="left")
+        self.profile_var = tk.StringVar()
+        self.profile_box = ttk.Combobox(toolbar, textvariable=self.profile_var, state="readonly", width=18)
+        self.profile_box.pack(side="left", padx=5)
+        self.profile_box.bind("<<ComboboxSelected>>", self.on_profile_selected)
+
+        profile_menu_btn = ttk.Menubutton(toolbar, text="Profiles ▾")
+        profile_menu_btn.pack(side="left")
+        self.profile_menu = tk.Menu(profile_menu_btn, tearoff=0)
+        self.profile_link_mode = tk.BooleanVar(value=False)
+        self.profile_menu.add_command(label="Save Current As...", command=self.on_save_profile)
+        self.profile_menu.add_command(label="Delete Profile", command=self.on_delete_profile)
+        self.profile_menu.add_separator()
+        self.profile_menu.add_checkbutton(label="Park unused mods (hardlinks)",
+                                          variable=self.profile_link_mode)
+        profile_menu_btn["menu"] = self.profile_menu
+
+        # Search-as-you-type filter (Ctrl+F to focus, Esc to clear)
+        filter_frame = ttk.Frame(self)
+        filter_frame.pack(fill="x", padx=10, pady=(0, 5))
+        ttk.Label(filter_frame, text="Search:").pack(side="left")
+        self.filter_var = tk.StringVar()
+        self.filter_entry = ttk.Entry(filter_frame, textvariable=self.filter_var)
+        self.filter_entry.pack(side="left", fill="x", expand=True, padx=5)
+        self.filter_count = ttk.Label(filter_frame, text="")
+        self.filter_count.pack(side="left")
+        self.filter_var.trace_add("write", lambda *_: self.apply_filter())
+        self.filter_entry.bind("<Escape>", lambda e: self.filter_var.set(""))
+        self.winfo_toplevel().bind("<Control-f>", lambda e: self.filter_entry.focus_set())
+
         # Mod List (Treeview) - Changed selectmode to 'extended' for multiple selections
-        columns = ("name", "status")
+        columns = ("name", "version", "status", "size", "modified")
         self.tree = ttk.Treeview(self, columns=columns, show='headings', selectmode="extended")
         
-        # Bind headings for sorting
-        self.tree.heading("name", text="Mod Name", command=lambda: self.sort_column("name"))
-        self.tree.heading("status", text="Status", command=lambda: self.sort_column("status"))
+        # Bind headings for sorting (Shift+click adds a secondary sort key)
+        for col in columns:
+            self.tree.heading(col, text=COLUMN_TITLES[col], command=lambda c=col: self.sort_column(c))
+        self.tree.bind("<Shift-Button-1>", self.on_shift_click)
+        # Rows whose content is installed more than once
+        self.tree.tag_configure("duplicate", foreground="#b35c00")
+        # Enabled rows whose dependencies are missing or disabled
+        self.tree.tag_configure("broken", foreground="#d0021b")
+        self._update_headings()
         
-        self.tree.column("name", width=350)
-        self.tree.column("status", width=100)
+        self.tree.column("name", width=230)
+        self.tree.column("version", width=80)
+        self.tree.column("status", width=90)
+        self.tree.column("size", width=80, anchor="e")
+        self.tree.column("modified", width=130)
         
         # Scrollbar
         scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview, style="Vertical.TScrollbar")
@@ -63,109 +181,426 @@ class ModListFrame(ttk.Frame):
         
         # Ensure the scrollbar is on top
         scrollbar.lift()
+        # Virtualized rendering for very large folders (switched on in _render)
+        self.virtual = VirtualList.VirtualRows(self.tree, scrollbar)
 
-        ttk.Button(btn_frame, text="Install New Mod (.dll)", style="Action.TButton", 
+        ttk.Button(btn_frame, text="Install Mods (.dll/.zip)", style="Action.TButton", 
                    command=self.controller.open_add_mod_window).pack(side="left", padx=5)
         
         # Changed button text and logic to reflect mass action
         ttk.Button(btn_frame, text="Toggle Selected Status", 
                    command=self.on_toggle).pack(side="left", padx=5)
+
+        # Undo/redo of toggles, installs and deletes (Ctrl+Z / Ctrl+Y)
+        self.undo_button = ttk.Button(btn_frame, text="↶", width=3, state="disabled",
+                                      command=self.controller.undo_logic)
+        self.undo_button.pack(side="left", padx=(5, 0))
+        self.redo_button = ttk.Button(btn_frame, text="↷", width=3, state="disabled",
+                                      command=self.controller.redo_logic)
+        self.redo_button.pack(side="left", padx=(2, 5))
+        self.winfo_toplevel().bind("<Control-z>", lambda e: self._on_undo_key(self.controller.undo_logic))
+        self.winfo_toplevel().bind("<Control-y>", lambda e: self._on_undo_key(self.controller.redo_logic))
+        self.winfo_toplevel().bind("<Control-Z>", lambda e: self._on_undo_key(self.controller.redo_logic))
+
+        # Busy indicator for background jobs (hidden while idle)
+        self.busy_frame = ttk.Frame(btn_frame)
+        self.busy_bar = ttk.Progressbar(self.busy_frame, length=90, mode="indeterminate")
+        self.busy_bar.pack(side="left", padx=(5, 2))
+        ttk.Button(self.busy_frame, text="✕", width=2, command=self.on_cancel_job).pack(side="left")
+        self.busy_label = ttk.Label(btn_frame, text="")
+        self._busy_job = None
         
         # Added padx to give space from the right border
         ttk.Button(btn_frame, text="Delete Selected", 
                    command=self.on_delete).pack(side="right", padx=(5, 10))
 
+        # Right-click menu for explicit enable/disable of the selection or everything
+        self.context_menu = tk.Menu(self, tearoff=0)
+        self.context_menu.add_command(label="Enable Selected", command=lambda: self.on_set_enabled(True))
+        self.context_menu.add_command(label="Disable Selected", command=lambda: self.on_set_enabled(False))
+        self.context_menu.add_command(label="Toggle Selected", command=self.on_toggle)
+        self.context_menu.add_separator()
+        self.context_menu.add_command(label="Enable All", command=lambda: self.on_set_all(True))
+        self.context_menu.add_command(label="Disable All", command=lambda: self.on_set_all(False))
+        self.context_menu.add_separator()
+        self.context_menu.add_command(label="Delete Selected", command=self.on_delete)
+        self.context_menu.add_separator()
+        self.context_menu.add_command(label="Undo", state="disabled", command=self.controller.undo_logic)
+        self._undo_index = self.context_menu.index("end")
+        self.context_menu.add_command(label="Redo", state="disabled", command=self.controller.redo_logic)
+        self.tree.bind("<Button-3>", self.show_context_menu)
+
+
+    def _init_state(self, sort_keys, virtual_threshold):
+        # Everything except widgets; the benchmark builds a headless frame from this
+        self.virtual_threshold = virtual_threshold
 
-    def sort_column(self, col_id):
-        # Determine new direction
-        if self._sort_column == col_id:
+        # Sorting state: list of (column, direction), primary key first
+        self._sort_keys = sort_keys
+        self._sort_column, self._sort_direction = self._sort_keys[0]
+
+        # Last scanned mod list, kept so sorting never touches disk or XML.
+        # Rows are keyed by ModRecord.id, which survives toggles and renames.
+        self._mods = {}        # row id -> ModRecord
+        self._revisions = {}   # row id -> record revision the row was built from
+        self._sort_cache = {}  # row id -> (name, status, size, modified, version)
+        self._rows = {}        # row id -> (Treeview values, tags)
+        self._rendered = {}    # row id -> (values, tags), attached or detached
+        self._pending_selection = ()
+        self._order = None     # all row ids in sort order, rebuilt lazily
+        # Search box: rows that don't match are detached, never recreated
+        self._search = Search.SearchIndex()
+        self._matches = None   # set of matching row ids, None without a query
+        self._shown = []       # row ids currently attached, in display order
+        self._shown_set = set()
+
+    def sort_column(self, col_id, add_key=False):
+        directions = dict(self._sort_keys)
+        if add_key:
+            # Shift+click: add a secondary key, or flip it if already present
+            if col_id in directions:
+                flipped = "desc" if directions[col_id] == "asc" else "asc"
+                self._sort_keys = [(c, flipped if c == col_id else d) for c, d in self._sort_keys]
+            else:
+                self._sort_keys.append((col_id, "asc"))
+        elif self._sort_column == col_id:
             # Toggle direction if the same column is clicked
-            new_direction = "desc" if self._sort_direction == "asc" else "asc"
+            self._sort_keys = [(col_id, "desc" if self._sort_direction == "asc" else "asc")]
         else:
             # New column clicked, reset to default direction ("asc")
-            new_direction = "asc"
-            
-        self._sort_column = col_id
-        self._sort_direction = new_direction
+            self._sort_keys = [(col_id, "asc")]
+
+        self._sort_column, self._sort_direction = self._sort_keys[0]
         
-        # Save state and refresh list
-        self.controller.save_sort_settings(self._sort_column, self._sort_direction)
-        self.controller.refresh_mod_list()
+        # Save state (debounced) and re-sort the cached list; no rescan needed
+        self.controller.save_sort_settings(self._sort_column, self._sort_direction, self._sort_keys[1:])
+        self._update_headings()
+        self._order = None
+        self._render()
 
+    def on_shift_click(self, event):
+        if self.tree.identify_region(event.x, event.y) != "heading":
+            return None
+        col_index = int(self.tree.identify_column(event.x)[1:]) - 1
+        self.sort_column(self.tree["columns"][col_index], add_key=True)
+        return "break"
 
-    def update_list(self, mods):
-        
-        # 1. Apply sorting to the mod data list
-        reverse_sort = self._sort_direction == "desc"
-        
-        if self._sort_column == "name":
-            # Sort by clean name (case-insensitive alphabetical)
-            # Default 'asc' means A-Z. Reverse=False for 'asc'
-            mods.sort(key=lambda m: m["name"].lower().replace(".dll", "").replace(".disabled", ""), 
-                      reverse=reverse_sort)
-            
-        elif self._sort_column == "status":
-            # Sort by status. True ('ACTIVE') is 1, False ('DISABLED') is 0.
-            # Default 'asc' requested is ACTIVE (1) on top. Reverse=True makes 1 go top.
-            # We use m["enabled"] == "True" as the key (1 for ACTIVE, 0 for DISABLED).
-            # If direction is 'asc', we want reverse=True (1 on top).
-            # If direction is 'desc', we want reverse=False (0 on top).
-            
-            # The Treeview's display is always in the order the items are inserted.
-            # We want:
-            # - 'asc' direction: ACTIVE (1) top, DISABLED (0) bottom. Set reverse=True on the key.
-            # - 'desc' direction: DISABLED (0) top, ACTIVE (1) bottom. Set reverse=False on the key.
-            
-            # The expression `self._sort_direction == "asc"` correctly evaluates to True/False for the 'reverse' parameter.
-            mods.sort(key=lambda m: m["enabled"] == "True", 
-                      reverse=self._sort_direction == "asc") 
-        
-        # 2. Clear treeview
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-            
-        # 3. Refill treeview
-        for mod in mods:
-            display_status = "ACTIVE" if mod["enabled"] == "True" else "DISABLED"
-            
-            # Add to treeview (index 2 is the hidden filename)
-            self.tree.insert("", "end", values=(
-                mod["name"].replace(".dll", "").replace(".disabled", ""), # Clean name (Index 0)
-                display_status, # (Index 1)
-                mod["name"] # Actual filename (Index 2 - used for logic)
-            ))
+    def _update_headings(self):
+        # Show direction arrows, numbered when sorting on several keys
+        marks = {}
+        for i, (col, direction) in enumerate(self._sort_keys):
+            arrow = "▲" if direction == "asc" else "▼"
+            marks[col] = f" {arrow}{i + 1}" if len(self._sort_keys) > 1 else f" {arrow}"
+        for col in self.tree["columns"]:
+            self.tree.heading(col, text=COLUMN_TITLES[col] + marks.get(col, ""))
+
+    def update_list(self, records):
+        # Cache the scan result (ModRecords); display values, sort keys and
+        # search text are only recomputed for records whose revision moved
+        with Trace.span("render", cat="gui", items=len(records)):
+            previous = self._mods
+            self._mods = {}
+            for record in records:
+                iid = record.id
+                # Read first: a change made meanwhile shows up as a newer revision next time
+                revision = record.revision
+                self._mods[iid] = record
+                if previous.get(iid) is record and self._revisions.get(iid) == revision:
+                    continue
+                self._revisions[iid] = revision
+                # Prefer the assembly's own name/version from its .NET metadata
+                assembly = record.assembly or {}
+                name = assembly.get("assembly_name") or record.name
+                version = assembly.get("version") or ""
+                enabled = record.enabled
+                size = record.size
+                mtime = record.mtime
+                # Status 'asc' means ACTIVE on top, so ACTIVE gets the smaller key
+                self._sort_cache[iid] = (name.lower(), 0 if enabled else 1, size, mtime, version_key(version))
+                status = "ACTIVE" if enabled else "DISABLED"
+                tags = ()
+                if record.dependency_problems:
+                    # Missing/disabled dependencies or part of a cycle
+                    status += " (deps!)"
+                    tags = ("broken",)
+                elif record.duplicate_of:
+                    # Same content is installed under another filename
+                    status += " (dup)"
+                    tags = ("duplicate",)
+                self._rows[iid] = ((
+                    name,
+                    version,
+                    status,
+                    format_size(size),
+                    time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime)) if mtime else "",
+                ), tags)
+                self._search.update(iid, (name, record.name, record.filename, version))
+
+            for iid in previous:
+                if iid not in self._mods:
+                    del self._sort_cache[iid]
+                    del self._rows[iid]
+                    del self._revisions[iid]
+            self._search.retain(self._mods)
+            self._order = None
+            self._matches = self._search.filter(self.filter_var.get())
+            self._render()
+
+    def _sorted_rows(self):
+        # Stable sorts from the least to the most significant key
+        if self._order is not None:
+            return self._order
+        order = list(self._sort_cache)
+        cache = self._sort_cache
+        for col, direction in reversed(self._sort_keys):
+            index = SORT_KEY_INDEX.get(col)
+            if index is None:
+                continue
+            order.sort(key=lambda iid, i=index: cache[iid][i], reverse=direction == "desc")
+        self._order = order
+        return order
+
+    def _visible_rows(self):
+        order = self._sorted_rows()
+        if self._matches is None:
+            return order
+        matches = self._matches
+        return [iid for iid in order if iid in matches]
+
+    @Trace.traced("filter", cat="gui")
+    def apply_filter(self):
+        # One keystroke in the search box: only rows entering or leaving the view are touched
+        self._matches = self._search.filter(self.filter_var.get())
+        order = self._visible_rows()
+        shown = self._shown_set
+        if self.virtual.active:
+            # New results start at the top
+            self.virtual.offset = 0
+            self.virtual.set_rows(order, self._rows)
+        elif len(order) <= len(shown) and all(f in shown for f in order):
+            # Narrowed: hide the rows that stopped matching, nothing else moves
+            keep = set(order)
+            hide = [f for f in self._shown if f not in keep]
+            if hide:
+                self.tree.detach(*hide)
+        else:
+            for iid in order:
+                row = self._rows[iid]
+                if iid not in self._rendered:
+                    self.tree.insert("", "end", iid=iid, values=row[0], tags=row[1])
+                elif self._rendered[iid] != row:
+                    # Changed while it was filtered out
+                    self.tree.item(iid, values=row[0], tags=row[1])
+                self._rendered[iid] = row
+            # Reattaches and orders all visible rows in one call, detaching the rest
+            self.tree.set_children("", *order)
+        self._set_shown(order)
+
+    def _set_shown(self, order):
+        self._shown = order
+        self._shown_set = set(order)
+        if self._matches is None:
+            self.filter_count.configure(text="")
+        else:
+            self.filter_count.configure(text=f"{len(order)} / {len(self._rows)}")
+
+    def _render(self):
+        # Reconcile the Treeview with the sorted cache using the record id as
+        # row iid: only rows that appear, vanish, move or change are touched,
+        # so selection and scroll position survive a refresh (and a toggle,
+        # which renames the file but keeps the record). Rows hidden by the
+        # search box are detached rather than deleted.
+        order = self._visible_rows()
+        if len(self._rows) > self.virtual_threshold:
+            self._render_virtual(order)
+            return
+        if self.virtual.active:
+            # Back below the threshold: rebuild the full list, keeping the selection
+            self._pending_selection = self._pending_selection or self.virtual.selection()
+            self.virtual.deactivate()
+            self._rendered = {}
+        target_pos = {iid: i for i, iid in enumerate(order)}
+        top = self.tree.yview()[0]
+
+        # 1. Delete rows whose file is gone, detach rows that don't match the search
+        gone = [iid for iid in self._rendered if iid not in self._rows]
+        if gone:
+            self.tree.delete(*gone)
+            for iid in gone:
+                del self._rendered[iid]
+        existing = self.tree.get_children()
+        hidden = [iid for iid in existing if iid not in target_pos]
+        if hidden:
+            self.tree.detach(*hidden)
+
+        # 2. Rows already in the right relative order stay where they are
+        kept = [iid for iid in existing if iid in target_pos]
+        stay = longest_increasing_run(kept, target_pos)
+
+        # 3. Insert new rows and move the others right after their predecessor
+        prev = None
+        for iid in order:
+            row = self._rows[iid]
+            if iid not in self._rendered:
+                index = self.tree.index(prev) + 1 if prev is not None else 0
+                self.tree.insert("", index, iid=iid, values=row[0], tags=row[1])
+            else:
+                if iid not in stay:
+                    self.tree.detach(iid)
+                    index = self.tree.index(prev) + 1 if prev is not None else 0
+                    self.tree.move(iid, "", index)
+                if self._rendered[iid] != row:
+                    self.tree.item(iid, values=row[0], tags=row[1])
+            self._rendered[iid] = row
+            prev = iid
+        self._set_shown(order)
+
+        if self._pending_selection:
+            # Selection carried over from the virtual list
+            reselect = [iid for iid in self._pending_selection if iid in target_pos]
+            self._pending_selection = ()
+            if reselect:
+                self.tree.selection_set(reselect)
+        self.tree.yview_moveto(top)
+
+    def _render_virtual(self, order):
+        if not self.virtual.active:
+            # The full Treeview (including detached rows) is replaced by a window
+            selection = self._selected_ids()
+            self.tree.delete(*self._rendered)
+            self._rendered = {}
+            self.virtual.activate()
+            self._pending_selection = self._pending_selection or selection
+        self.virtual.set_rows(order, self._rows)
+        if self._pending_selection:
+            self.virtual.selection_set([iid for iid in self._pending_selection if iid in self._rows])
+            self._pending_selection = ()
+        self._set_shown(order)
+
+    def _selected_ids(self):
+        # Rows hidden by the search don't count
+        selection = self.virtual.selection() if self.virtual.active else self.tree.selection()
+        return [iid for iid in selection if iid in self._shown_set]
+
+    def records(self):
+        # The ModRecords of the last update_list, safe to read on the Tk thread
+        return list(self._mods.values())
+
+    def selected_records(self):
+        return [self._mods[iid] for iid in self._selected_ids() if iid in self._mods]
+
+    def selected_filenames(self):
+        return [record.filename for record in self.selected_records()]
+
+    def set_busy(self, job, fraction, text):
+        # Called by the JobRunner on the Tk thread; job is None when idle
+        self._busy_job = job
+        if job is None:
+            self.busy_bar.stop()
+            self.busy_frame.pack_forget()
+            self.busy_label.pack_forget()
+            return
+
+        if not self.busy_frame.winfo_manager():
+            self.busy_frame.pack(side="left", padx=5)
+            self.busy_label.pack(side="left")
+        self.busy_label.configure(text=text)
+        if fraction is None:
+            if self.busy_bar["mode"] != "indeterminate":
+                self.busy_bar.configure(mode="indeterminate", value=0)
+            self.busy_bar.start(15)
+        else:
+            self.busy_bar.stop()
+            self.busy_bar.configure(mode="determinate", maximum=1.0, value=fraction)
+
+    def set_undo_state(self, undo_label, redo_label):
+        # Labels of the next undo/redo step, None when there is nothing to do
+        for button, menu_index, verb, label in ((self.undo_button, self._undo_index, "Undo", undo_label),
+                                                (self.redo_button, self._undo_index + 1, "Redo", redo_label)):
+            state = "normal" if label else "disabled"
+            button.configure(state=state)
+            self.context_menu.entryconfigure(menu_index, state=state,
+                                             label=f"{verb} {label}" if label else verb)
+
+    def _on_undo_key(self, action):
+        # The search box keeps its own text editing keys
+        if self.focus_get() is not self.filter_entry:
+            action()
+
+    def on_cancel_job(self):
+        if self._busy_job is not None:
+            self._busy_job.cancel()
+
+    def show_context_menu(self, event):
+        # Right-clicking an unselected row selects just that row first
+        row = self.tree.identify_row(event.y)
+        if row and row not in self._selected_ids():
+            if self.virtual.active:
+                self.virtual.selection_set([row])
+            else:
+                self.tree.selection_set(row)
+        self.context_menu.tk_popup(event.x_root, event.y_root)
 
     def on_toggle(self):
-        selected_items = self.tree.selection()
-        if not selected_items:
+        records = self.selected_records()
+        if not records:
             messagebox.showinfo("Selection Required", "Please select one or more mods to toggle.")
             return
 
-        for item in selected_items:
-            # Note: values[2] still holds the actual filename even though it's not displayed
-            values = self.tree.item(item)['values']
-            filename = values[2]
-            status_text = values[1]
-            
-            # Determine the current status
-            current_bool_status = "True" if status_text == "ACTIVE" else "False"
-            
-            # Toggle the status for each selected file
-            self.controller.toggle_mod_status(filename, current_bool_status)
-        
-        # Refresh the entire list after all toggles are done
-        self.controller.refresh_mod_list()
+        # Flip every selected mod in one batch (rolled back if any rename fails);
+        # rows are keyed by record id, so the selection follows the renamed files
+        self.controller.set_mods_enabled([(r.filename, not r.enabled) for r in records])
+
+    def on_set_enabled(self, enabled):
+        filenames = self.selected_filenames()
+        if not filenames:
+            messagebox.showinfo("Selection Required", "Please select one or more mods.")
+            return
+        self.controller.set_mods_enabled([(f, enabled) for f in filenames])
+
+    def on_set_all(self, enabled):
+        self.controller.set_mods_enabled(Mods.ENABLE_ALL if enabled else Mods.DISABLE_ALL)
+
+    def set_profiles(self, names, active):
+        self.profile_box["values"] = names
+        self.profile_var.set(active if active in names else "")
+
+    def on_profile_selected(self, event=None):
+        name = self.profile_var.get()
+        if name:
+            self.controller.switch_profile_logic(name)
+
+    def on_save_profile(self):
+        name = simpledialog.askstring("Save Profile", "Profile name:",
+                                      initialvalue=self.profile_var.get(), parent=self)
+        if name and name.strip():
+            mode = Profiles.MODE_LINK if self.profile_link_mode.get() else Profiles.MODE_RENAME
+            self.controller.save_profile_logic(name.strip(), mode)
+
+    def on_delete_profile(self):
+        name = self.profile_var.get()
+        if name and messagebox.askyesno("Delete Profile", f"Delete profile '{name}'?\nMods are not removed."):
+            self.controller.delete_profile_logic(name)
+
+    def set_installs(self, names, active):
+        self.install_box["values"] = names
+        self.install_var.set(active if active in names else "")
+
+    def on_install_selected(self, event=None):
+        name = self.install_var.get()
+        if name:
+            self.controller.switch_install_logic(name)
+
+    def on_remove_install(self):
+        name = self.install_var.get()
+        if name and messagebox.askyesno("Remove Install", f"Forget install '{name}'?\nThe game folder is not touched."):
+            self.controller.remove_install_logic(name)
 
     def on_delete(self):
-        selected_items = self.tree.selection()
-        if not selected_items:
+        records = self.selected_records()
+        if not records:
             messagebox.showinfo("Selection Required", "Please select one or more mods to delete.")
             return
 
-        filenames_to_delete = []
-        for item in selected_items:
-            values = self.tree.item(item)['values']
-            filenames_to_delete.append(values[2]) # Get the actual filename
-
-        # Pass the list of filenames to the controller for confirmation
-        self.controller.confirm_delete(filenames_to_delete)
\ No newline at end of file
+        # Pass the selected records to the controller for confirmation
+        self.controller.confirm_delete(records)
@@ -0,0 +1,59 @@
+import threading
+import time
+from data.logic import FileOps
+
+# Seconds before an asset download is given up
+DOWNLOAD_TIMEOUT = 5
+
+
+class StartupTimer:
+    """
+    Named phases of application start, printed with --startup-times.
+
+    mark(name) closes a phase that ran since the previous mark; add(name,
+    seconds) records one that was timed elsewhere (e.g. on a worker thread).
+    """
+
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self._last = self.started
+        self.phases = []  # (name, seconds)
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def add(self, name, seconds):
+        self.phases.append((name, seconds))
+
+    def report(self):
+        # Worker phases overlap the others, so the total is wall-clock time
+        phases = self.phases + [("total", time.perf_counter() - self.started)]
+        width = max(len(name) for name, _ in phases)
+        lines = [f"{name:<{width}}  {seconds * 1000:8.1f} ms" for name, seconds in phases]
+        return "\n".join(lines)
+
+
+def fetch_in_background(url, path, on_done, timeout=DOWNLOAD_TIMEOUT):
+    """
+    Download url to path on a daemon thread; on_done(ok) is called from that
+    thread. The file is written atomically, so a failed or slow download
+    never leaves a broken copy behind.
+    """
+    def run():
+        try:
+            # Imported here: urllib.request is slow to import and rarely needed
+            from urllib.request import urlopen
+            with urlopen(url, timeout=timeout) as response:
+                data = response.read()
+            FileOps.write_atomic(path, data)
+        except Exception as e:
+            print(f"Could not download {url}: {e}")
+            on_done(False)
+        else:
+            on_done(True)
+
+    thread = threading.Thread(target=run, name="srmm-fetch", daemon=True)
+    thread.start()
+    return thread
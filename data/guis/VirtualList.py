@@ -0,0 +1,216 @@
+from tkinter import ttk
+
+# Rows to materialize when the Treeview has no size yet
+DEFAULT_PAGE = 20
+
+
+class VirtualRows:
+    """
+    Shows a long list in a ttk.Treeview by materializing only the rows in
+    the viewport.
+
+    The list itself (order and row values) stays in Python. The scrollbar
+    is driven from the model offset instead of the Treeview, and selection
+    is kept as a set of row ids so it survives rows scrolling out of view.
+    Clicks, Ctrl/Shift-clicks and the arrow keys are handled here while
+    active, so extended selection works across the whole list.
+    """
+
+    def __init__(self, tree, scrollbar, row_height=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.active = False
+        self.order = []      # all row ids, in display order
+        self.rows = {}       # row id -> (values, tags)
+        self.offset = 0      # index in order of the top row
+        self.selected = set()
+        self.anchor = None
+        self._position = {}  # row id -> index in order, built lazily
+        self._drawn = {}     # row id -> (values, tags) currently in the Treeview
+        self._row_height = row_height  # looked up from the Treeview style if None
+        self._tag = f"VirtualRows{id(self)}"
+
+        bind = lambda seq, fn: tree.bind_class(self._tag, seq, fn)
+        bind("<Button-1>", lambda e: self._on_click(e, "set"))
+        bind("<Control-Button-1>", lambda e: self._on_click(e, "toggle"))
+        bind("<Shift-Button-1>", lambda e: self._on_click(e, "range"))
+        bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        bind("<Button-4>", lambda e: self.scroll(-3))
+        bind("<Button-5>", lambda e: self.scroll(3))
+        bind("<Up>", lambda e: self._on_key(-1, e))
+        bind("<Down>", lambda e: self._on_key(1, e))
+        bind("<Shift-Up>", lambda e: self._on_key(-1, e, extend=True))
+        bind("<Shift-Down>", lambda e: self._on_key(1, e, extend=True))
+        bind("<Prior>", lambda e: self._on_key(-self.page_size(), e))
+        bind("<Next>", lambda e: self._on_key(self.page_size(), e))
+        bind("<Home>", lambda e: self._on_key(-len(self.order), e))
+        bind("<End>", lambda e: self._on_key(len(self.order), e))
+        bind("<Control-a>", lambda e: self._select_all())
+        bind("<Configure>", lambda e: self._draw())
+
+    def activate(self):
+        if self.active:
+            return
+        self.active = True
+        if self._row_height is None:
+            self._row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        self.tree.delete(*self.tree.get_children())
+        self._drawn = {}
+        # Our bindings run before the Treeview class bindings and "break" them
+        tags = list(self.tree.bindtags())
+        tags.insert(tags.index("Treeview"), self._tag)
+        self.tree.bindtags(tags)
+        self.tree.configure(yscrollcommand="")
+        self.scrollbar.configure(command=self._on_scrollbar)
+
+    def deactivate(self):
+        if not self.active:
+            return
+        self.active = False
+        self.tree.delete(*self.tree.get_children())
+        self._drawn = {}
+        self.tree.bindtags([t for t in self.tree.bindtags() if t != self._tag])
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.configure(command=self.tree.yview)
+        self.order = []
+        self.rows = {}
+        self._position = {}
+        self.selected = set()
+        self.anchor = None
+        self.offset = 0
+
+    def set_rows(self, order, rows):
+        # New model (after a refresh, sort or filter); scroll offset and selection are kept
+        self.order = order
+        self.rows = rows
+        self._position = {}
+        self.selected &= set(rows)
+        self._draw()
+
+    def selection(self):
+        return [iid for iid in self.order if iid in self.selected]
+
+    def selection_set(self, iids):
+        self.selected = set(iid for iid in iids if iid in self.rows)
+        self.anchor = iids[0] if iids else None
+        self._draw()
+
+    def page_size(self):
+        # Whole rows that fit below the heading
+        height = self.tree.winfo_height()
+        row_height = self._row_height
+        children = self.tree.get_children()
+        bbox = self.tree.bbox(children[0]) if children else None
+        top = bbox[1] if bbox else row_height
+        if height <= top + row_height:
+            return DEFAULT_PAGE
+        return max(1, (height - top) // row_height)
+
+    def scroll(self, rows):
+        if self.active:
+            self.offset += rows
+            self._draw()
+        return "break"
+
+    def see(self, iid):
+        index = self._index(iid)
+        if index is None:
+            return
+        page = self.page_size()
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + page:
+            self.offset = index - page + 1
+
+    def _index(self, iid):
+        if not self._position:
+            self._position = {f: i for i, f in enumerate(self.order)}
+        return self._position.get(iid)
+
+    def _draw(self):
+        if not self.active:
+            return
+        page = self.page_size()
+        self.offset = max(0, min(self.offset, len(self.order) - page))
+        # One extra row for the partially visible one at the bottom
+        window = self.order[self.offset:self.offset + page + 1]
+
+        keep = set(window)
+        drop = [iid for iid in self._drawn if iid not in keep]
+        if drop:
+            self.tree.delete(*drop)
+            for iid in drop:
+                del self._drawn[iid]
+        for iid in window:
+            row = self.rows[iid]
+            old = self._drawn.get(iid)
+            if old is None:
+                self.tree.insert("", "end", iid=iid, values=row[0], tags=row[1])
+            elif old != row:
+                self.tree.item(iid, values=row[0], tags=row[1])
+            self._drawn[iid] = row
+        self.tree.set_children("", *window)
+        self.tree.selection_set([iid for iid in window if iid in self.selected])
+        self.tree.yview_moveto(0)
+
+        total = len(self.order)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + page) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.offset = int(float(amount) * len(self.order))
+        elif unit == "pages":
+            self.offset += int(amount) * self.page_size()
+        else:
+            self.offset += int(amount)
+        self._draw()
+
+    def _on_click(self, event, mode):
+        if self.tree.identify_region(event.x, event.y) not in ("cell", "tree"):
+            # Headings and separators keep their normal behaviour (sorting, resizing)
+            return None
+        iid = self.tree.identify_row(event.y)
+        if not iid:
+            return "break"
+        self.tree.focus_set()
+        self.tree.focus(iid)
+        if mode == "toggle":
+            self.selected ^= {iid}
+            self.anchor = iid
+        elif mode == "range" and self._index(self.anchor) is not None:
+            start, end = sorted((self._index(self.anchor), self._index(iid)))
+            self.selected = set(self.order[start:end + 1])
+        else:
+            self.selected = {iid}
+            self.anchor = iid
+        self._draw()
+        return "break"
+
+    def _on_key(self, step, event, extend=False):
+        if not self.order:
+            return "break"
+        current = self.tree.focus()
+        index = self._index(current)
+        if index is None:
+            index = self.offset
+        index = max(0, min(len(self.order) - 1, index + step))
+        iid = self.order[index]
+        if extend and self._index(self.anchor) is not None:
+            start, end = sorted((self._index(self.anchor), index))
+            self.selected = set(self.order[start:end + 1])
+        else:
+            self.selected = {iid}
+            self.anchor = iid
+        self.see(iid)
+        self._draw()
+        self.tree.focus(iid)
+        return "break"
+
+    def _select_all(self):
+        self.selected = set(self.order)
+        self._draw()
+        return "break"
+
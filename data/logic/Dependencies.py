@@ -0,0 +1,236 @@
+import os
+from data.logic import Scanner
+
+# Assemblies that come with the game, Unity, Mono or SRML itself. Used on
+# top of whatever is found in SlimeRancher_Data/Managed.
+BUILTIN_PREFIXES = (
+    "mscorlib", "netstandard", "system", "microsoft.", "mono.", "unityengine", "unity.",
+    "assembly-csharp", "srml", "0harmony", "harmony", "incontrol", "newtonsoft.json",
+)
+
+
+def managed_assemblies(game_exe_path):
+    # Lower-cased assembly names shipped in the game's Managed folder
+    game_dir = os.path.dirname(game_exe_path)
+    names = set()
+    for folder in (os.path.join(game_dir, "SlimeRancher_Data", "Managed"), os.path.join(game_dir, "SRML")):
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.name.lower().endswith(".dll"):
+                        names.add(entry.name[:-4].lower())
+        except OSError:
+            pass
+    return names
+
+
+class DependencyGraph:
+    """
+    Mods in SRML/mods linked by the assemblies they reference.
+
+    Nodes are keyed by filename and updated one at a time with update() and
+    remove(); both keep the reverse indexes current, so a changed file never
+    forces a rebuild. The report is recomputed lazily after a change.
+    """
+
+    def __init__(self):
+        self.nodes = {}          # filename -> (assembly lower, frozenset refs lower, enabled)
+        self.providers = {}      # assembly lower -> set of filenames
+        self.referenced_by = {}  # assembly lower -> set of filenames referencing it
+        self.external = set()
+        self._report = None
+
+    def set_external(self, names):
+        self.external = set(names)
+        self._report = None
+
+    def clear(self):
+        self.nodes.clear()
+        self.providers.clear()
+        self.referenced_by.clear()
+        self._report = None
+
+    def update(self, filename, assembly_name, references, enabled):
+        # Add or refresh one mod; a no-op when nothing about it changed
+        node = (
+            (assembly_name or Scanner.display_name(filename)).lower(),
+            frozenset(ref.lower() for ref in references),
+            bool(enabled),
+        )
+        old = self.nodes.get(filename)
+        if old == node:
+            return False
+        if old is not None:
+            self._unlink(filename, old)
+        self.nodes[filename] = node
+        self.providers.setdefault(node[0], set()).add(filename)
+        for ref in node[1]:
+            self.referenced_by.setdefault(ref, set()).add(filename)
+        self._report = None
+        return True
+
+    def remove(self, filename):
+        old = self.nodes.pop(filename, None)
+        if old is not None:
+            self._unlink(filename, old)
+            self._report = None
+
+    def _unlink(self, filename, node):
+        for index, key in ((self.providers, node[0]),) + tuple((self.referenced_by, ref) for ref in node[1]):
+            owners = index.get(key)
+            if owners is not None:
+                owners.discard(filename)
+                if not owners:
+                    del index[key]
+
+    def is_external(self, name):
+        return name in self.external or name.startswith(BUILTIN_PREFIXES)
+
+    def dependencies(self, filename):
+        # Filenames of mods this mod references (all providers)
+        deps = set()
+        for ref in self.nodes[filename][1]:
+            deps |= self.providers.get(ref, set())
+        deps.discard(filename)
+        return deps
+
+    def dependents(self, filename):
+        users = set(self.referenced_by.get(self.nodes[filename][0], ()))
+        users.discard(filename)
+        return users
+
+    def report(self):
+        """
+        {"missing": {filename: [assembly names]},
+         "disabled_dependencies": {filename: [dependency filenames]},
+         "cycles": [[filenames]]}
+        Only enabled mods are checked for missing or disabled dependencies.
+        """
+        if self._report is not None:
+            return self._report
+
+        missing = {}
+        disabled = {}
+        for filename, (_, refs, enabled) in self.nodes.items():
+            if not enabled:
+                continue
+            for ref in refs:
+                providers = self.providers.get(ref)
+                if providers:
+                    if not any(self.nodes[p][2] for p in providers):
+                        disabled.setdefault(filename, []).extend(sorted(providers))
+                elif not self.is_external(ref):
+                    missing.setdefault(filename, []).append(ref)
+
+        self._report = {
+            "missing": {f: sorted(refs) for f, refs in missing.items()},
+            "disabled_dependencies": disabled,
+            "cycles": self._cycles(),
+        }
+        return self._report
+
+    def problems_for(self, filename):
+        report = self.report()
+        problems = []
+        if filename in report["missing"]:
+            problems.append("missing " + ", ".join(report["missing"][filename]))
+        if filename in report["disabled_dependencies"]:
+            problems.append("needs disabled " + ", ".join(report["disabled_dependencies"][filename]))
+        for cycle in report["cycles"]:
+            if filename in cycle:
+                problems.append("dependency cycle")
+                break
+        return problems
+
+    def _cycles(self):
+        # Tarjan's strongly connected components, iterative (no recursion limit)
+        index = {}
+        low = {}
+        on_stack = set()
+        stack = []
+        cycles = []
+        counter = 0
+
+        for start in self.nodes:
+            if start in index:
+                continue
+            work = [(start, iter(sorted(self.dependencies(start))))]
+            index[start] = low[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack.add(start)
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(sorted(self.dependencies(child)))))
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1:
+                            cycles.append(sorted(component))
+        return cycles
+
+    def cascade(self, targets):
+        """
+        Extra (filename, enabled) changes needed so `targets` leaves no
+        enabled mod without its dependencies: enabling pulls in disabled
+        dependencies, disabling takes enabled dependents along.
+        """
+        wanted = dict(targets)
+        state = {f: wanted.get(f, node[2]) for f, node in self.nodes.items()}
+        extra = {}
+
+        todo = [f for f, enabled in wanted.items() if f in self.nodes]
+        while todo:
+            filename = todo.pop()
+            if state[filename]:
+                # Every referenced mod assembly needs one enabled provider
+                for ref in self.nodes[filename][1]:
+                    providers = self.providers.get(ref)
+                    if not providers or any(state[p] for p in providers if p != filename):
+                        continue
+                    choice = sorted(p for p in providers if p != filename)
+                    if not choice:
+                        continue
+                    state[choice[0]] = True
+                    extra[choice[0]] = True
+                    todo.append(choice[0])
+            else:
+                for user in self.dependents(filename):
+                    if not state[user]:
+                        continue
+                    # Still fine if another enabled provider remains
+                    name = self.nodes[filename][0]
+                    if any(state[p] for p in self.providers.get(name, ()) if p != filename):
+                        continue
+                    state[user] = False
+                    extra[user] = False
+                    todo.append(user)
+
+        return [(f, enabled) for f, enabled in extra.items() if f not in wanted]
+
+    def rename(self, old_name, new_name):
+        # Toggling only flips the suffix; keep the node under its new filename
+        node = self.nodes.get(old_name)
+        if node is None:
+            return
+        self.remove(old_name)
+        self.update(new_name, node[0], node[1], Scanner.is_enabled(new_name))
@@ -0,0 +1,376 @@
+"""
+Minimal reader for .NET assembly metadata (ECMA-335) in mod DLLs.
+
+The file is memory-mapped and only the PE headers, the metadata root, the
+#~ table header and the handful of rows we need (Assembly, AssemblyRef and
+the assembly-level TargetFrameworkAttribute) are decoded. Nothing is loaded
+or executed.
+"""
+import mmap
+import struct
+import threading
+
+# Metadata table numbers (ECMA-335 II.22)
+MODULE, TYPEREF, TYPEDEF, FIELDPTR, FIELD, METHODPTR, METHODDEF, PARAMPTR, PARAM = range(0x00, 0x09)
+INTERFACEIMPL, MEMBERREF, CONSTANT, CUSTOMATTRIBUTE, FIELDMARSHAL, DECLSECURITY = range(0x09, 0x0F)
+CLASSLAYOUT, FIELDLAYOUT, STANDALONESIG, EVENTMAP, EVENTPTR, EVENT = range(0x0F, 0x15)
+PROPERTYMAP, PROPERTYPTR, PROPERTY, METHODSEMANTICS, METHODIMPL, MODULEREF = range(0x15, 0x1B)
+TYPESPEC, IMPLMAP, FIELDRVA, ENCLOG, ENCMAP, ASSEMBLY = range(0x1B, 0x21)
+ASSEMBLYPROCESSOR, ASSEMBLYOS, ASSEMBLYREF, ASSEMBLYREFPROCESSOR, ASSEMBLYREFOS = range(0x21, 0x26)
+FILE, EXPORTEDTYPE, MANIFESTRESOURCE, NESTEDCLASS, GENERICPARAM = range(0x26, 0x2B)
+METHODSPEC, GENERICPARAMCONSTRAINT = range(0x2B, 0x2D)
+
+# Coded index kinds: (tag bits, tables in tag order; None = unused tag)
+CODED = {
+    "TypeDefOrRef": (2, (TYPEDEF, TYPEREF, TYPESPEC)),
+    "HasConstant": (2, (FIELD, PARAM, PROPERTY)),
+    "HasCustomAttribute": (5, (METHODDEF, FIELD, TYPEREF, TYPEDEF, PARAM, INTERFACEIMPL, MEMBERREF,
+                               MODULE, DECLSECURITY, PROPERTY, EVENT, STANDALONESIG, MODULEREF,
+                               TYPESPEC, ASSEMBLY, ASSEMBLYREF, FILE, EXPORTEDTYPE,
+                               MANIFESTRESOURCE, GENERICPARAM, GENERICPARAMCONSTRAINT, METHODSPEC)),
+    "HasFieldMarshal": (1, (FIELD, PARAM)),
+    "HasDeclSecurity": (2, (TYPEDEF, METHODDEF, ASSEMBLY)),
+    "MemberRefParent": (3, (TYPEDEF, TYPEREF, MODULEREF, METHODDEF, TYPESPEC)),
+    "HasSemantics": (1, (EVENT, PROPERTY)),
+    "MethodDefOrRef": (1, (METHODDEF, MEMBERREF)),
+    "MemberForwarded": (1, (FIELD, METHODDEF)),
+    "Implementation": (2, (FILE, ASSEMBLYREF, EXPORTEDTYPE)),
+    "CustomAttributeType": (3, (None, None, METHODDEF, MEMBERREF, None)),
+    "ResolutionScope": (2, (MODULE, MODULEREF, ASSEMBLYREF, TYPEREF)),
+    "TypeOrMethodDef": (1, (TYPEDEF, METHODDEF)),
+}
+
+# Column layout per table: "2"/"4" fixed ints, "s"/"g"/"b" heap indexes,
+# an int for a simple index into that table, or a CODED key.
+SCHEMA = {
+    MODULE: ("2", "s", "g", "g", "g"),
+    TYPEREF: ("ResolutionScope", "s", "s"),
+    TYPEDEF: ("4", "s", "s", "TypeDefOrRef", FIELD, METHODDEF),
+    FIELDPTR: (FIELD,),
+    FIELD: ("2", "s", "b"),
+    METHODPTR: (METHODDEF,),
+    METHODDEF: ("4", "2", "2", "s", "b", PARAM),
+    PARAMPTR: (PARAM,),
+    PARAM: ("2", "2", "s"),
+    INTERFACEIMPL: (TYPEDEF, "TypeDefOrRef"),
+    MEMBERREF: ("MemberRefParent", "s", "b"),
+    CONSTANT: ("2", "HasConstant", "b"),
+    CUSTOMATTRIBUTE: ("HasCustomAttribute", "CustomAttributeType", "b"),
+    FIELDMARSHAL: ("HasFieldMarshal", "b"),
+    DECLSECURITY: ("2", "HasDeclSecurity", "b"),
+    CLASSLAYOUT: ("2", "4", TYPEDEF),
+    FIELDLAYOUT: ("4", FIELD),
+    STANDALONESIG: ("b",),
+    EVENTMAP: (TYPEDEF, EVENT),
+    EVENTPTR: (EVENT,),
+    EVENT: ("2", "s", "TypeDefOrRef"),
+    PROPERTYMAP: (TYPEDEF, PROPERTY),
+    PROPERTYPTR: (PROPERTY,),
+    PROPERTY: ("2", "s", "b"),
+    METHODSEMANTICS: ("2", METHODDEF, "HasSemantics"),
+    METHODIMPL: (TYPEDEF, "MethodDefOrRef", "MethodDefOrRef"),
+    MODULEREF: ("s",),
+    TYPESPEC: ("b",),
+    IMPLMAP: ("2", "MemberForwarded", "s", MODULEREF),
+    FIELDRVA: ("4", FIELD),
+    ENCLOG: ("4", "4"),
+    ENCMAP: ("4",),
+    ASSEMBLY: ("4", "2", "2", "2", "2", "4", "b", "s", "s"),
+    ASSEMBLYPROCESSOR: ("4",),
+    ASSEMBLYOS: ("4", "4", "4"),
+    ASSEMBLYREF: ("2", "2", "2", "2", "4", "b", "s", "s", "b"),
+    ASSEMBLYREFPROCESSOR: ("4", ASSEMBLYREF),
+    ASSEMBLYREFOS: ("4", "4", "4", ASSEMBLYREF),
+    FILE: ("4", "s", "b"),
+    EXPORTEDTYPE: ("4", "4", "s", "s", "Implementation"),
+    MANIFESTRESOURCE: ("4", "4", "s", "Implementation"),
+    NESTEDCLASS: (TYPEDEF, TYPEDEF),
+    GENERICPARAM: ("2", "2", "TypeOrMethodDef", "s"),
+    METHODSPEC: ("MethodDefOrRef", "b"),
+    GENERICPARAMCONSTRAINT: (GENERICPARAM, "TypeDefOrRef"),
+}
+
+CLI_HEADER_DIRECTORY = 14
+METADATA_SIGNATURE = 0x424A5342  # "BSJB"
+# Bump when the info dicts change shape; cached entries are then dropped
+CACHE_VERSION = 1
+
+
+class MetadataError(ValueError):
+    pass
+
+
+def read_assembly_info(path):
+    """
+    Return assembly metadata for a .NET DLL, or None for native/non-PE files:
+        {"assembly_name", "version", "target_framework", "runtime_version",
+         "references": [{"name", "version"}, ...]}
+    Raises MetadataError for files that look like .NET but are malformed.
+    """
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None  # empty file
+        try:
+            return _AssemblyReader(data).read()
+        except (struct.error, IndexError) as e:
+            raise MetadataError(f"Truncated or corrupt metadata: {e}") from e
+        finally:
+            data.close()
+
+
+class MetadataCache:
+    """
+    Parsed assembly info per file content (SHA-256), persisted through a
+    Store backend.
+
+    Because entries are keyed by content, renaming or toggling a mod never
+    causes a re-parse; only new or changed files are read.
+    """
+
+    def __init__(self, store):
+        self.store = store  # Store.XmlStore or Store.SqliteStore
+        self.by_hash = {}
+        self._loaded = False
+        self._new = set()  # digests parsed since the last save
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        self.by_hash = self.store.load_metadata()
+
+    def get(self, digest, path):
+        # Cached info for this content, parsing the file on a miss
+        with self._lock:
+            self.load()
+            if digest in self.by_hash:
+                return self.by_hash[digest]
+        try:
+            info = read_assembly_info(path)
+        except MetadataError as e:
+            info = {"error": str(e)}
+        except OSError:
+            return None  # unreadable right now; try again next time
+        with self._lock:
+            self.by_hash[digest] = info
+            self._new.add(digest)
+        return info
+
+    def save(self):
+        with self._lock:
+            if self._new and self.store.save_metadata(self.by_hash, self._new):
+                self._new = set()
+
+
+class _AssemblyReader:
+    def __init__(self, data):
+        self.data = data
+        self.sections = []
+
+    def read(self):
+        cli_rva = self._read_pe_headers()
+        if cli_rva is None:
+            return None
+        cli = self._offset(cli_rva)
+        meta_rva, meta_size = struct.unpack_from("<II", self.data, cli + 8)
+        self._read_metadata_root(self._offset(meta_rva))
+        self._read_table_header()
+
+        info = {
+            "assembly_name": None,
+            "version": None,
+            "target_framework": None,
+            "runtime_version": self.runtime_version,
+            "references": [],
+        }
+        if self.rows[ASSEMBLY]:
+            row = self._row(ASSEMBLY, 1)
+            info["assembly_name"] = self._string(row[7])
+            info["version"] = "%d.%d.%d.%d" % tuple(row[1:5])
+            info["target_framework"] = self._target_framework()
+        for i in range(1, self.rows[ASSEMBLYREF] + 1):
+            row = self._row(ASSEMBLYREF, i)
+            info["references"].append({
+                "name": self._string(row[6]),
+                "version": "%d.%d.%d.%d" % tuple(row[0:4]),
+            })
+        return info
+
+    # --- PE / CLI headers -------------------------------------------------
+
+    def _read_pe_headers(self):
+        data = self.data
+        if len(data) < 0x40 or data[:2] != b"MZ":
+            return None
+        pe = struct.unpack_from("<I", data, 0x3C)[0]
+        if data[pe:pe + 4] != b"PE\0\0":
+            return None
+        num_sections, = struct.unpack_from("<H", data, pe + 6)
+        opt_size, = struct.unpack_from("<H", data, pe + 20)
+        opt = pe + 24
+        magic, = struct.unpack_from("<H", data, opt)
+        if magic == 0x10B:
+            dirs = opt + 96
+        elif magic == 0x20B:
+            dirs = opt + 112
+        else:
+            return None
+        num_dirs, = struct.unpack_from("<I", data, dirs - 4)
+        if num_dirs <= CLI_HEADER_DIRECTORY:
+            return None
+
+        section_table = opt + opt_size
+        for i in range(num_sections):
+            base = section_table + i * 40
+            vsize, vaddr, raw_size, raw_ptr = struct.unpack_from("<IIII", data, base + 8)
+            self.sections.append((vaddr, max(vsize, raw_size), raw_ptr))
+
+        cli_rva, cli_size = struct.unpack_from("<II", data, dirs + CLI_HEADER_DIRECTORY * 8)
+        return cli_rva if cli_rva and cli_size else None
+
+    def _offset(self, rva):
+        for vaddr, size, raw_ptr in self.sections:
+            if vaddr <= rva < vaddr + size:
+                return rva - vaddr + raw_ptr
+        raise MetadataError(f"RVA 0x{rva:x} is outside every section")
+
+    # --- Metadata root and heaps -----------------------------------------
+
+    def _read_metadata_root(self, root):
+        data = self.data
+        if struct.unpack_from("<I", data, root)[0] != METADATA_SIGNATURE:
+            raise MetadataError("Missing metadata signature")
+        length, = struct.unpack_from("<I", data, root + 12)
+        self.runtime_version = bytes(data[root + 16:root + 16 + length]).split(b"\0")[0].decode("ascii", "replace")
+        pos = root + 16 + length
+        num_streams, = struct.unpack_from("<H", data, pos + 2)
+        pos += 4
+
+        self.streams = {}
+        for _ in range(num_streams):
+            offset, size = struct.unpack_from("<II", data, pos)
+            end = data.find(b"\0", pos + 8)
+            name = bytes(data[pos + 8:end]).decode("ascii", "replace")
+            pos = (end + 4) & ~3  # name is padded to a 4-byte boundary
+            self.streams[name] = (root + offset, size)
+
+        if "#~" not in self.streams and "#-" not in self.streams:
+            raise MetadataError("No metadata table stream")
+
+    def _string(self, index):
+        start = self.streams["#Strings"][0] + index
+        end = self.data.find(b"\0", start)
+        return bytes(self.data[start:end]).decode("utf-8", "replace")
+
+    def _blob(self, index):
+        pos = self.streams["#Blob"][0] + index
+        length, pos = _compressed_uint(self.data, pos)
+        return bytes(self.data[pos:pos + length])
+
+    # --- Tables -----------------------------------------------------------
+
+    def _read_table_header(self):
+        data = self.data
+        start = self.streams.get("#~", self.streams.get("#-"))[0]
+        heap_sizes = data[start + 6]
+        valid, = struct.unpack_from("<Q", data, start + 8)
+        pos = start + 24
+
+        self.rows = [0] * 64
+        for table in range(64):
+            if valid >> table & 1:
+                self.rows[table], = struct.unpack_from("<I", data, pos)
+                pos += 4
+        if heap_sizes & 0x40:
+            pos += 4  # extra data field in uncompressed (#-) streams
+        if any(self.rows[t] for t in range(GENERICPARAMCONSTRAINT + 1, 64)):
+            raise MetadataError("Unsupported metadata tables present")
+
+        heap_width = {
+            "s": 4 if heap_sizes & 0x01 else 2,
+            "g": 4 if heap_sizes & 0x02 else 2,
+            "b": 4 if heap_sizes & 0x04 else 2,
+        }
+
+        # Byte width of every column, then row size and start of each table
+        self.columns = {}
+        self.table_offset = {}
+        self.row_size = {}
+        for table in range(GENERICPARAMCONSTRAINT + 1):
+            widths = [self._column_width(col, heap_width) for col in SCHEMA[table]]
+            self.columns[table] = widths
+            self.row_size[table] = sum(widths)
+            self.table_offset[table] = pos
+            pos += self.row_size[table] * self.rows[table]
+
+    def _column_width(self, col, heap_width):
+        if col in ("2", "4"):
+            return int(col)
+        if col in heap_width:
+            return heap_width[col]
+        if isinstance(col, int):
+            return 2 if self.rows[col] < 1 << 16 else 4
+        bits, tables = CODED[col]
+        largest = max(self.rows[t] for t in tables if t is not None)
+        return 2 if largest < 1 << (16 - bits) else 4
+
+    def _row(self, table, index):
+        # Decode one row (1-based index) into a tuple of ints
+        pos = self.table_offset[table] + (index - 1) * self.row_size[table]
+        values = []
+        for width in self.columns[table]:
+            values.append(struct.unpack_from("<H" if width == 2 else "<I", self.data, pos)[0])
+            pos += width
+        return values
+
+    def _target_framework(self):
+        # [assembly: TargetFramework(".NETFramework,Version=v4.7.2")]
+        parent_bits, parent_tables = CODED["HasCustomAttribute"]
+        assembly_parent = 1 << parent_bits | parent_tables.index(ASSEMBLY)
+        type_bits = CODED["CustomAttributeType"][0]
+        ref_bits = CODED["MemberRefParent"][0]
+
+        for i in self._rows_with_parent(assembly_parent):
+            parent, ctor, value = self._row(CUSTOMATTRIBUTE, i)
+            if ctor & ((1 << type_bits) - 1) != 3:  # constructor must be a MemberRef
+                continue
+            member_class = self._row(MEMBERREF, ctor >> type_bits)[0]
+            if member_class & ((1 << ref_bits) - 1) != 1:  # declared on a TypeRef
+                continue
+            type_row = self._row(TYPEREF, member_class >> ref_bits)
+            if self._string(type_row[1]) != "TargetFrameworkAttribute":
+                continue
+            blob = self._blob(value)
+            if blob[:2] != b"\x01\x00" or len(blob) < 3 or blob[2] == 0xFF:
+                continue
+            length, pos = _compressed_uint(blob, 2)
+            return blob[pos:pos + length].decode("utf-8", "replace")
+        return None
+
+    def _rows_with_parent(self, parent):
+        # CustomAttribute is sorted by Parent, so binary search the range
+        count = self.rows[CUSTOMATTRIBUTE]
+        lo, hi = 1, count + 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._row(CUSTOMATTRIBUTE, mid)[0] < parent:
+                lo = mid + 1
+            else:
+                hi = mid
+        index = lo
+        while index <= count and self._row(CUSTOMATTRIBUTE, index)[0] == parent:
+            yield index
+            index += 1
+
+
+def _compressed_uint(data, pos):
+    # ECMA-335 II.23.2 compressed unsigned integer; returns (value, next pos)
+    b0 = data[pos]
+    if b0 & 0x80 == 0:
+        return b0, pos + 1
+    if b0 & 0xC0 == 0x80:
+        return (b0 & 0x3F) << 8 | data[pos + 1], pos + 2
+    return (b0 & 0x1F) << 24 | data[pos + 1] << 16 | data[pos + 2] << 8 | data[pos + 3], pos + 4
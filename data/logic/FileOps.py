@@ -0,0 +1,72 @@
+import os
+import shutil
+from data.logic import Trace
+
+# Bytes copied between progress reports / cancellation checks
+CHUNK_SIZE = 1024 * 1024
+# Suffix of files that are still being written; never picked up as mods
+PARTIAL_SUFFIX = ".part"
+
+
+class OperationCancelled(Exception):
+    pass
+
+
+def copy_stream(fsrc, dest_path, total=None, progress=None, cancel=None):
+    """
+    Stream an open binary file object to dest_path.
+
+    The data goes to "<dest_path>.part" first and is moved into place with
+    os.replace, so the mods folder never holds a half-copied DLL. `progress`
+    is called as progress(bytes_done, total); `cancel` is a threading.Event.
+    """
+    tmp_path = dest_path + PARTIAL_SUFFIX
+    done = 0
+    span = Trace.span("copy", file=os.path.basename(dest_path))
+    try:
+        with span, open(tmp_path, "wb") as fdst:
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise OperationCancelled(f"Cancelled while copying to '{os.path.basename(dest_path)}'")
+                chunk = fsrc.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                fdst.write(chunk)
+                done += len(chunk)
+                if progress is not None:
+                    progress(done, total)
+            span.set(bytes=done)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return done
+
+
+def copy_file(source_path, dest_path, progress=None, cancel=None):
+    # Like shutil.copy2, but chunked, cancellable and atomic at the destination
+    with open(source_path, "rb") as fsrc:
+        copy_stream(fsrc, dest_path, os.fstat(fsrc.fileno()).st_size, progress, cancel)
+    shutil.copystat(source_path, dest_path)
+
+
+def write_atomic(path, data):
+    # Replace path with `data` (bytes) without ever exposing a partial file
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = path + PARTIAL_SUFFIX
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
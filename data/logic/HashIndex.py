@@ -0,0 +1,150 @@
+import hashlib
+import mmap
+import os
+import threading
+from data.logic import FileOps, Threads, Trace
+
+# Files at least this large are hashed through mmap instead of read() chunks
+MMAP_THRESHOLD = 8 * 1024 * 1024
+HASH_WORKERS = 4
+
+
+def hash_file(path):
+    # SHA-256 of a file without reading it into memory in one go
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        else:
+            for chunk in iter(lambda: f.read(FileOps.CHUNK_SIZE), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_stream(fsrc):
+    h = hashlib.sha256()
+    for chunk in iter(lambda: fsrc.read(FileOps.CHUNK_SIZE), b""):
+        h.update(chunk)
+    return h.hexdigest()
+
+
+class ContentIndex:
+    """
+    SHA-256 of every file in SRML/mods, persisted through a Store backend.
+
+    Entries are keyed by absolute path and remember the size and mtime they
+    were hashed at, so a file is only hashed again when its stat changes.
+    save() hands the store only the paths that changed since the last save.
+    """
+
+    def __init__(self, store):
+        self.store = store  # Store.XmlStore or Store.SqliteStore
+        self.files = {}   # abs path -> (size, mtime_ns, sha256)
+        self._by_hash = None
+        self._loaded = False
+        self._changed = set()  # paths added or re-hashed since the last save
+        self._removed = set()
+        self._lock = threading.RLock()
+
+    def load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            self.files = self.store.load_hashes()
+
+    def save(self):
+        with self._lock:
+            if not (self._changed or self._removed):
+                return
+            if self.store.save_hashes(self.files, self._changed, self._removed):
+                self._changed = set()
+                self._removed = set()
+
+    def _put(self, path, entry):
+        self.files[path] = entry
+        self._changed.add(path)
+        self._removed.discard(path)
+
+    def _drop(self, path):
+        self._changed.discard(path)
+        self._removed.add(path)
+        return self.files.pop(path, None)
+
+    def rename(self, folder, renames):
+        # Carry hashes over for renames seen by the scanner (no re-hash)
+        with self._lock:
+            self.load()
+            for old_name, new_name in renames:
+                old_path = os.path.join(folder, old_name)
+                if old_path in self.files:
+                    self._put(os.path.join(folder, new_name), self._drop(old_path))
+            self._by_hash = None
+
+    def refresh(self, folder, entries, max_workers=HASH_WORKERS, only=None):
+        """
+        Bring the index for `folder` in line with a scanner snapshot
+        ({filename: (size, mtime_ns, inode)}). Only new or changed files are
+        hashed, in parallel; with `only` (a set of filenames) the others are
+        left unhashed for now. Returns True if anything changed.
+        """
+        with self._lock:
+            self.load()
+            prefix = os.path.join(folder, "")
+            stale = [p for p in self.files
+                     if p.startswith(prefix) and os.path.basename(p) not in entries]
+            for p in stale:
+                self._drop(p)
+
+            todo = []
+            for filename, (size, mtime_ns, _) in entries.items():
+                if only is not None and filename not in only:
+                    continue
+                path = os.path.join(folder, filename)
+                known = self.files.get(path)
+                if known is None or known[0] != size or known[1] != mtime_ns:
+                    todo.append((path, size, mtime_ns))
+
+        hashed = []
+        if todo:
+            def work(job):
+                path, size, mtime_ns = job
+                try:
+                    return path, size, mtime_ns, hash_file(path)
+                except OSError:
+                    return path, size, mtime_ns, None
+
+            with Trace.span("hash", files=len(todo), bytes=sum(job[1] for job in todo)), \
+                    Threads.pool(min(max_workers, len(todo)), "srmm-hash") as pool:
+                hashed = list(pool.map(work, todo))
+
+        with self._lock:
+            for path, size, mtime_ns, digest in hashed:
+                if digest is not None:
+                    self._put(path, (size, mtime_ns, digest))
+            changed = bool(stale or hashed)
+            if changed:
+                self._by_hash = None
+            return changed
+
+    def sha_for(self, path):
+        entry = self.files.get(path)
+        return entry[2] if entry else None
+
+    def current_sha(self, path, size, mtime_ns):
+        # Hash of path only if it was taken at this size and mtime
+        entry = self.files.get(path)
+        if entry is not None and entry[0] == size and entry[1] == mtime_ns:
+            return entry[2]
+        return None
+
+    def paths_for(self, digest):
+        with self._lock:
+            if self._by_hash is None:
+                by_hash = {}
+                for path, (_, _, sha) in self.files.items():
+                    by_hash.setdefault(sha, []).append(path)
+                self._by_hash = by_hash
+            return list(self._by_hash.get(digest, ()))
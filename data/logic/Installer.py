@@ -0,0 +1,155 @@
+import os
+import shutil
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from data.logic import FileOps, HashIndex, Scanner
+
+# Copies/extractions running at the same time
+MAX_WORKERS = 4
+
+
+class InstallItem:
+    """One mod file to install, either a loose file or a member of a .zip."""
+
+    def __init__(self, source, filename, size, archive=None, member=None):
+        self.source = source      # what the user picked (file or archive path)
+        self.filename = filename  # name inside SRML/mods
+        self.size = size
+        self.archive = archive
+        self.member = member
+
+    def describe(self):
+        if self.archive:
+            return f"{os.path.basename(self.archive)}:{self.member}"
+        return self.source
+
+
+def collect_items(paths):
+    """
+    Expand files, folders and .zip archives into InstallItems.
+
+    Returns (items, results) where results holds an error entry for every
+    source that could not be read or contained no mods.
+    """
+    items = []
+    results = []
+
+    def add_file(path):
+        lower = path.lower()
+        if lower.endswith(".zip"):
+            add_archive(path)
+        elif lower.endswith(Scanner.MOD_SUFFIXES):
+            try:
+                size = os.path.getsize(path)
+            except OSError as e:
+                results.append(_result(path, os.path.basename(path), False, str(e)))
+                return
+            items.append(InstallItem(path, Scanner.installed_filename(os.path.basename(path)), size))
+
+    def add_archive(path):
+        try:
+            with zipfile.ZipFile(path) as zf:
+                found = False
+                for info in zf.infolist():
+                    name = os.path.basename(info.filename.replace("\\", "/"))
+                    if info.is_dir() or info.filename.startswith("__MACOSX/"):
+                        continue
+                    if name.lower().endswith(Scanner.MOD_SUFFIXES):
+                        # Only the base name is used, so members can't escape the mods folder
+                        items.append(InstallItem(path, Scanner.installed_filename(name), info.file_size,
+                                                 path, info.filename))
+                        found = True
+                if not found:
+                    results.append(_result(path, None, False, "Archive contains no .dll files"))
+        except (OSError, zipfile.BadZipFile) as e:
+            results.append(_result(path, None, False, f"Could not read archive: {e}"))
+
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, files in os.walk(path):
+                for name in sorted(files):
+                    add_file(os.path.join(folder, name))
+        else:
+            add_file(path)
+
+    # Two sources providing the same filename: first one wins
+    seen = {}
+    unique = []
+    for item in items:
+        if item.filename in seen:
+            results.append(_result(item.describe(), item.filename, False,
+                                   f"Skipped: same filename as {seen[item.filename]}"))
+            continue
+        seen[item.filename] = item.describe()
+        unique.append(item)
+    return unique, results
+
+
+def install_items(items, mods_folder, progress=None, cancel=None, max_workers=MAX_WORKERS,
+                  known_hashes=None):
+    """
+    Copy/extract items into mods_folder on a bounded thread pool.
+
+    Archive members are streamed straight to disk. progress(done_bytes,
+    total_bytes, text) is called from the worker threads. With known_hashes
+    ({sha256: installed filename}) items whose content is already installed,
+    or appears twice in the batch, are skipped. Returns one result dict per
+    item: {"source", "filename", "ok", "error"}.
+    """
+    total = sum(item.size for item in items) or None
+    lock = threading.Lock()
+    state = {"done": 0}
+    known = dict(known_hashes) if known_hashes is not None else None
+
+    def already_installed(item):
+        if item.archive:
+            with zipfile.ZipFile(item.archive) as zf, zf.open(item.member) as fsrc:
+                digest = HashIndex.hash_stream(fsrc)
+        else:
+            digest = HashIndex.hash_file(item.source)
+        with lock:
+            if digest in known:
+                return known[digest]
+            known[digest] = item.filename
+        return None
+
+    def install_one(item):
+        last = [0]
+
+        def on_chunk(done, _total):
+            if progress is None:
+                return
+            with lock:
+                state["done"] += done - last[0]
+                overall = state["done"]
+            last[0] = done
+            progress(overall, total, f"Installing {item.filename}")
+
+        dest_path = os.path.join(mods_folder, item.filename)
+        try:
+            if known is not None:
+                existing = already_installed(item)
+                if existing is not None:
+                    return _result(item.describe(), item.filename, False,
+                                   f"Already installed as '{existing}'")
+            if item.archive:
+                with zipfile.ZipFile(item.archive) as zf, zf.open(item.member) as fsrc:
+                    FileOps.copy_stream(fsrc, dest_path, item.size, on_chunk, cancel)
+            else:
+                FileOps.copy_file(item.source, dest_path, on_chunk, cancel)
+        except FileOps.OperationCancelled:
+            return _result(item.describe(), item.filename, False, "Cancelled")
+        except (OSError, zipfile.BadZipFile, shutil.Error) as e:
+            return _result(item.describe(), item.filename, False, str(e))
+        return _result(item.describe(), item.filename, True, None)
+
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)),
+                            thread_name_prefix="srmm-install") as pool:
+        return list(pool.map(install_one, items))
+
+
+def _result(source, filename, ok, error):
+    return {"source": source, "filename": filename, "ok": ok, "error": error}
@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+
+# Settings kept per install instead of globally
+INSTALL_SETTINGS = ("game_path", "srml_log", "launch_history")
+# Name given to the install that existed before installs could be named
+DEFAULT_NAME = "Default"
+# Threads used when one batch is applied to several installs
+APPLY_WORKERS = 4
+
+
+class InstallRegistry:
+    """
+    Named game installs (stable, beta, test copies, ...), kept in the
+    "installs" setting as [{"name", "settings": {key: value}}], plus the
+    "active_install" setting. Every install has its own game_path and the
+    other INSTALL_SETTINGS; a lone game_path from before installs existed
+    becomes the "Default" install.
+    """
+
+    def __init__(self, store):
+        self.store = store  # Store.XmlStore or Store.SqliteStore
+        self._lock = threading.RLock()
+
+    def _load(self):
+        try:
+            installs = json.loads(self.store.get_setting("installs") or "[]")
+        except ValueError:
+            installs = []
+        if not installs and self.store.get_setting("game_path"):
+            installs = [{"name": DEFAULT_NAME, "settings": {"game_path": self.store.get_setting("game_path")}}]
+        return installs
+
+    def _save(self, installs):
+        self.store.set_setting("installs", json.dumps(installs))
+
+    def names(self):
+        with self._lock:
+            return [install["name"] for install in self._load()]
+
+    def game_paths(self):
+        # {name: SlimeRancher.exe}
+        with self._lock:
+            return {install["name"]: install["settings"].get("game_path") for install in self._load()}
+
+    def add(self, name, game_path):
+        # Register (or re-point) an install; returns (success, msg)
+        name = name.strip()
+        if not name:
+            return False, "An install needs a name."
+        if not os.path.isfile(game_path):
+            return False, f"'{game_path}' does not exist."
+        with self._lock:
+            installs = self._load()
+            for install in installs:
+                if install["name"] == name:
+                    install["settings"]["game_path"] = game_path
+                    break
+            else:
+                installs.append({"name": name, "settings": {"game_path": game_path}})
+            self._save(installs)
+        return True, f"Install '{name}' points to '{game_path}'."
+
+    def remove(self, name):
+        # Forget an install (its files are not touched)
+        with self._lock:
+            installs = [install for install in self._load() if install["name"] != name]
+            self._save(installs)
+            if self.active == name:
+                self.active = installs[0]["name"] if installs else None
+
+    def get_setting(self, name, key):
+        with self._lock:
+            for install in self._load():
+                if install["name"] == name:
+                    return install["settings"].get(key)
+        return None
+
+    def set_setting(self, name, key, value):
+        # Ignored for an unknown install, e.g. a late write after remove();
+        # only add() creates installs
+        with self._lock:
+            installs = self._load()
+            for install in installs:
+                if install["name"] == name:
+                    if install["settings"].get(key) != value:
+                        install["settings"][key] = value
+                        self._save(installs)
+                    return
+
+    @property
+    def active(self):
+        active = self.store.get_setting("active_install")
+        names = self.names()
+        if active in names:
+            return active
+        return names[0] if names else None
+
+    @active.setter
+    def active(self, name):
+        self.store.set_setting("active_install", name or "")
@@ -0,0 +1,183 @@
+import errno
+import os
+import shutil
+import threading
+import time
+
+# Entries kept for undo; older ones are forgotten (their files stay in the trash)
+JOURNAL_LIMIT = 100
+# Default purge budget for SRML/.trash
+TRASH_MAX_BYTES = 1024 * 1024 * 1024
+TRASH_MAX_AGE_DAYS = 30
+
+
+def move(src, dst):
+    """
+    Move one file, refusing to replace an existing destination.
+
+    Within a volume this is a single rename, however large the file; the
+    trash lives next to SRML/mods for exactly that reason.
+    """
+    if os.path.lexists(dst):
+        # os.rename would silently replace it on POSIX
+        raise FileExistsError(f"'{os.path.basename(dst)}' already exists")
+    try:
+        os.rename(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        # Mods folder on another volume than the trash (e.g. a symlink)
+        shutil.move(src, dst)
+
+
+def apply_moves(moves):
+    """
+    Perform [(src, dst)] in order as one batch.
+
+    If one move fails, the ones already done are moved back and the error is
+    raised again, so the folder is left as it was.
+    """
+    done = []
+    try:
+        for src, dst in moves:
+            move(src, dst)
+            done.append((src, dst))
+    except OSError:
+        for src, dst in reversed(done):
+            try:
+                move(dst, src)
+            except OSError as e:
+                print(f"Could not move '{dst}' back to '{src}': {e}")
+        raise
+
+
+class Trash:
+    """
+    SRML/.trash: deleted (and replaced) mods, named "<time_ns>-<filename>"
+    so the original name and deletion time survive a restart.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._last = 0
+
+    def allocate(self, filename):
+        # Unused path in the trash for a file about to be moved there
+        os.makedirs(self.folder, exist_ok=True)
+        with self._lock:
+            stamp = max(time.time_ns(), self._last + 1)
+            self._last = stamp
+        return os.path.join(self.folder, f"{stamp}-{filename}")
+
+    def entries(self):
+        # [(path, original filename, deleted at (epoch seconds), size)], oldest first
+        result = []
+        try:
+            names = os.listdir(self.folder)
+        except FileNotFoundError:
+            return result
+        for name in names:
+            stamp, _, filename = name.partition("-")
+            if not stamp.isdigit() or not filename:
+                continue
+            path = os.path.join(self.folder, name)
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                continue
+            result.append((path, filename, int(stamp) / 1e9, size))
+        result.sort(key=lambda entry: entry[2])
+        return result
+
+    def purge(self, max_bytes=TRASH_MAX_BYTES, max_age_days=TRASH_MAX_AGE_DAYS, keep=()):
+        """
+        Delete files older than max_age_days, then the oldest ones until the
+        trash fits in max_bytes. Files in `keep` (still needed for undo) are
+        spared by the age limit and only go when the size budget demands it.
+        Returns (files removed, bytes freed).
+        """
+        entries = self.entries()
+        total = sum(entry[3] for entry in entries)
+        cutoff = time.time() - max_age_days * 86400
+        keep = set(keep)
+
+        expired = [e for e in entries if e[2] < cutoff and e[0] not in keep]
+        rest = [e for e in entries if e[2] >= cutoff or e[0] in keep]
+        doomed = list(expired)
+        total -= sum(e[3] for e in expired)
+        # Over budget: unreferenced files go first, oldest first
+        for entry in sorted(rest, key=lambda e: (e[0] in keep, e[2])):
+            if total <= max_bytes:
+                break
+            doomed.append(entry)
+            total -= entry[3]
+
+        removed = freed = 0
+        for path, _, _, size in doomed:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Could not purge '{path}': {e}")
+                continue
+            removed += 1
+            freed += size
+        return removed, freed
+
+
+class Entry:
+    def __init__(self, label, moves):
+        self.label = label  # e.g. "Delete 3 mod(s)"
+        self.moves = moves  # [(src, dst)] as performed; undo runs them backwards
+
+
+class Journal:
+    """
+    Undo/redo history of file operations on the mods folder.
+
+    Every toggle, install and delete is recorded as the list of moves it
+    made (renames inside SRML/mods, moves to and from the trash), so undo
+    and redo are just those moves reversed or replayed. Each step is a
+    batch that is rolled back as a whole if any move fails (e.g. a file
+    with the same name was installed in the meantime).
+    """
+
+    def __init__(self, limit=JOURNAL_LIMIT):
+        self.limit = limit
+        self._undo = []
+        self._redo = []
+
+    def record(self, label, moves):
+        if not moves:
+            return
+        self._undo.append(Entry(label, list(moves)))
+        del self._undo[:-self.limit]
+        self._redo = []
+
+    def clear(self):
+        self._undo = []
+        self._redo = []
+
+    def undo_label(self):
+        return self._undo[-1].label if self._undo else None
+
+    def redo_label(self):
+        return self._redo[-1].label if self._redo else None
+
+    def undo(self):
+        # Entry that was undone. On failure nothing changed on disk, the
+        # entry is dropped (it would fail again every time) and OSError is raised.
+        entry = self._undo.pop()
+        apply_moves([(dst, src) for src, dst in reversed(entry.moves)])
+        self._redo.append(entry)
+        return entry
+
+    def redo(self):
+        entry = self._redo.pop()
+        apply_moves(entry.moves)
+        self._undo.append(entry)
+        return entry
+
+    def referenced_paths(self):
+        # Every path the history may still need (kept by Trash.purge)
+        return {path for entry in self._undo + self._redo for move in entry.moves for path in move}
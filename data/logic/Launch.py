@@ -0,0 +1,140 @@
+import json
+import os
+import struct
+import threading
+import time
+from data.logic import Scanner, Threads
+
+# Threads used to check mod files before a launch
+CHECK_WORKERS = 4
+# Launches remembered in the "launch_history" setting
+HISTORY_LIMIT = 50
+
+
+def srml_problem(game_path):
+    # None if SRML is installed next to the game, otherwise what is wrong
+    game_dir = os.path.dirname(game_path)
+    for path in (os.path.join(game_dir, "SlimeRancher_Data", "Managed", "SRML.dll"),
+                 os.path.join(game_dir, "SRML", "SRML.dll")):
+        if os.path.isfile(path):
+            return None
+    return "SRML is not installed (SRML.dll not found in SlimeRancher_Data/Managed)."
+
+
+def check_file(path):
+    # Problem with one enabled mod file, or None if it is a readable PE image
+    try:
+        with open(path, "rb") as f:
+            head = f.read(0x40)
+            if not head:
+                return "Empty file (0 bytes)."
+            if len(head) < 0x40 or head[:2] != b"MZ":
+                return "Not a DLL (no PE header)."
+            f.seek(struct.unpack_from("<I", head, 0x3C)[0])
+            if f.read(4) != b"PE\0\0":
+                return "Not a DLL (no PE header)."
+    except OSError as e:
+        return f"Unreadable: {e}"
+    return None
+
+
+class FileChecks:
+    """
+    check_file() results per path, remembered with the size and mtime they
+    were made at, so a repeat launch only reads files that changed.
+    """
+
+    def __init__(self):
+        self.results = {}  # path -> (size, mtime_ns, problem or None)
+        self._lock = threading.Lock()
+
+    def run(self, folder, entries, max_workers=CHECK_WORKERS):
+        """
+        Check the files of a scanner snapshot ({filename: (size, mtime_ns,
+        inode)}) in parallel. Returns ({filename: problem}, files read).
+        """
+        todo = []
+        problems = {}
+        with self._lock:
+            for filename, (size, mtime_ns, _) in entries.items():
+                path = os.path.join(folder, filename)
+                known = self.results.get(path)
+                if known is not None and known[0] == size and known[1] == mtime_ns:
+                    if known[2]:
+                        problems[filename] = known[2]
+                else:
+                    todo.append((filename, path, size, mtime_ns))
+
+        if todo:
+            with Threads.pool(min(max_workers, len(todo)), "srmm-check") as pool:
+                checked = list(pool.map(lambda job: check_file(job[1]), todo))
+            with self._lock:
+                for (filename, path, size, mtime_ns), problem in zip(todo, checked):
+                    self.results[path] = (size, mtime_ns, problem)
+                    if problem:
+                        problems[filename] = problem
+        return problems, len(todo)
+
+
+class LaunchHistory:
+    """
+    The last HISTORY_LIMIT game launches with the mods that were enabled,
+    kept in the "launch_history" setting. A launch is recorded when the
+    game starts and completed with its exit code and run time when it
+    exits, so a crash can be traced back to the mod set.
+    """
+
+    def __init__(self, settings):
+        # Anything with get_setting/set_setting; ModManagerLogic keeps it per install
+        self.settings = settings
+        self._lock = threading.Lock()
+
+    def records(self):
+        # Oldest first: {"started", "pid", "profile", "mods", "exit_code", "duration"}
+        try:
+            return json.loads(self.settings.get_setting("launch_history") or "[]")
+        except ValueError:
+            return []
+
+    def last(self):
+        records = self.records()
+        return records[-1] if records else None
+
+    def _save(self, records):
+        self.settings.set_setting("launch_history", json.dumps(records[-HISTORY_LIMIT:]))
+
+    def track(self, process, mods, profile=None, on_exit=None):
+        """
+        Record a started subprocess.Popen and wait for it on a daemon
+        thread; on_exit(record) is called from that thread when it ends.
+        Returns the record.
+        """
+        started = time.time()
+        record = {"started": started, "pid": process.pid, "profile": profile,
+                  "mods": sorted(mods), "exit_code": None, "duration": None}
+        with self._lock:
+            records = self.records()
+            records.append(record)
+            self._save(records)
+
+        def wait():
+            exit_code = process.wait()
+            record["exit_code"] = exit_code
+            record["duration"] = round(time.time() - started, 3)
+            with self._lock:
+                records = self.records()
+                for other in reversed(records):
+                    if other["pid"] == record["pid"] and other["started"] == started:
+                        other.update(record)
+                        break
+                self._save(records)
+            if on_exit is not None:
+                on_exit(record)
+
+        threading.Thread(target=wait, name="srmm-game", daemon=True).start()
+        return record
+
+
+def enabled_entries(entries):
+    # The part of a scanner snapshot SRML will load
+    return {filename: stat for filename, stat in entries.items() if Scanner.is_enabled(filename)}
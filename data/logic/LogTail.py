@@ -0,0 +1,157 @@
+import collections
+import itertools
+import os
+import re
+import threading
+
+# Lines kept in memory; the oldest drop off
+BUFFER_LINES = 50000
+# A log opened for the first time is read from at most this far before its end
+INITIAL_BYTES = 1024 * 1024
+# Largest read per poll, so one poll never stalls on a huge burst
+READ_SIZE = 4 * 1024 * 1024
+# Where SRML and Unity write their logs, relative to the game folder
+LOG_CANDIDATES = (
+    os.path.join("SRML", "srml.log"),
+    os.path.join("SRML", "Logs", "srml.log"),
+    os.path.join("SlimeRancher_Data", "output_log.txt"),
+)
+# Inserted where the file was truncated or replaced
+RESTART_MARKER = "--- log restarted ---"
+
+_WORD = re.compile(r"[\w.]+")
+
+
+def _tokens(text):
+    # Words of a lower-cased line; "Foo.dll" and "Foo." also count as "foo"
+    words = set(_WORD.findall(text))
+    words.update([w.rsplit(".", 1)[0] for w in words if "." in w])
+    return words
+
+
+def find_log(game_path):
+    # First existing candidate next to SlimeRancher.exe, else the SRML default
+    game_dir = os.path.dirname(game_path)
+    for name in LOG_CANDIDATES:
+        path = os.path.join(game_dir, name)
+        if os.path.isfile(path):
+            return path
+    return os.path.join(game_dir, LOG_CANDIDATES[0])
+
+
+class LogTail:
+    """
+    Incremental reader for a log file that keeps growing.
+
+    poll() reads only the bytes added since the last call, starting over
+    when the file is truncated or replaced (rotation), and keeps the last
+    `max_lines` lines in a ring buffer. Lines are numbered from the start
+    of the session (seq) and indexed by the mod names they mention, so
+    lines_for() never scans the buffer.
+    """
+
+    def __init__(self, path, max_lines=BUFFER_LINES):
+        self.path = path
+        self.max_lines = max_lines
+        self.lines = collections.deque(maxlen=max_lines)  # (seq, text)
+        self.next_seq = 0
+        self._offset = None   # None until the file was seen
+        self._inode = None
+        self._partial = b""
+        self._skip_partial = False
+        # Lower-cased mod/assembly names -> deque of (seq, text)
+        self._words = set()     # single-word names, matched by token
+        self._phrases = set()   # other names (spaces, dashes), matched as substrings
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def set_names(self, names):
+        # Names to index lines by; the buffer is re-indexed only if they changed
+        names = {name.lower() for name in names if name}
+        with self._lock:
+            if names == set(self._index):
+                return
+            self._words = {n for n in names if _WORD.fullmatch(n)}
+            self._phrases = names - self._words
+            self._index = {n: collections.deque(maxlen=self.max_lines) for n in names}
+            for line in self.lines:
+                self._index_line(line)
+
+    def _index_line(self, line):
+        text = line[1].lower()
+        for word in self._words.intersection(_tokens(text)):
+            self._index[word].append(line)
+        for phrase in self._phrases:
+            if phrase in text:
+                self._index[phrase].append(line)
+
+    def poll(self):
+        # New lines since the last call (empty if nothing changed)
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return []
+        with self._lock:
+            new = []
+            if self._offset is None:
+                # First look: skip to the last INITIAL_BYTES, dropping the cut line
+                self._offset = max(0, st.st_size - INITIAL_BYTES)
+                self._inode = st.st_ino
+                self._skip_partial = self._offset > 0
+            elif st.st_ino != self._inode or st.st_size < self._offset:
+                # Rotated (new file) or truncated: read it from the start
+                self._offset = 0
+                self._inode = st.st_ino
+                self._partial = b""
+                self._skip_partial = False
+                new.append(self._add(RESTART_MARKER))
+            if st.st_size == self._offset:
+                return new
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(self._offset)
+                    data = f.read(READ_SIZE)
+            except OSError:
+                return new
+            self._offset += len(data)
+            chunks = (self._partial + data).split(b"\n")
+            self._partial = chunks.pop()
+            if self._skip_partial and chunks:
+                chunks.pop(0)
+                self._skip_partial = False
+            if len(chunks) > self.max_lines:
+                # Lines that would drop out of the buffer right away are only counted
+                self.next_seq += len(chunks) - self.max_lines
+                chunks = chunks[-self.max_lines:]
+            for chunk in chunks:
+                new.append(self._add(chunk.rstrip(b"\r").decode("utf-8", errors="replace")))
+            return new
+
+    def _add(self, text):
+        line = (self.next_seq, text)
+        self.next_seq += 1
+        self.lines.append(line)
+        if self._index:
+            self._index_line(line)
+        return line
+
+    def tail(self, count):
+        # The last `count` buffered lines, oldest first
+        with self._lock:
+            lines = list(itertools.islice(reversed(self.lines), count))
+        lines.reverse()
+        return lines
+
+    def lines_for(self, names, count=None, since=0):
+        # Buffered lines (seq >= since) mentioning any of `names`, oldest first;
+        # only names passed to set_names() are indexed
+        with self._lock:
+            oldest = max(since, self.lines[0][0] if self.lines else self.next_seq)
+            found = {}
+            for name in names:
+                for line in reversed(self._index.get(name.lower(), ())):
+                    if line[0] < oldest:
+                        break
+                    found[line[0]] = line
+        lines = [found[seq] for seq in sorted(found)]
+        return lines[-count:] if count else lines
@@ -0,0 +1,196 @@
+import json
+import os
+import time
+from data.logic import FileOps, Scanner
+
+MANIFEST_VERSION = 1
+# Default location of the mod cache (setting "mod_cache" overrides it)
+CACHE_FOLDER = os.path.join("data", "modcache")
+
+
+class ManifestError(ValueError):
+    pass
+
+
+def build(entries, sha_for, game=None):
+    """
+    Manifest of a mods folder: one {"filename", "enabled", "size", "sha256"}
+    per file in the scanner snapshot `entries`. sha_for(filename) returns
+    the content hash (see HashIndex.ContentIndex).
+    """
+    mods = []
+    for filename in sorted(entries):
+        size = entries[filename][0]
+        mods.append({"filename": filename, "enabled": Scanner.is_enabled(filename),
+                     "size": size, "sha256": sha_for(filename)})
+    return {"version": MANIFEST_VERSION, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "game": game, "mods": mods}
+
+
+def write(manifest, path):
+    FileOps.write_atomic(path, json.dumps(manifest, indent=2).encode("utf-8"))
+
+
+def read(path):
+    # Load and check a manifest; raises ManifestError (or OSError)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except ValueError as e:
+        raise ManifestError(f"'{os.path.basename(path)}' is not a manifest: {e}")
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("mods"), list):
+        raise ManifestError(f"'{os.path.basename(path)}' is not a manifest.")
+    if manifest.get("version", 0) > MANIFEST_VERSION:
+        raise ManifestError(f"Manifest version {manifest['version']} is newer than this tool.")
+    seen = set()
+    for mod in manifest["mods"]:
+        filename = mod.get("filename") if isinstance(mod, dict) else None
+        if (not filename or os.path.basename(filename) != filename
+                or not isinstance(mod.get("size"), int) or not mod.get("sha256")):
+            raise ManifestError(f"Invalid manifest entry: {mod!r}")
+        if filename in seen:
+            raise ManifestError(f"'{filename}' is listed twice.")
+        seen.add(filename)
+        # The filename decides the state; "enabled" is informational
+        mod["enabled"] = Scanner.is_enabled(filename)
+    return manifest
+
+
+def compare(manifest, entries, sha_for):
+    """
+    Differences between a manifest and a mods folder.
+
+    Sizes come from the snapshot, so a file of the wrong size is reported
+    without looking at its hash; sha_for(filename) is only asked for files
+    whose size matches. Returns {"ok", "matched", "missing", "wrong_state",
+    "changed", "extra"} (lists of filenames; "wrong_state" holds the
+    manifest's filename of mods that only differ in .dll/.disabled).
+    """
+    result = {"ok": False, "matched": 0, "missing": [], "wrong_state": [], "changed": [], "extra": []}
+    names = manifest_names(manifest)
+    accounted = set()
+    for mod in manifest["mods"]:
+        filename = mod["filename"]
+        toggled = Scanner.toggled_filename(filename)
+        if filename in entries:
+            found = filename
+        elif toggled in entries and toggled not in names:
+            found = toggled
+        else:
+            result["missing"].append(filename)
+            continue
+        accounted.add(found)
+        if entries[found][0] != mod["size"] or sha_for(found) != mod["sha256"]:
+            result["changed"].append(filename)
+        elif found == filename:
+            result["matched"] += 1
+        else:
+            result["wrong_state"].append(filename)
+    result["extra"] = sorted(f for f in entries if f not in accounted)
+    result["ok"] = not (result["missing"] or result["wrong_state"] or result["changed"] or result["extra"])
+    return result
+
+
+def manifest_names(manifest):
+    return {mod["filename"] for mod in manifest["mods"]}
+
+
+class Plan:
+    # File operations that make a mods folder match a manifest
+    def __init__(self):
+        self.removals = []  # filenames to move to the trash
+        self.renames = []   # (old filename, new filename), content already present
+        self.copies = []    # (source path, filename) from the mod cache
+        self.missing = []   # manifest filenames with no known copy of their content
+
+    def __bool__(self):
+        return bool(self.removals or self.renames or self.copies)
+
+    def as_dict(self):
+        return {"remove": list(self.removals), "rename": [list(r) for r in self.renames],
+                "copy": [filename for _, filename in self.copies], "missing": list(self.missing)}
+
+
+def plan(manifest, folder, entries, sha_for, find_source):
+    """
+    Smallest set of operations that turns `folder` into the manifest.
+
+    Files already right are left alone, content present under another name
+    (including the other .dll/.disabled state) is renamed, anything else is
+    copied from find_source(sha256, size) -> path or None, and files not in
+    the manifest are removed. Content needed twice is copied from the first
+    placed file.
+    """
+    result = Plan()
+    wanted = [mod for mod in manifest["mods"]
+              if not (mod["filename"] in entries and entries[mod["filename"]][0] == mod["size"]
+                      and sha_for(mod["filename"]) == mod["sha256"])]
+    used = manifest_names(manifest) - {mod["filename"] for mod in wanted}
+
+    by_sha = {}
+    for filename, (size, _, _) in entries.items():
+        if filename not in used:
+            by_sha.setdefault((size, sha_for(filename)), []).append(filename)
+
+    placed = {mod["sha256"]: mod["filename"] for mod in manifest["mods"] if mod["filename"] in used}
+    copies = []
+    for mod in wanted:
+        filename = mod["filename"]
+        candidates = by_sha.get((mod["size"], mod["sha256"]))
+        if candidates:
+            # Prefer the same mod in the other state over an unrelated filename
+            name = Scanner.display_name(filename)
+            candidates.sort(key=lambda f: Scanner.display_name(f) != name)
+            source = candidates.pop(0)
+            used.add(source)
+            result.renames.append((source, filename))
+            placed.setdefault(mod["sha256"], filename)
+        else:
+            copies.append(mod)
+
+    for mod in copies:
+        filename = mod["filename"]
+        source = find_source(mod["sha256"], mod["size"])
+        if source is None and mod["sha256"] in placed:
+            source = os.path.join(folder, placed[mod["sha256"]])
+        if source is None:
+            result.missing.append(filename)
+            continue
+        result.copies.append((source, filename))
+        placed.setdefault(mod["sha256"], filename)
+
+    result.removals = sorted(f for f in entries if f not in used)
+    return result
+
+
+class ModCache:
+    """
+    Content-addressed copies of mods (one file per SHA-256), filled by
+    manifest exports and used to restore files a manifest asks for.
+    Files are hardlinked in when the filesystem allows it.
+    """
+
+    def __init__(self, folder=CACHE_FOLDER):
+        self.folder = folder
+
+    def path_for(self, digest, size=None):
+        path = os.path.join(self.folder, digest)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if size is not None and st.st_size != size:
+            return None
+        return path
+
+    def add(self, path, digest):
+        # True if the content was not cached yet
+        if self.path_for(digest) is not None:
+            return False
+        os.makedirs(self.folder, exist_ok=True)
+        dest = os.path.join(self.folder, digest)
+        try:
+            os.link(path, dest)
+        except OSError:
+            FileOps.copy_file(path, dest)
+        return True
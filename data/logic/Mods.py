@@ -0,0 +1,161 @@
+import itertools
+from data.logic import Scanner
+
+# Special targets for ModManagerLogic.set_mods_enabled: every mod on or off
+ENABLE_ALL = "enable_all"
+DISABLE_ALL = "disable_all"
+
+# Record ids are unique across registries, so rows of different installs never collide
+_ids = itertools.count(1)
+
+
+class ModRecord:
+    """
+    One mod file in SRML/mods, shared by Logic, the CLI and the GUI.
+
+    Records are owned by a ModRegistry and updated in place: a toggle or
+    rename keeps the record (and its id), only the changed fields move.
+    `revision` goes up on every change, so a view can skip records it has
+    already drawn.
+    """
+
+    __slots__ = ("id", "filename", "name", "enabled", "size", "mtime_ns", "inode",
+                 "assembly", "duplicate_of", "dependency_problems", "revision")
+
+    def __init__(self, record_id, filename, stat):
+        self.id = record_id  # stable for the lifetime of the record, usable as a row id
+        self.assembly = None          # .NET metadata (see DotNetMeta), None if unknown
+        self.duplicate_of = ()        # other filenames with the same content
+        self.dependency_problems = ()
+        self.revision = 0
+        self._set_filename(filename)
+        self._set_stat(stat)
+
+    def _set_filename(self, filename):
+        self.filename = filename
+        self.name = Scanner.display_name(filename)
+        self.enabled = Scanner.is_enabled(filename)
+
+    def _set_stat(self, stat):
+        self.size, self.mtime_ns, self.inode = stat
+
+    @property
+    def mtime(self):
+        return self.mtime_ns / 1e9
+
+    def as_dict(self, details=False):
+        # JSON form used by the CLI
+        data = {"filename": self.filename, "name": self.name, "enabled": self.enabled,
+                "size": self.size, "mtime": self.mtime}
+        if details:
+            data["assembly"] = self.assembly
+            if self.duplicate_of:
+                data["duplicate_of"] = list(self.duplicate_of)
+            if self.dependency_problems:
+                data["dependency_problems"] = list(self.dependency_problems)
+        return data
+
+    def log_names(self):
+        # Names a log line may use for this mod
+        assembly_name = (self.assembly or {}).get("assembly_name")
+        if assembly_name and assembly_name.lower() != self.name.lower():
+            return (self.name, assembly_name)
+        return (self.name,)
+
+    def __repr__(self):
+        return f"ModRecord({self.id}, {self.filename!r})"
+
+
+class ModRegistry:
+    """
+    The current ModRecords, indexed by filename and by display name (a mod
+    can exist as both Foo.dll and Foo.disabled).
+
+    Kept in line with the folder by apply(), which takes the scanner's diff
+    instead of rebuilding everything.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.by_filename = {}
+        self.by_name = {}  # display name -> [records]
+        self._records = None
+
+    def __len__(self):
+        return len(self.by_filename)
+
+    def get(self, filename):
+        return self.by_filename.get(filename)
+
+    def find(self, name):
+        # Records with this display name; falls back to a case-insensitive match
+        found = self.by_name.get(name)
+        if found:
+            return list(found)
+        lower = name.lower()
+        return [r for records in self.by_name.values() for r in records if r.name.lower() == lower]
+
+    def records(self):
+        if self._records is None:
+            self._records = list(self.by_filename.values())
+        return list(self._records)
+
+    def apply(self, diff, entries):
+        # entries: the scanner snapshot {filename: (size, mtime_ns, inode)}
+        if not diff:
+            return
+        for filename in diff.removed:
+            record = self.by_filename.pop(filename, None)
+            if record is not None:
+                self._unindex_name(record)
+        for old_name, new_name in diff.renamed:
+            record = self.by_filename.pop(old_name, None)
+            if record is None:
+                self._add(new_name, entries[new_name])
+                continue
+            self._unindex_name(record)
+            record._set_filename(new_name)
+            record._set_stat(entries.get(new_name, (record.size, record.mtime_ns, record.inode)))
+            record.revision += 1
+            self._index(record)
+        for filename in diff.added:
+            self._add(filename, entries[filename])
+        for filename in diff.changed:
+            record = self.by_filename.get(filename)
+            if record is not None:
+                record._set_stat(entries[filename])
+                record.revision += 1
+        self._records = None
+
+    def annotate(self, record, assembly, duplicate_of, dependency_problems):
+        # Results of the metadata/hash/dependency passes (get_mods)
+        duplicate_of = tuple(duplicate_of)
+        dependency_problems = tuple(dependency_problems)
+        if (record.assembly != assembly or record.duplicate_of != duplicate_of
+                or record.dependency_problems != dependency_problems):
+            record.assembly = assembly
+            record.duplicate_of = duplicate_of
+            record.dependency_problems = dependency_problems
+            record.revision += 1
+
+    def _add(self, filename, stat):
+        record = self.by_filename.get(filename)
+        if record is not None:
+            record._set_stat(stat)
+            record.revision += 1
+            return
+        record = ModRecord(f"m{next(_ids)}", filename, stat)
+        self._index(record)
+
+    def _index(self, record):
+        self.by_filename[record.filename] = record
+        self.by_name.setdefault(record.name, []).append(record)
+
+    def _unindex_name(self, record):
+        records = self.by_name.get(record.name, [])
+        if record in records:
+            records.remove(record)
+        if not records:
+            self.by_name.pop(record.name, None)
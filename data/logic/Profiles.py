@@ -0,0 +1,88 @@
+from data.logic import Scanner
+
+# How a profile handles mods that are not part of it
+MODE_RENAME = "rename"  # keep them in SRML/mods as .disabled
+MODE_LINK = "link"      # park them in the profile store, hardlink back when needed
+MODES = (MODE_RENAME, MODE_LINK)
+
+
+class Profile:
+    def __init__(self, name, mods, mode=MODE_RENAME):
+        self.name = name
+        self.mods = set(mods)  # display names (filename without .dll/.disabled)
+        self.mode = mode if mode in MODES else MODE_RENAME
+
+
+class ProfileStore:
+    """
+    Named sets of enabled mods, kept in the Store (the <profiles> element of
+    modlist.xml, or the profiles tables of modlist.db).
+
+    Mods are stored by display name so a profile survives toggling.
+    """
+
+    def __init__(self, store):
+        self.store = store  # Store.XmlStore or Store.SqliteStore
+
+    def names(self):
+        return self.store.profile_names()
+
+    def get(self, name):
+        found = self.store.get_profile(name)
+        if found is None:
+            return None
+        mode, mods = found
+        return Profile(name, mods, mode)
+
+    def all(self):
+        with self.store.lock:
+            return [self.get(name) for name in self.names()]
+
+    def save(self, profile):
+        self.store.put_profile(profile.name, profile.mode, profile.mods)
+
+    def delete(self, name):
+        self.store.delete_profile(name)
+
+    @property
+    def active(self):
+        return self.store.get_active_profile()
+
+    @active.setter
+    def active(self, name):
+        self.store.set_active_profile(name)
+
+
+def plan_renames(filenames, enabled_names):
+    """
+    Smallest list of (filename, enabled) changes that makes exactly the mods
+    in enabled_names active. If both Foo.dll and Foo.disabled exist, only one
+    copy is ever enabled.
+
+    Returns (targets, conflicts). A mod that should be disabled while its
+    .disabled name is already taken (Foo.dll next to Foo.disabled) can't be
+    renamed; it is left alone and listed in conflicts instead of making the
+    whole batch fail.
+    """
+    targets = []
+    conflicts = []
+    present = set(filenames)
+    by_name = {}
+    for filename in filenames:
+        by_name.setdefault(Scanner.display_name(filename), []).append(filename)
+
+    for name, files in by_name.items():
+        want = name in enabled_names
+        enabled_files = [f for f in files if Scanner.is_enabled(f)]
+        if want:
+            if not enabled_files:
+                targets.append((files[0], True))
+            for extra in enabled_files[1:]:
+                targets.append((extra, False))
+        else:
+            for f in enabled_files:
+                if Scanner.toggled_filename(f) in present:
+                    conflicts.append(f)
+                else:
+                    targets.append((f, False))
+    return targets, sorted(conflicts)
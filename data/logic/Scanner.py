@@ -0,0 +1,166 @@
+import os
+import time
+
+# File extensions that mark a file in SRML/mods as a mod
+ENABLED_SUFFIX = ".dll"
+DISABLED_SUFFIX = ".disabled"
+MOD_SUFFIXES = (ENABLED_SUFFIX, DISABLED_SUFFIX)
+
+# A directory mtime this close to "now" is not trusted for the fast path,
+# because a second change within the filesystem's timestamp resolution
+# (2 seconds on FAT) would not move the mtime again.
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def display_name(filename):
+    # Strip the .dll / .disabled suffix for display
+    for suffix in MOD_SUFFIXES:
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)]
+    return filename
+
+
+def installed_filename(filename):
+    # Name a picked file gets in SRML/mods: "Foo.DLL" -> "Foo.dll", so the
+    # case-sensitive checks here see it (None if it is not a mod file)
+    lower = filename.lower()
+    for suffix in MOD_SUFFIXES:
+        if lower.endswith(suffix):
+            return filename[:-len(suffix)] + suffix
+    return None
+
+
+def is_enabled(filename):
+    return filename.endswith(ENABLED_SUFFIX)
+
+
+def toggled_filename(filename):
+    # Filename after flipping the enabled state (only the suffix changes)
+    if filename.endswith(ENABLED_SUFFIX):
+        return filename[:-len(ENABLED_SUFFIX)] + DISABLED_SUFFIX
+    if filename.endswith(DISABLED_SUFFIX):
+        return filename[:-len(DISABLED_SUFFIX)] + ENABLED_SUFFIX
+    return filename
+
+
+class ScanDiff:
+    """
+    Result of one incremental scan of the mods folder.
+
+    added / removed / changed are lists of filenames, renamed is a list of
+    (old_filename, new_filename) pairs. An empty diff is falsy.
+    """
+
+    def __init__(self, added=None, removed=None, renamed=None, changed=None):
+        self.added = added or []
+        self.removed = removed or []
+        self.renamed = renamed or []
+        self.changed = changed or []
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.renamed or self.changed)
+
+    def __repr__(self):
+        return (f"ScanDiff(added={self.added}, removed={self.removed}, "
+                f"renamed={self.renamed}, changed={self.changed})")
+
+
+class ModFolderScanner:
+    """
+    Keeps a snapshot of SRML/mods and reports what changed since the last scan.
+
+    The snapshot holds the folder mtime and, per mod file, its size, mtime and
+    inode. When the folder mtime has not moved since a trusted snapshot the
+    folder is not listed at all.
+    """
+
+    def __init__(self, folder=None):
+        self.folder = folder
+        self.entries = {}  # filename -> (size, mtime_ns, inode)
+        self._dir_mtime = None
+        self._trusted = False
+
+    def reset(self, folder=None):
+        # Forget the snapshot (e.g. when the game path changes)
+        self.folder = folder
+        self.entries = {}
+        self._dir_mtime = None
+        self._trusted = False
+
+    def scan(self, force=False):
+        if not self.folder:
+            return ScanDiff()
+
+        try:
+            dir_mtime = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            # Folder vanished: everything we knew about is gone
+            diff = ScanDiff(removed=sorted(self.entries))
+            self.reset(self.folder)
+            return diff
+
+        if not force and self._trusted and dir_mtime == self._dir_mtime:
+            return ScanDiff()
+
+        new_entries = {}
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if not entry.name.endswith(MOD_SUFFIXES):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    # Removed between listing and stat
+                    continue
+                # On Windows scandir's stat has st_ino == 0; renames are
+                # then matched on (size, mtime) instead.
+                new_entries[entry.name] = (st.st_size, st.st_mtime_ns, st.st_ino)
+
+        diff = self._diff(self.entries, new_entries)
+        self.entries = new_entries
+        self._dir_mtime = dir_mtime
+        self._trusted = time.time_ns() - dir_mtime > RACY_WINDOW_NS
+        return diff
+
+    def apply_renames(self, renames):
+        # Record renames we did ourselves without listing the folder again;
+        # the next scan still sees the new folder mtime but finds no diff.
+        for old_name, new_name in renames:
+            if old_name in self.entries:
+                self.entries[new_name] = self.entries.pop(old_name)
+        return ScanDiff(renamed=list(renames))
+
+    @staticmethod
+    def _diff(old, new):
+        removed = [name for name in old if name not in new]
+        added = [name for name in new if name not in old]
+        changed = [name for name in new if name in old and old[name][:2] != new[name][:2]]
+
+        renamed = []
+        if removed and added:
+            # Pair removed and added files that are the same file on disk
+            by_inode = {}
+            by_stat = {}
+            for name in removed:
+                size, mtime, inode = old[name]
+                if inode:
+                    by_inode[inode] = name
+                else:
+                    by_stat.setdefault((size, mtime), []).append(name)
+
+            for name in added:
+                size, mtime, inode = new[name]
+                if inode and inode in by_inode:
+                    renamed.append((by_inode.pop(inode), name))
+                elif not inode and len(by_stat.get((size, mtime), ())) == 1:
+                    renamed.append((by_stat.pop((size, mtime))[0], name))
+
+            if renamed:
+                gone = {old_name for old_name, _ in renamed}
+                came = {new_name for _, new_name in renamed}
+                removed = [name for name in removed if name not in gone]
+                added = [name for name in added if name not in came]
+
+        return ScanDiff(added, removed, renamed, changed)
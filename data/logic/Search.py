@@ -0,0 +1,73 @@
+import re
+import unicodedata
+
+
+def normalize(text):
+    # Case- and accent-insensitive form used on both sides of a match
+    text = unicodedata.normalize("NFKD", text)
+    if not text.isascii():
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return text.casefold()
+
+
+def _fuzzy_pattern(token):
+    # The characters of token in order within one field. "a[^b\n]*b"
+    # instead of "a.*?b" keeps the regex free of backtracking.
+    return re.compile(re.escape(token[0]) + "".join(
+        f"[^{re.escape(c)}\n]*{re.escape(c)}" for c in token[1:]))
+
+
+class SearchIndex:
+    """
+    Normalized search text per key (here: mod filename).
+
+    update() only re-normalizes entries whose fields changed. filter()
+    remembers its last query and result: when the new query extends the
+    previous one, only the previous matches are checked again.
+    """
+
+    def __init__(self):
+        self.entries = {}  # key -> (fields tuple, haystack)
+        self._last_query = None
+        self._last_result = None
+
+    def update(self, key, fields):
+        fields = tuple(f for f in fields if f)
+        old = self.entries.get(key)
+        if old is not None and old[0] == fields:
+            return False
+        self.entries[key] = (fields, "\n".join(normalize(f) for f in fields))
+        self._last_query = None
+        return True
+
+    def retain(self, keys):
+        # Drop every entry not in keys
+        stale = [key for key in self.entries if key not in keys]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self._last_query = None
+
+    def filter(self, query):
+        """Set of keys matching every whitespace-separated word of query, or None for an empty query."""
+        query = normalize(query).strip()
+        if not query:
+            self._last_query = None
+            return None
+        if self._last_query is not None and query.startswith(self._last_query):
+            # Each word of the new query is a word of the old one or longer: a subset
+            candidates = self._last_result
+        else:
+            candidates = self.entries.keys()
+
+        # One pass per word, each over what the previous word left
+        entries = self.entries
+        keys = list(candidates)
+        for token in query.split():
+            fuzzy = _fuzzy_pattern(token).search
+            keys = [key for key in keys
+                    if token in entries[key][1] or fuzzy(entries[key][1]) is not None]
+        result = set(keys)
+        self._last_query = query
+        self._last_result = result
+        return result
@@ -0,0 +1,106 @@
+import os
+import threading
+import xml.etree.ElementTree as ET
+from data.logic import FileOps, Trace
+
+
+class SettingsDocument:
+    """
+    One parsed copy of modlist.xml shared by all of ModManagerLogic.
+
+    Changes are made directly on the element tree and announced with
+    mark_dirty(); the file is then written once after `debounce` seconds of
+    quiet, through FileOps.write_atomic so a crash never leaves a
+    half-written modlist.xml behind. The file is only parsed again when its
+    mtime changes outside this process.
+    """
+
+    def __init__(self, path, default_factory, debounce=0.5):
+        self.path = path
+        self.default_factory = default_factory  # returns a fresh root element
+        self.debounce = debounce
+        self._lock = threading.RLock()
+        self._timer = None
+        self._dirty = False
+        self._tree = None
+        self._mtime = None
+
+    @property
+    def lock(self):
+        return self._lock
+
+    def get_root(self):
+        # Parsed root element; re-read only if someone else changed the file
+        with self._lock:
+            mtime = self._stat_mtime()
+            if self._tree is None or (mtime != self._mtime and not self._dirty):
+                self._load(mtime)
+            elif mtime != self._mtime:
+                print(f"{self.path} changed on disk while unsaved changes are pending; keeping ours.")
+            return self._tree.getroot()
+
+    def section(self, tag):
+        # Return a direct child of the root, creating it if needed
+        root = self.get_root()
+        elem = root.find(tag)
+        if elem is None:
+            elem = ET.SubElement(root, tag)
+        return elem
+
+    def mark_dirty(self):
+        # Schedule a write; repeated calls within the debounce window coalesce
+        with self._lock:
+            self._dirty = True
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        # Write pending changes now (called by the timer and on shutdown)
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty or self._tree is None:
+                return
+            try:
+                self._write_atomic()
+                self._dirty = False
+            except OSError as e:
+                print(f"Could not save {self.path}: {e}")
+
+    def _stat_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self, mtime):
+        if mtime is None:
+            self._new_default()
+            return
+        try:
+            with Trace.span("parse", path=os.path.basename(self.path)):
+                self._tree = ET.parse(self.path)
+            self._mtime = mtime
+        except ET.ParseError as e:
+            # Keep the broken file for inspection and start over with defaults
+            backup = self.path + ".corrupt"
+            print(f"Error parsing {self.path} ({e}). Moved it to {backup} and using defaults.")
+            try:
+                os.replace(self.path, backup)
+            except OSError:
+                pass
+            self._new_default()
+
+    def _new_default(self):
+        self._tree = ET.ElementTree(self.default_factory())
+        self._write_atomic()
+        self._dirty = False
+
+    @Trace.traced("write")
+    def _write_atomic(self):
+        FileOps.write_atomic(self.path, ET.tostring(self._tree.getroot()))
+        self._mtime = self._stat_mtime()
@@ -0,0 +1,566 @@
+'''
+Persistent state of ModManagerLogic: settings, the mod list, profiles, file
+hashes and the assembly metadata cache.
+
+Two interchangeable backends with the same methods:
+
+    XmlStore     modlist.xml (+ modhashes.json / modmeta.json), rewritten
+                 as a whole on every change
+    SqliteStore  modlist.db in WAL mode; every change is a small indexed
+                 row update in its own transaction
+
+open_store() picks SQLite unless SRMM_STORE=xml is set or the sqlite3
+module is missing. A new database imports the XML/JSON files once and
+renames modlist.xml to modlist.xml.imported, so it is never read again;
+export_xml() writes the database back out as a modlist.xml.
+'''
+import json
+import os
+import sys
+import threading
+import xml.etree.ElementTree as ET
+from data.logic import DotNetMeta, FileOps, Scanner, Settings, Trace
+
+try:
+    import sqlite3
+except ImportError:  # some embedded Python builds ship without it
+    sqlite3 = None
+
+BACKEND_SQLITE = "sqlite"
+BACKEND_XML = "xml"
+BACKENDS = (BACKEND_SQLITE, BACKEND_XML)
+
+XML_NAME = "modlist.xml"
+DB_NAME = "modlist.db"
+HASHES_NAME = "modhashes.json"
+METADATA_NAME = "modmeta.json"
+
+# Version of modhashes.json and of the database layout
+HASHES_VERSION = 1
+SCHEMA_VERSION = 1
+
+
+def default_backend():
+    backend = os.environ.get("SRMM_STORE", "").lower()
+    if backend in BACKENDS:
+        return backend
+    return BACKEND_SQLITE if sqlite3 is not None else BACKEND_XML
+
+
+def open_store(folder, backend=None):
+    backend = backend or default_backend()
+    if backend == BACKEND_SQLITE:
+        if sqlite3 is None:
+            print("sqlite3 is not available; keeping state in modlist.xml.")
+        else:
+            return SqliteStore(folder)
+    return XmlStore(folder)
+
+
+def default_document():
+    # Base XML used when modlist.xml is missing or unreadable
+    root = ET.Element("manager")
+    settings = ET.SubElement(root, "settings")
+    # Default sort settings
+    ET.SubElement(settings, "sort_column").text = "name"
+    ET.SubElement(settings, "sort_direction").text = "asc"
+    ET.SubElement(root, "mods")
+    return root
+
+
+def mod_row(filename):
+    # (filename, display name, enabled) as stored for one mod file
+    return filename, Scanner.display_name(filename), Scanner.is_enabled(filename)
+
+
+def build_document(store):
+    # modlist.xml layout of everything in `store` (used for export)
+    root = ET.Element("manager")
+    settings = ET.SubElement(root, "settings")
+    for key, value in store.settings().items():
+        ET.SubElement(settings, key).text = value
+    mods = ET.SubElement(root, "mods")
+    for filename in store.mods():
+        elem = ET.SubElement(mods, "mod")
+        XmlStore._fill_mod_element(elem, filename)
+    names = store.profile_names()
+    if names:
+        profiles = ET.SubElement(root, "profiles")
+        active = store.get_active_profile()
+        if active:
+            profiles.set("active", active)
+        for name in names:
+            mode, members = store.get_profile(name)
+            elem = ET.SubElement(profiles, "profile", name=name, mode=mode)
+            for mod_name in sorted(members):
+                ET.SubElement(elem, "mod").set("name", mod_name)
+    return root
+
+
+def _read_json(path, version, key, what):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == version:
+            return data.get(key, {})
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable {what} {path}: {e}")
+    return {}
+
+
+def _write_json(path, data, what):
+    try:
+        FileOps.write_atomic(path, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        return True
+    except OSError as e:
+        print(f"Could not save {what}: {e}")
+        return False
+
+
+class XmlStore:
+    """
+    The original layout: settings, mods and profiles in one modlist.xml
+    (SettingsDocument: debounced, atomic rewrites), hashes and metadata in
+    JSON files next to it.
+
+        <profiles active="Testing">
+            <profile name="Testing" mode="rename">
+                <mod name="MoreVaccables" />
+            </profile>
+        </profiles>
+    """
+
+    backend = BACKEND_XML
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.xml_path = os.path.join(folder, XML_NAME)
+        self.hashes_path = os.path.join(folder, HASHES_NAME)
+        self.metadata_path = os.path.join(folder, METADATA_NAME)
+        self.document = Settings.SettingsDocument(self.xml_path, default_document)
+
+    @property
+    def lock(self):
+        return self.document.lock
+
+    def flush(self):
+        self.document.flush()
+
+    def close(self):
+        self.flush()
+
+    def export_xml(self, path):
+        with self.lock:
+            self.flush()
+            if os.path.abspath(path) != os.path.abspath(self.xml_path):
+                FileOps.write_atomic(path, ET.tostring(self.document.get_root()))
+        return path
+
+    # Settings
+
+    def get_setting(self, key):
+        with self.lock:
+            elem = self.document.section("settings").find(key)
+            return elem.text if elem is not None else None
+
+    def set_setting(self, key, value):
+        with self.lock:
+            settings = self.document.section("settings")
+            elem = settings.find(key)
+            if elem is None:
+                elem = ET.SubElement(settings, key)
+            if elem.text != value:
+                elem.text = value
+                self.document.mark_dirty()
+
+    def settings(self):
+        with self.lock:
+            return {elem.tag: elem.text for elem in self.document.section("settings")}
+
+    # Mods
+
+    def mods(self):
+        # {filename: enabled}
+        with self.lock:
+            return {elem.get("filename"): elem.get("enabled") == "True"
+                    for elem in self.document.section("mods").findall("mod")}
+
+    def update_mods(self, added=(), removed=(), renamed=()):
+        # Apply one scan diff to the <mods> element
+        with self.lock:
+            mods_elem = self.document.section("mods")
+            elems = {elem.get("filename"): elem for elem in mods_elem.findall("mod")}
+
+            for filename in removed:
+                elem = elems.pop(filename, None)
+                if elem is not None:
+                    mods_elem.remove(elem)
+
+            for old_name, new_name in renamed:
+                elem = elems.pop(old_name, None)
+                if elem is None:
+                    elem = ET.SubElement(mods_elem, "mod")
+                self._fill_mod_element(elem, new_name)
+
+            for filename in added:
+                if filename not in elems:
+                    self._fill_mod_element(ET.SubElement(mods_elem, "mod"), filename)
+
+            changed = bool(removed or renamed or added)
+            if changed:
+                self.document.mark_dirty()
+            return changed
+
+    def reconcile_mods(self, filenames):
+        # Make <mods> list exactly these files (first sync of a folder)
+        with self.lock:
+            mods_elem = self.document.section("mods")
+            changed = False
+            seen = set()
+
+            for elem in list(mods_elem):
+                filename = elem.get("filename")
+                if elem.tag != "mod" or filename not in filenames or filename in seen:
+                    mods_elem.remove(elem)
+                    changed = True
+                    continue
+                seen.add(filename)
+                if (elem.get("name") != Scanner.display_name(filename)
+                        or elem.get("enabled") != str(Scanner.is_enabled(filename))):
+                    self._fill_mod_element(elem, filename)
+                    changed = True
+
+            for filename in filenames:
+                if filename not in seen:
+                    self._fill_mod_element(ET.SubElement(mods_elem, "mod"), filename)
+                    changed = True
+            if changed:
+                self.document.mark_dirty()
+            return changed
+
+    @staticmethod
+    def _fill_mod_element(elem, filename):
+        _, name, enabled = mod_row(filename)
+        elem.set("filename", filename)
+        elem.set("name", name)
+        elem.set("enabled", str(enabled))
+
+    # Profiles
+
+    def _profiles(self):
+        return self.document.section("profiles")
+
+    def _find_profile(self, name):
+        for elem in self._profiles().findall("profile"):
+            if elem.get("name") == name:
+                return elem
+        return None
+
+    def profile_names(self):
+        with self.lock:
+            return [p.get("name") for p in self._profiles().findall("profile")]
+
+    def get_profile(self, name):
+        # (mode, [mod names]) or None
+        with self.lock:
+            elem = self._find_profile(name)
+            if elem is None:
+                return None
+            return elem.get("mode"), [m.get("name") for m in elem.findall("mod")]
+
+    def put_profile(self, name, mode, mods):
+        with self.lock:
+            elem = self._find_profile(name)
+            if elem is None:
+                elem = ET.SubElement(self._profiles(), "profile")
+            elem.clear()
+            elem.set("name", name)
+            elem.set("mode", mode)
+            for mod_name in sorted(mods):
+                ET.SubElement(elem, "mod").set("name", mod_name)
+            self.document.mark_dirty()
+
+    def delete_profile(self, name):
+        with self.lock:
+            elem = self._find_profile(name)
+            if elem is not None:
+                self._profiles().remove(elem)
+                if self._profiles().get("active") == name:
+                    self._profiles().attrib.pop("active", None)
+                self.document.mark_dirty()
+
+    def get_active_profile(self):
+        with self.lock:
+            return self._profiles().get("active")
+
+    def set_active_profile(self, name):
+        with self.lock:
+            if self._profiles().get("active") != name:
+                self._profiles().set("active", name)
+                self.document.mark_dirty()
+
+    # Caches (whole-file JSON rewrites)
+
+    def load_hashes(self):
+        # {abs path: (size, mtime_ns, sha256)}
+        files = _read_json(self.hashes_path, HASHES_VERSION, "files", "hash index")
+        return {path: tuple(entry) for path, entry in files.items()}
+
+    def save_hashes(self, files, changed, removed):
+        return _write_json(self.hashes_path, {"version": HASHES_VERSION, "files": files}, "hash index")
+
+    def load_metadata(self):
+        # {sha256: assembly info dict}
+        return _read_json(self.metadata_path, DotNetMeta.CACHE_VERSION, "by_hash", "metadata cache")
+
+    def save_metadata(self, by_hash, changed):
+        return _write_json(self.metadata_path, {"version": DotNetMeta.CACHE_VERSION, "by_hash": by_hash},
+                           "metadata cache")
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS mods (
+    filename TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    enabled INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS mods_by_name ON mods (name);
+CREATE TABLE IF NOT EXISTS profiles (name TEXT PRIMARY KEY, mode TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS profile_mods (
+    profile TEXT NOT NULL,
+    mod TEXT NOT NULL,
+    PRIMARY KEY (profile, mod)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hashes_by_sha ON hashes (sha256);
+CREATE TABLE IF NOT EXISTS metadata (sha256 TEXT PRIMARY KEY, info TEXT NOT NULL);
+"""
+
+
+class SqliteStore:
+    """
+    All state in one SQLite database (WAL journal, so readers never wait for
+    the single writer). Changes are committed immediately, one small
+    transaction per operation, so there is nothing to flush.
+
+    One connection is shared by all threads and serialized by `lock`.
+    """
+
+    backend = BACKEND_SQLITE
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, DB_NAME)
+        self.xml_path = os.path.join(folder, XML_NAME)
+        self._lock = threading.RLock()
+        os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Durable at checkpoints; a crash can only lose the last few commits
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+        self._import_legacy()
+        if self._get_state("metadata_version") != str(DotNetMeta.CACHE_VERSION):
+            # Parsed with an older DotNetMeta; parse again on demand
+            with self._lock, self._conn as conn:
+                conn.execute("DELETE FROM metadata")
+                self._set_state(conn, "metadata_version", str(DotNetMeta.CACHE_VERSION))
+
+    @property
+    def lock(self):
+        return self._lock
+
+    def flush(self):
+        pass
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _get_state(self, key):
+        rows = self._query("SELECT value FROM state WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def _set_state(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, value))
+
+    # Import / export
+
+    def _legacy_document_ok(self):
+        # True if modlist.xml exists and parses; a broken one is left alone
+        # rather than imported as the defaults XmlStore would fall back to
+        if not os.path.exists(self.xml_path):
+            return False
+        try:
+            ET.parse(self.xml_path)
+            return True
+        except (OSError, ET.ParseError) as e:
+            print(f"Not importing unreadable {self.xml_path}: {e}", file=sys.stderr)
+            return False
+
+    def _import_legacy(self):
+        # New database only: take over modlist.xml and the JSON caches once,
+        # then rename modlist.xml so it can never overwrite newer state
+        if self._get_state("schema_version") is not None:
+            return
+        import_xml = self._legacy_document_ok()
+        source = XmlStore(self.folder)
+        with Trace.span("import", cat="store", xml=import_xml), self._lock, self._conn as conn:
+            if import_xml:
+                self._import_document(conn, source)
+            self._put_hashes(conn, source.load_hashes())
+            self._put_metadata(conn, source.load_metadata())
+            self._set_state(conn, "metadata_version", str(DotNetMeta.CACHE_VERSION))
+            self._set_state(conn, "schema_version", str(SCHEMA_VERSION))
+        if import_xml:
+            try:
+                os.replace(self.xml_path, self.xml_path + ".imported")
+            except OSError as e:
+                print(f"Could not rename {self.xml_path} after importing it: {e}", file=sys.stderr)
+            print(f"Imported {self.xml_path} into {self.path}.", file=sys.stderr)
+
+    def _import_document(self, conn, source):
+        # Settings, mods and profiles of an XmlStore, into the empty tables of a new database
+        conn.executemany("INSERT INTO settings (key, value) VALUES (?, ?)", source.settings().items())
+        conn.executemany("INSERT OR REPLACE INTO mods (filename, name, enabled) VALUES (?, ?, ?)",
+                         [mod_row(filename) for filename in source.mods()])
+        for name in source.profile_names():
+            mode, members = source.get_profile(name)
+            self._put_profile(conn, name, mode, members)
+        self._set_state(conn, "active_profile", source.get_active_profile())
+
+    def export_xml(self, path):
+        root = build_document(self)
+        FileOps.write_atomic(path, ET.tostring(root))
+        return path
+
+    # Settings
+
+    def get_setting(self, key):
+        rows = self._query("SELECT value FROM settings WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def set_setting(self, key, value):
+        with self._lock, self._conn as conn:
+            conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+
+    def settings(self):
+        return dict(self._query("SELECT key, value FROM settings ORDER BY rowid"))
+
+    # Mods
+
+    def mods(self):
+        return {filename: bool(enabled)
+                for filename, enabled in self._query("SELECT filename, enabled FROM mods ORDER BY filename")}
+
+    def update_mods(self, added=(), removed=(), renamed=()):
+        gone = list(removed) + [old_name for old_name, _ in renamed]
+        rows = [mod_row(filename) for filename in list(added) + [new_name for _, new_name in renamed]]
+        if not (gone or rows):
+            return False
+        with Trace.span("write", cat="store", rows=len(gone) + len(rows)), self._lock, self._conn as conn:
+            conn.executemany("DELETE FROM mods WHERE filename = ?", [(f,) for f in gone])
+            conn.executemany("INSERT OR REPLACE INTO mods (filename, name, enabled) VALUES (?, ?, ?)", rows)
+        return True
+
+    def reconcile_mods(self, filenames):
+        with self._lock:
+            stored = {row[0]: row for row in self._query("SELECT filename, name, enabled FROM mods")}
+            gone = [(f,) for f in stored if f not in filenames]
+            rows = []
+            for filename in filenames:
+                row = mod_row(filename)
+                old = stored.get(filename)
+                if old is None or old[1] != row[1] or bool(old[2]) != row[2]:
+                    rows.append(row)
+            if not (gone or rows):
+                return False
+            with Trace.span("write", cat="store", rows=len(gone) + len(rows)), self._conn as conn:
+                conn.executemany("DELETE FROM mods WHERE filename = ?", gone)
+                conn.executemany("INSERT OR REPLACE INTO mods (filename, name, enabled) VALUES (?, ?, ?)", rows)
+            return True
+
+    # Profiles
+
+    def profile_names(self):
+        return [row[0] for row in self._query("SELECT name FROM profiles ORDER BY rowid")]
+
+    def get_profile(self, name):
+        with self._lock:
+            rows = self._query("SELECT mode FROM profiles WHERE name = ?", (name,))
+            if not rows:
+                return None
+            members = self._query("SELECT mod FROM profile_mods WHERE profile = ?", (name,))
+            return rows[0][0], [row[0] for row in members]
+
+    def put_profile(self, name, mode, mods):
+        with self._lock, self._conn as conn:
+            self._put_profile(conn, name, mode, mods)
+
+    @staticmethod
+    def _put_profile(conn, name, mode, mods):
+        # Upsert keeps the rowid, so the profile keeps its place in the list
+        conn.execute("INSERT INTO profiles (name, mode) VALUES (?, ?) "
+                     "ON CONFLICT (name) DO UPDATE SET mode = excluded.mode", (name, mode))
+        conn.execute("DELETE FROM profile_mods WHERE profile = ?", (name,))
+        conn.executemany("INSERT OR IGNORE INTO profile_mods (profile, mod) VALUES (?, ?)",
+                         [(name, mod_name) for mod_name in mods])
+
+    def delete_profile(self, name):
+        with self._lock, self._conn as conn:
+            conn.execute("DELETE FROM profiles WHERE name = ?", (name,))
+            conn.execute("DELETE FROM profile_mods WHERE profile = ?", (name,))
+            conn.execute("DELETE FROM state WHERE key = 'active_profile' AND value = ?", (name,))
+
+    def get_active_profile(self):
+        return self._get_state("active_profile")
+
+    def set_active_profile(self, name):
+        with self._lock, self._conn as conn:
+            self._set_state(conn, "active_profile", name)
+
+    # Caches (only changed rows are written)
+
+    def load_hashes(self):
+        rows = self._query("SELECT path, size, mtime_ns, sha256 FROM hashes")
+        return {path: (size, mtime_ns, sha) for path, size, mtime_ns, sha in rows}
+
+    def save_hashes(self, files, changed, removed):
+        with Trace.span("write", cat="store", rows=len(changed) + len(removed)), self._lock, self._conn as conn:
+            conn.executemany("DELETE FROM hashes WHERE path = ?", [(p,) for p in removed])
+            self._put_hashes(conn, {p: files[p] for p in changed if p in files})
+        return True
+
+    @staticmethod
+    def _put_hashes(conn, files):
+        conn.executemany("INSERT OR REPLACE INTO hashes (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                         [(path,) + tuple(entry) for path, entry in files.items()])
+
+    def load_metadata(self):
+        return {sha: json.loads(info) for sha, info in self._query("SELECT sha256, info FROM metadata")}
+
+    def save_metadata(self, by_hash, changed):
+        with Trace.span("write", cat="store", rows=len(changed)), self._lock, self._conn as conn:
+            self._put_metadata(conn, {sha: by_hash[sha] for sha in changed if sha in by_hash})
+        return True
+
+    @staticmethod
+    def _put_metadata(conn, by_hash):
+        conn.executemany("INSERT OR REPLACE INTO metadata (sha256, info) VALUES (?, ?)",
+                         [(sha, json.dumps(info, separators=(",", ":"))) for sha, info in by_hash.items()])
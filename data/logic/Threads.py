@@ -0,0 +1,13 @@
+'''
+Thread pools for the logic modules.
+
+concurrent.futures is only imported when a pool is first needed: it pulls
+in logging, which would slow down every start of the GUI and the command
+line even when nothing runs in parallel.
+'''
+
+
+def pool(max_workers, name):
+    # ThreadPoolExecutor with threads named "<name>_N"; use it as a context manager
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
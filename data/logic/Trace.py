@@ -0,0 +1,145 @@
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+# Spans kept in memory while tracing is on (oldest are dropped)
+BUFFER_SIZE = 20000
+# Spans at least this long show up in the diagnostics panel
+SLOW_MS = 50
+
+
+class _State:
+    enabled = False
+    events = collections.deque(maxlen=BUFFER_SIZE)
+
+
+_state = _State()
+_origin_ns = time.perf_counter_ns()
+
+
+class _NullSpan:
+    # Returned while tracing is off: entering and leaving it costs two calls
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "start")
+
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"
+        _state.events.append((self.name, self.cat, self.start, end - self.start,
+                              threading.get_ident(), self.args))
+        return False
+
+    def set(self, **args):
+        # Attach counts known only inside the span (items, bytes, ...)
+        self.args.update(args)
+
+
+def span(name, cat="logic", **args):
+    """
+    with Trace.span("scan", items=n) as s: ... ; s.set(changed=3)
+
+    Records name, duration, thread and args when tracing is enabled; a
+    shared no-op object otherwise.
+    """
+    if not _state.enabled:
+        return _NULL_SPAN
+    return _Span(name, cat, args)
+
+
+def traced(name=None, cat="logic"):
+    # Decorator form of span(); disabled cost is one attribute check
+    def decorate(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return fn(*args, **kwargs)
+            with _Span(span_name, cat, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def enable(buffer_size=BUFFER_SIZE):
+    if _state.events.maxlen != buffer_size:
+        _state.events = collections.deque(_state.events, maxlen=buffer_size)
+    _state.enabled = True
+
+
+def disable():
+    _state.enabled = False
+
+
+def is_enabled():
+    return _state.enabled
+
+
+def clear():
+    _state.events.clear()
+
+
+def events():
+    # (name, cat, start_ns, duration_ns, thread id, args), oldest first
+    return list(_state.events)
+
+
+def recent_slow(threshold_ms=SLOW_MS, limit=200):
+    # Newest first
+    threshold_ns = threshold_ms * 1_000_000
+    slow = [e for e in reversed(_state.events) if e[3] >= threshold_ns or "error" in e[5]]
+    return slow[:limit]
+
+
+def chrome_trace():
+    # Trace Event Format ("X" complete events), loadable in chrome://tracing and Perfetto
+    pid = os.getpid()
+    thread_names = {t.ident: t.name for t in threading.enumerate()}
+    trace_events = []
+    for name, cat, start, duration, tid, args in events():
+        trace_events.append({
+            "name": name, "cat": cat, "ph": "X", "pid": pid, "tid": tid,
+            "ts": (start - _origin_ns) / 1000, "dur": duration / 1000, "args": args,
+        })
+    for tid in {e["tid"] for e in trace_events}:
+        trace_events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                             "args": {"name": thread_names.get(tid, str(tid))}})
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+def export_chrome(path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(), f, default=str)
+    return path
+
+
+if os.environ.get("SRMM_TRACE"):
+    enable()
@@ -0,0 +1,226 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from data.logic import Scanner
+
+# inotify(7) flags
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+# IN_MODIFY is left out on purpose: it fires for every written chunk,
+# IN_CLOSE_WRITE once per finished write
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+READ_SIZE = 64 * 1024
+
+# Quiet time that ends a burst, and the longest a burst may be held back
+DEBOUNCE = 0.15
+MAX_DELAY = 1.0
+POLL_INTERVAL = 1.0
+
+BACKEND_INOTIFY = "inotify"
+BACKEND_POLL = "poll"
+
+
+def _load_inotify():
+    # libc inotify functions, or None where they don't exist
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        init = libc.inotify_init1
+        add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    init.argtypes = [ctypes.c_int]
+    init.restype = ctypes.c_int
+    add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    add_watch.restype = ctypes.c_int
+    return init, add_watch
+
+
+_INOTIFY = _load_inotify()
+
+
+def _is_mod_file(name):
+    return name.lower().endswith(Scanner.MOD_SUFFIXES)
+
+
+def folder_signature(folder):
+    # {filename: (size, mtime_ns)} of the mod files; stat info comes with
+    # the directory listing on Windows, so this is one syscall there
+    signature = {}
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                if _is_mod_file(entry.name):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    signature[entry.name] = (st.st_size, st.st_mtime_ns)
+    except OSError:
+        return None
+    return signature
+
+
+class FolderWatcher:
+    """
+    Watches one folder on a daemon thread and calls on_change() once per
+    burst of changes to mod files.
+
+    Uses inotify on Linux and polls the folder listing everywhere else (or
+    when inotify can't be set up). on_change runs on the watcher thread;
+    hand the work to the UI thread from there.
+    """
+
+    def __init__(self, on_change, debounce=DEBOUNCE, max_delay=MAX_DELAY, poll_interval=POLL_INTERVAL):
+        self.on_change = on_change
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.folder = None
+        self.backend = None
+        self._thread = None
+        self._stop = None
+        self._wake_w = None
+
+    def watch(self, folder):
+        # (Re)start on `folder`; None just stops watching
+        self.stop()
+        if not folder:
+            return
+        self.folder = folder
+        self._stop = threading.Event()
+        fd = self._open_inotify(folder)
+        if fd is not None:
+            self.backend = BACKEND_INOTIFY
+            # Writing to the pipe wakes the thread blocked in select()
+            wake_r, self._wake_w = os.pipe()
+            target, args = self._run_inotify, (fd, wake_r, self._stop)
+        else:
+            self.backend = BACKEND_POLL
+            target, args = self._run_poll, (folder, self._stop)
+        self._thread = threading.Thread(target=target, args=args, name="srmm-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+            if self._wake_w is not None:
+                try:
+                    os.write(self._wake_w, b"x")
+                except OSError:
+                    pass
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        if self._wake_w is not None:
+            os.close(self._wake_w)
+            self._wake_w = None
+        self._thread = None
+        self._stop = None
+        self.backend = None
+
+    def _open_inotify(self, folder):
+        if _INOTIFY is None:
+            return None
+        init, add_watch = _INOTIFY
+        fd = init(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        if add_watch(fd, os.fsencode(folder), WATCH_MASK) < 0:
+            print(f"inotify unavailable for {folder}: {os.strerror(ctypes.get_errno())}")
+            os.close(fd)
+            return None
+        return fd
+
+    def _notify(self):
+        try:
+            self.on_change()
+        except Exception as e:
+            print(f"Folder change handler failed: {e}")
+
+    def _run_inotify(self, fd, wake_r, stop):
+        pending_since = None  # start of the burst being collected
+        try:
+            while not stop.is_set():
+                if pending_since is None:
+                    timeout = None
+                else:
+                    # Flush after a quiet gap, but never hold a burst back longer than max_delay
+                    timeout = max(0.0, min(self.debounce, pending_since + self.max_delay - time.monotonic()))
+                readable, _, _ = select.select([fd, wake_r], [], [], timeout)
+                if stop.is_set():
+                    break
+                if fd in readable:
+                    relevant, gone = self._read_events(fd)
+                    if gone:
+                        # Folder deleted or moved away; one last update, then stop
+                        self._notify()
+                        break
+                    if relevant and pending_since is None:
+                        pending_since = time.monotonic()
+                    if pending_since is None or time.monotonic() - pending_since < self.max_delay:
+                        continue
+                if pending_since is not None:
+                    pending_since = None
+                    self._notify()
+        finally:
+            for handle in (fd, wake_r):
+                try:
+                    os.close(handle)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _read_events(fd):
+        # Drain the queue; returns (mod file changed, folder gone)
+        relevant = False
+        while True:
+            try:
+                data = os.read(fd, READ_SIZE)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return relevant, False
+                raise
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+                offset += EVENT_HEADER.size + length
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                    return True, True
+                if mask & IN_Q_OVERFLOW or _is_mod_file(os.fsdecode(name)):
+                    relevant = True
+
+    def _run_poll(self, folder, stop):
+        last = folder_signature(folder)
+        while not stop.wait(self.poll_interval):
+            current = folder_signature(folder)
+            if current != last:
+                # Wait for the folder to settle so a copy in progress is seen once
+                while not stop.wait(self.debounce):
+                    settled = folder_signature(folder)
+                    if settled == current:
+                        break
+                    current = settled
+                if stop.is_set():
+                    break
+                last = current
+                self._notify()